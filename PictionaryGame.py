@@ -8,21 +8,71 @@
 #  in PyCharm using the following technique https://www.jetbrains.com/help/pycharm/inline-documentation.html
 
 from PyQt6.QtWidgets import QApplication, QWidget, QMainWindow, QFileDialog, QDockWidget, QPushButton, QVBoxLayout, \
-    QLabel, QMessageBox, QSlider, QColorDialog, QComboBox, QSizePolicy
-from PyQt6.QtGui import QIcon, QPainter, QPen, QAction, QPixmap, QFont
+    QLabel, QMessageBox, QSlider, QColorDialog, QComboBox, QSizePolicy, QRubberBand, QProgressDialog, QLineEdit
+from PyQt6.QtGui import QPainter, QPen, QAction, QActionGroup, QImage, QFont, QColor, QPolygon
 import sys
-import csv, random
-from PyQt6.QtCore import Qt, QPoint
-
+import argparse
+from PyQt6.QtCore import Qt, QPoint, QPointF, QRect, QRectF, QSize, QTimer, QEvent
+from strokes import StrokeModel, StrokeSimplifier, InputStats
+import time
+from history import CanvasHistory
+from brushes import BrushTip, BrushStroke, DabCache
+from words import WordProvider
+from corpus import WordCorpus
+from saver import ImageSaver, SaveOptions
+from engine import GameEngine, loadScoring
+from scores import ScoreBoard, SCORE_LOG
+from metrics import metrics, LEVELS, INFO, DEBUG
+from overlay import PerfOverlay
+from recorder import SessionRecorder, canvasDigest
+from icons import IconAtlas
+from loader import ImageLoader, STAGES
+from archive import RoundArchive, ARCHIVE_DIRECTORY
+from autosave import Autosave, readJournal, AUTOSAVE_FILE, CHECKPOINT_MS
+from guesses import CORRECT, CLOSE
+from server import checkEvent
+import os
+import random
+
+# number of (colour, size) pens kept around for reuse
+PEN_CACHE_SIZE = 16
+# bytes of canvas tiles the undo history may hold before the oldest changes are forgotten
+UNDO_MEMORY_LIMIT = 64 * 1024 * 1024
+# the canvas grows in steps of this many pixels and is never rescaled
+CANVAS_GROW_STEP = 256
+# milliseconds without a resize event before the window size is considered settled
+RESIZE_SETTLE_MS = 150
+# mouse moves are collected and drawn as one polyline per frame of this many milliseconds
+FRAME_MS = 16
+# recorded and transmitted strokes drop points within this many pixels of a straight line, 0 keeps every point
+SIMPLIFY_TOLERANCE = 1.0
+# the bucket fills pixels whose colour channels are all within this much (0 to 255) of the pixel clicked
+FILL_TOLERANCE = 32
+# widest pen accepted from a remote drawer, the brush size slider stops at 10
+MAX_REMOTE_WIDTH = 100
+# word corpus database built with corpus.py, the *mode.txt files are used on their own if it doesn't exist
+CORPUS_FILE = "words.db"
 
 class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidget.html
     '''
     Painting Application class
     '''
 
-    def __init__(self):
+    def __init__(self, remote=None, seed=None, players=2, teams=None):
         super().__init__()
 
+        # session recording (see recorder.py), None unless startRecording is called
+        self.recorder = None
+        # the word RNG is seeded explicitly so a recorded session can be replayed with the same words
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+
+        # connection to a room on a stroke server, a drawer streams its strokes to it and a guesser draws what it receives
+        self.remote = remote
+        self.remotePen = None
+        self.remoteLast = None
+        self.remoteStroke = None  # BrushStroke of the drawer's stroke when it is drawn with a brush tip
+        self.remoteSkipped = 0  # malformed events received from the server
+
         # set window title
         self.setWindowTitle("Pictionary Game - A2 Template")
 
@@ -33,16 +83,17 @@ class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidg
         height = 600
         self.setGeometry(top, left, width, height)
 
-        # set the icon
-        # windows version
-        self.setWindowIcon(
-            QIcon("./icons/paint-brush.png"))  # documentation: https://doc.qt.io/qt-6/qwidget.html#windowIcon-prop
-        # mac version - not yet working
-        # self.setWindowIcon(QIcon(QPixmap("./icons/paint-brush.png")))
-
         # image settings (default)
-        self.image = QPixmap("./icons/canvas.png")  # documentation: https://doc.qt.io/qt-6/qpixmap.html
-        self.image.fill(Qt.GlobalColor.white)  # documentation: https://doc.qt.io/qt-6/qpixmap.html#fill
+        # the canvas has a fixed origin and only ever grows, resizing the window changes how much of it is visible
+        # rather than rescaling it. It is allocated at the screen's device pixel ratio so painting it is a 1:1 copy.
+        # It is a QImage in a fixed format so its pixels can also be worked on directly as an array (see canvasPixels)
+        self.image = self.newCanvas(width, height)  # documentation: https://doc.qt.io/qt-6/qimage.html
+
+        # resizing is debounced, the canvas is only grown once the window size has settled
+        self.resizeTimer = QTimer(self)  # documentation: https://doc.qt.io/qt-6/qtimer.html
+        self.resizeTimer.setSingleShot(True)
+        self.resizeTimer.setInterval(RESIZE_SETTLE_MS)
+        self.resizeTimer.timeout.connect(self.growCanvas)
         mainWidget = QWidget()
         mainWidget.setMaximumWidth(300)
 
@@ -50,6 +101,58 @@ class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidg
         self.drawing = False
         self.brushSize = 3
         self.brushColor = Qt.GlobalColor.black  # documentation: https://doc.qt.io/qt-6/qt.html#GlobalColor-enum
+        self.tool = "brush"  # "brush" draws strokes, "bucket" flood fills the area clicked
+        self.fillTolerance = FILL_TOLERANCE
+
+        # pens are cached by (colour, size) and the painter is kept open for the whole of a stroke,
+        # so a mouse move does not have to allocate a new QPen or begin/end a new QPainter
+        self.penCache = {}
+        self.strokePainter = None
+        # strokes are drawn with the pen unless a brush tip is chosen, brush strokes stamp dabs from a shared cache
+        self.brushTip = None
+        self.dabCache = DabCache()
+        self.brushStroke = None  # the BrushStroke of the stroke in progress
+        self.tabletPressure = None  # pressure of the last tablet event, None when drawing with a mouse
+        self.updatePen()
+
+        # vector record of every stroke on the canvas, self.image is a cache that can be regenerated from it
+        self.strokes = StrokeModel()
+
+        # mouse moves are coalesced and drawn once per frame, points are simplified before they are recorded or sent
+        self.pendingMoves = []  # (x, y, time received, pressure) not drawn yet
+        self.frameTimer = QTimer(self)
+        self.frameTimer.setSingleShot(True)
+        self.frameTimer.setInterval(FRAME_MS)
+        self.frameTimer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.frameTimer.timeout.connect(self.flushMoves)
+        self.simplifier = StrokeSimplifier(SIMPLIFY_TOLERANCE)
+        self.inputStats = InputStats()  # moves per frame, points kept and input latency
+        metrics.addSource("input", self.inputStats.summary)  # exported with the metrics and shown in the overlay
+
+        # undo / redo history of the tiles each change touched
+        self.history = CanvasHistory(UNDO_MEMORY_LIMIT)
+
+        # images are encoded and written on a background thread pool so saving never blocks drawing
+        self.saveOptions = SaveOptions()  # format, quality and compression level used by save and save as
+        self.saver = ImageSaver(self)
+        self.saver.saved.connect(self.imageSaved)
+        self.saver.failed.connect(self.imageSaveFailed)
+
+        # images are opened on a worker thread and decoded straight at the size of the canvas
+        self.loader = ImageLoader(self)
+        self.loader.loaded.connect(self.imageLoaded)
+        self.loader.failed.connect(self.imageLoadFailed)
+        self.loader.progress.connect(self.imageLoadProgress)
+        self.openProgress = None  # progress dialog of the image being opened
+        self.openStarted = 0.0
+
+        # the final canvas of every round is archived in the background (see archive.py), None unless startArchive is called
+        self.archive = None
+        # the canvas and game state are journaled for crash recovery (see autosave.py), None unless startAutosave is called
+        self.autosave = None
+        self.autosaveTimer = QTimer(self)
+        self.autosaveTimer.setInterval(CHECKPOINT_MS)
+        self.autosaveTimer.timeout.connect(self.autosaveCheckpoint)
 
         # This is an extra feature
         # ----------------------------------------------------------------------------
@@ -123,11 +226,19 @@ class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidg
         # reference to last point recorded by mouse
         self.lastPoint = QPoint()  # documentation: https://doc.qt.io/qt-6/qpoint.html
 
-        # keeping track of the game, scores and turn
-        self.currentTurn = 1
-        self.p1score = 0
-        self.p2score = 0
-        self.gameStarted = False
+        # region selected by dragging with the right mouse button, copy, cut and paste use the whole canvas without one
+        self.selecting = False
+        self.selectionOrigin = QPoint()
+        self.selection = None
+        self.rubberBand = QRubberBand(QRubberBand.Shape.Rectangle, self)  # documentation: https://doc.qt.io/qt-6/qrubberband.html
+
+        # last image copied or cut, kept in memory so paste works even if the system clipboard is changed or unavailable
+        self.clipboardImage = None
+
+        # keeping track of the game, scores and turn is done by the game engine, each mode's word file is only read once
+        rng = random.Random(self.seed)
+        self.words = WordProvider(rng=rng, corpus=WordCorpus(CORPUS_FILE, rng) if os.path.exists(CORPUS_FILE) else None)
+        self.engine = GameEngine(self.words, players=players, teams=teams)
 
         # Brush size slider
         self.brushSizeSlider = QSlider(Qt.Orientation.Horizontal)
@@ -137,112 +248,73 @@ class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidg
         self.brushSizeSlider.valueChanged.connect(self.changeBrushSize)
 
         # set up menus
+        # the menus are only filled in, and their icons loaded from the icon atlas, the first time they are opened.
+        # The actions are created up front without icons and added to the window so their shortcuts work straight away
+        self.icons = IconAtlas()
         mainMenu = self.menuBar()  # create a menu bar
         mainMenu.setNativeMenuBar(False)
         fileMenu = mainMenu.addMenu(" File")  # add the file menu to the menu bar, the space is required as "File" is reserved in Mac
         brushSizeMenu = mainMenu.addMenu(" Brush Size")  # add the "Brush Size" menu to the menu bar
         brushColorMenu = mainMenu.addMenu(" Brush Colour")  # add the "Brush Colour" menu to the menu bar
-
-        # save menu item
-        saveAction = QAction(QIcon("./icons/save.png"), "Save", self)  # create a save action with a png as an icon, documentation: https://doc.qt.io/qt-6/qaction.html
-        saveAction.setShortcut("Ctrl+S")  # connect this save action to a keyboard shortcut, documentation: https://doc.qt.io/qt-6/qaction.html#shortcut-prop
-        fileMenu.addAction(saveAction)  # add the save action to the file menu, documentation: https://doc.qt.io/qt-6/qwidget.html#addAction
-        saveAction.triggered.connect(self.save)  # when the menu option is selected or the shortcut is used the save slot is triggered, documentation: https://doc.qt.io/qt-6/qaction.html#triggered
-
-        # copy menu item
-        copyAction = QAction(QIcon("./icons/copy.png"), "Copy", self)  # create a copy action with a png as an icon
-        copyAction.setShortcut("Ctrl+F")  # connect this copy action to a keyboard shortcut
-        fileMenu.addAction(copyAction)  # add the copy action to the file menu
-        copyAction.triggered.connect(
-            self.copy)  # when the menu option is selected or the shortcut is used the copy slot is triggered
-
-        # cut menu item
-        cutAction = QAction(QIcon("./icons/cut.png"), "Cut", self)  # create a cut action with a png as an icon
-        cutAction.setShortcut("Ctrl+X")  # connect this cut action to a keyboard shortcut
-        fileMenu.addAction(cutAction)  # add the cut action to the file menu
-        cutAction.triggered.connect(
-            self.cut)  # when the menu option is selected or the shortcut is used the cut slot is triggered
-
-        # paste menu item
-        pasteAction = QAction(QIcon("./icons/paste.png"), "Paste", self)  # create a paste action with a png as an icon
-        pasteAction.setShortcut("Ctrl+V")  # connect this paste action to a keyboard shortcut
-        fileMenu.addAction(pasteAction)  # add the paste action to the file menu
-        pasteAction.triggered.connect(
-            self.paste)  # when the menu option is selected or the shortcut is used the paste slot is triggered
-
-        # new menu item
-        newAction = QAction(QIcon("./icons/new.png"), "New", self)  # create a new action with a png as an icon
-        newAction.setShortcut("Ctrl+N")  # connect this new action to a keyboard shortcut
-        fileMenu.addAction(newAction)  # add the new action to the file menu
-        newAction.triggered.connect(
-            self.new)  # when the new option is selected or the shortcut is used the new slot is triggered
-
-        # exit menu item
-        exitAction = QAction(QIcon("./icons/exit.png"), "Exit", self)  # create an exit action with a png as an icon
-        exitAction.setShortcut("Ctrl+Q")  # connect this exit action to a keyboard shortcut
-        fileMenu.addAction(exitAction)  # add the exit action to the file menu
-        exitAction.triggered.connect(
-            self.close)  # when the new option is selected or the shortcut is used the exit slot is triggered
-
-        # save as menu item
-        saveAsAction = QAction(QIcon("./icons/saveas.png"), "Save As...",
-                               self)  # create a save as action with a png as an icon
-        saveAsAction.setShortcut("Ctrl+Shift+S")  # connect this save as action to a keyboard shortcut
-        fileMenu.addAction(saveAsAction)  # add the save as action to the file menu
-        saveAsAction.triggered.connect(
-            self.saveAs)  # when the save as option is selected or the shortcut is used the save as slot is triggered
-
-        # clear
-        clearAction = QAction(QIcon("./icons/clear.png"), "Clear", self)  # create a clear action with a png as an icon
-        clearAction.setShortcut("Ctrl+C")  # connect this clear action to a keyboard shortcut
-        fileMenu.addAction(clearAction)  # add this action to the file menu
-        clearAction.triggered.connect(self.clear)  # when the menu option is selected or the shortcut is used the clear slot is triggered
+        toolMenu = mainMenu.addMenu(" Tools")  # brush or bucket fill and the fill tolerance
+
+        # (icon, text, shortcut, slot) for each menu item, actions that change the canvas or the game are recorded
+        fileActions = self.lazyMenu(fileMenu, [
+            ("open", "Open...", "Ctrl+O", self.open),
+            ("save", "Save", "Ctrl+S", self.save),
+            ("copy", "Copy", "Ctrl+F", self.recorded(self.copy)),
+            ("cut", "Cut", "Ctrl+X", self.recorded(self.cut)),
+            ("paste", "Paste", "Ctrl+V", self.recorded(self.paste)),
+            ("new", "New", "Ctrl+N", self.recorded(self.new)),
+            ("exit", "Exit", "Ctrl+Q", self.close),
+            ("saveas", "Save As...", "Ctrl+Shift+S", self.saveAs),
+            ("clear", "Clear", "Ctrl+C", self.recorded(self.clear)),
+            ("undo", "Undo", "Ctrl+Z", self.recorded(self.undo)),
+            ("redo", "Redo", "Ctrl+Y", self.recorded(self.redo)),
+            (None, "Performance Overlay", "F3", self.toggleOverlay),  # FPS and paint times in the side dock
+            (None, "Export Metrics...", None, self.exportMetrics),  # write the collected metrics to a file
+            (None, "Leaderboard", "Ctrl+L", self.showLeaderboard),  # standings over every game in the score log
+        ])
+        self.overlayAction = next(action for action in fileActions if action.text() == "Performance Overlay")
+        self.overlayAction.setCheckable(True)  # the overlay is toggled on and off
 
         # brush thickness
-        threepxAction = QAction(QIcon("./icons/threepx.png"), "3px", self)
-        threepxAction.setShortcut("Ctrl+3")
-        brushSizeMenu.addAction(threepxAction)  # connect the action to the function below
-        threepxAction.triggered.connect(self.threepx)
-
-        fivepxAction = QAction(QIcon("./icons/fivepx.png"), "5px", self)
-        fivepxAction.setShortcut("Ctrl+5")
-        brushSizeMenu.addAction(fivepxAction)
-        fivepxAction.triggered.connect(self.fivepx)
-
-        sevenpxAction = QAction(QIcon("./icons/sevenpx.png"), "7px", self)
-        sevenpxAction.setShortcut("Ctrl+7")
-        brushSizeMenu.addAction(sevenpxAction)
-        sevenpxAction.triggered.connect(self.sevenpx)
-
-        ninepxAction = QAction(QIcon("./icons/ninepx.png"), "9px", self)
-        ninepxAction.setShortcut("Ctrl+9")
-        brushSizeMenu.addAction(ninepxAction)
-        ninepxAction.triggered.connect(self.ninepx)
+        self.lazyMenu(brushSizeMenu, [
+            ("threepx", "3px", "Ctrl+3", self.threepx),
+            ("fivepx", "5px", "Ctrl+5", self.fivepx),
+            ("sevenpx", "7px", "Ctrl+7", self.sevenpx),
+            ("ninepx", "9px", "Ctrl+9", self.ninepx),
+        ])
 
         # brush colors
-        blackAction = QAction(QIcon("./icons/black.png"), "Black", self)
-        blackAction.setShortcut("Ctrl+B")
-        brushColorMenu.addAction(blackAction);
-        blackAction.triggered.connect(self.black)
-
-        redAction = QAction(QIcon("./icons/red.png"), "Red", self)
-        redAction.setShortcut("Ctrl+R")
-        brushColorMenu.addAction(redAction);
-        redAction.triggered.connect(self.red)
-
-        greenAction = QAction(QIcon("./icons/green.png"), "Green", self)
-        greenAction.setShortcut("Ctrl+G")
-        brushColorMenu.addAction(greenAction);
-        greenAction.triggered.connect(self.green)
-
-        yellowAction = QAction(QIcon("./icons/yellow.png"), "Yellow", self)
-        yellowAction.setShortcut("Ctrl+Y")
-        brushColorMenu.addAction(yellowAction);
-        yellowAction.triggered.connect(self.yellow)
-
-        colorPickerAction = QAction(QIcon("./icons/color-picker.png"), "Color Picker", self)
-        brushColorMenu.addAction(colorPickerAction)
-        colorPickerAction.triggered.connect(self.colorPicker)
+        self.lazyMenu(brushColorMenu, [
+            ("black", "Black", "Ctrl+B", self.black),
+            ("red", "Red", "Ctrl+R", self.red),
+            ("green", "Green", "Ctrl+G", self.green),
+            ("yellow", "Yellow", "Ctrl+Shift+Y", self.yellow),  # Ctrl+Y is redo
+            ("color-picker", "Color Picker", None, self.colorPicker),
+        ])
+
+        # tools, one of each group is checked, documentation: https://doc.qt.io/qt-6/qactiongroup.html
+        toolActions = self.lazyMenu(toolMenu, [
+            ("brush", "Brush", "Ctrl+D", self.recorded(self.brushTool)),
+            ("bucket", "Bucket Fill", "Ctrl+K", self.recorded(self.bucketTool)),
+            (None, "Exact Fill", None, self.recorded(self.exactFill)),
+            (None, "Low Tolerance", None, self.recorded(self.lowTolerance)),
+            (None, "Medium Tolerance", None, self.recorded(self.mediumTolerance)),
+            (None, "High Tolerance", None, self.recorded(self.highTolerance)),
+            (None, "Invert Colours", "Ctrl+I", self.recorded(self.invertColours)),  # of the selection or the canvas
+            (None, "Pen", None, self.recorded(self.penTip)),
+            (None, "Hard Brush", None, self.recorded(self.hardBrush)),
+            (None, "Soft Brush", None, self.recorded(self.softBrush)),
+            (None, "Chalk", None, self.recorded(self.chalkBrush)),
+        ])
+        for group, checked in ((toolActions[:2], 0), (toolActions[2:6], 2), (toolActions[7:11], 0)):
+            actionGroup = QActionGroup(self)
+            for action in group:
+                action.setCheckable(True)
+                actionGroup.addAction(action)
+            group[checked].setChecked(True)
 
         # Side Dock
         self.dockInfo = QDockWidget()
@@ -267,13 +339,14 @@ class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidg
         # Add a label to show the scores
         self.vbdock.addWidget(QLabel("Scores:"))
 
-        # Add labels to show the scores of player 1 and 2
-        self.P1ScoreLabel = QLabel("Player 1: " + str(self.p1score))
-        self.P2ScoreLabel = QLabel("Player 2: " + str(self.p2score))
+        # Add a label to show the score of each player, then of each team when playing in teams
+        self.scoreLabels = [QLabel() for _ in range(self.engine.players + len(self.engine.teamScores()))]
+        self.P1ScoreLabel, self.P2ScoreLabel = self.scoreLabels[:2]
 
         # Add the score labels to the widget
-        self.vbdock.addWidget(self.P1ScoreLabel)
-        self.vbdock.addWidget(self.P2ScoreLabel)
+        for label in self.scoreLabels:
+            self.vbdock.addWidget(label)
+        self.updateLabels()
 
         # Add a stretch to fill the remaining space
         self.vbdock.addStretch(1)
@@ -281,12 +354,16 @@ class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidg
         # Add a label and a combo box to select the mode
         self.modeLabel = QLabel("Select mode:")
         self.selectMode = QComboBox()
-        self.selectMode.addItem("easy")
-        self.selectMode.addItem("hard")
+        # one entry per word pack available
+        self.selectMode.addItems(self.words.modes())  # documentation: https://doc.qt.io/qt-6/qcombobox.html#addItems
 
         # Add a button to start the game
         self.btnStart = QPushButton("Start ")
 
+        # Add a box to type guesses in, a correct one scores like the Submit button
+        self.guessInput = QLineEdit()  # documentation: https://doc.qt.io/qt-6/qlineedit.html
+        self.guessInput.setPlaceholderText("Type a guess")
+
         # Add a button to mark the guess as submit
         self.btnGuessed = QPushButton("Submit")
 
@@ -296,14 +373,19 @@ class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidg
         self.vbdock.addSpacing(10)
         self.vbdock.addWidget(self.btnStart)
         self.vbdock.addSpacing(5)
+        self.vbdock.addWidget(self.guessInput)
         self.vbdock.addWidget(self.btnGuessed)
         self.vbdock.addSpacing(5)
         # Widget to change the size of the brush
         self.vbdock.addWidget(self.brushSizeSlider)
+        # FPS, events per second and paint times, hidden until turned on from the file menu
+        self.perfOverlay = PerfOverlay()
+        self.vbdock.addWidget(self.perfOverlay)
 
         # Connect the button clicks to the corresponding functions
-        self.btnStart.clicked.connect(self.start)
-        self.btnGuessed.clicked.connect(lambda: self.guessedCorrectly())
+        self.btnStart.clicked.connect(self.recorded(self.start))
+        self.btnGuessed.clicked.connect(self.recorded(self.guessedCorrectly))
+        self.guessInput.returnPressed.connect(self.submitGuess)
 
         # Connect the mode selection to the corresponding function
         self.selectMode.currentIndexChanged.connect(self.chooseMode)
@@ -317,49 +399,711 @@ class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidg
         # Set the widget as the content of the dock
         self.dockInfo.setWidget(self.playerInfo)
 
-        # Get the list of words for the game
-        self.getList("easy")
-        self.currentWord = self.getWord()
+        if self.remote is not None:
+            self.setWindowTitle("Pictionary Game - " + self.remote.role + " in room " + self.remote.room)
+            if self.remote.role == "guesser":
+                self.remote.framesReceived.connect(self.drawRemote)
+            else:
+                self.remote.guessesReceived.connect(self.remoteGuesses)
+            self.remote.disconnected.connect(self.remoteDisconnected)
+
+        # reading the word list and loading the window icon wait until the event loop is running and the window is up
+        self.startupFinished = False
+        QTimer.singleShot(0, self.finishStartup)  # documentation: https://doc.qt.io/qt-6/qtimer.html#singleShot
+
+    def finishStartup(self):
+        '''
+        The part of the set up that the first frame doesn't need, run once from the event loop after the window is shown
+        '''
+        if self.startupFinished:
+            return
+        self.startupFinished = True
+        self.setWindowIcon(self.icons.icon("paint-brush"))  # documentation: https://doc.qt.io/qt-6/qwidget.html#windowIcon-prop
+        # Get the list of words for the game, unless a turn has already drawn a word
+        if self.currentWord is None:
+            self.getList(self.selectMode.currentText())
+            self.currentWord = self.getWord()
+
+    # game state, kept by the engine
+    @property
+    def currentTurn(self):
+        return self.engine.currentTurn
+
+    @currentTurn.setter
+    def currentTurn(self, value):
+        self.engine.currentTurn = value
+
+    @property
+    def p1score(self):
+        return self.engine.scores[0]
+
+    @p1score.setter
+    def p1score(self, value):
+        self.engine.scores[0] = value
+
+    @property
+    def p2score(self):
+        return self.engine.scores[1]
+
+    @p2score.setter
+    def p2score(self, value):
+        self.engine.scores[1] = value
+
+    @property
+    def gameStarted(self):
+        return self.engine.gameStarted
+
+    @gameStarted.setter
+    def gameStarted(self, value):
+        self.engine.gameStarted = value
+
+    @property
+    def currentWord(self):
+        return self.engine.currentWord
+
+    @currentWord.setter
+    def currentWord(self, value):
+        self.engine.currentWord = value
 
     # event handlers
     def mousePressEvent(self, event):  # when the mouse is pressed, documentation: https://doc.qt.io/qt-6/qwidget.html#mousePressEvent
+        metrics.count("input.events")
+        if self.recorder is not None:
+            self.recorder.record("press", x=event.pos().x(), y=event.pos().y(), button=event.button().value,
+                                 **self.pressureField())
+        if event.button() == Qt.MouseButton.LeftButton and self.isGuesser():  # a remote guesser's canvas only shows the drawer's strokes
+            return
         if event.button() == Qt.MouseButton.LeftButton:  # if the pressed button is the left button
+            if self.resizeTimer.isActive():  # make sure the canvas covers the window before drawing on it
+                self.resizeTimer.stop()
+                self.growCanvas()
+            if self.tool == "bucket":
+                self.fill(event.pos())
+                return
             self.drawing = True  # enter drawing mode
             self.lastPoint = event.pos()  # save the location of the mouse press as the lastPoint
-            print(self.lastPoint)  # print the lastPoint for debugging purposes
+            self.beginStroke()  # open the painter used for every segment of this stroke, this also starts recording for undo
+            self.recordStroke()
+            metrics.log(DEBUG, "press", x=self.lastPoint.x(), y=self.lastPoint.y())
+        elif event.button() == Qt.MouseButton.RightButton:  # the right button selects a region of the canvas
+            self.selecting = True
+            self.selectionOrigin = event.pos()
+            self.rubberBand.setGeometry(QRect(self.selectionOrigin, QSize()))
+            self.rubberBand.show()
 
     def mouseMoveEvent(self, event):  # when the mouse is moved, documenation: documentation: https://doc.qt.io/qt-6/qwidget.html#mouseMoveEvent
+        metrics.count("input.events")
+        if self.recorder is not None:
+            self.recorder.record("move", x=event.pos().x(), y=event.pos().y(), **self.pressureField())
+        if self.selecting:
+            self.rubberBand.setGeometry(QRect(self.selectionOrigin, event.pos()).normalized())
         if self.drawing:
-            painter = QPainter(self.image)  # object which allows drawing to take place on an image
-            # allows the selection of brush colour, brish size, line type, cap type, join type. Images available here http://doc.qt.io/qt-6/qpen.html
-            painter.setPen(QPen(self.brushColor, self.brushSize, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin))
-            painter.drawLine(self.lastPoint, event.pos())  # draw a line from the point of the orginal press to the point to where the mouse was dragged to
-            self.lastPoint = event.pos()  # set the last point to refer to the point we have just moved to, this helps when drawing the next line segment
-            self.update()  # call the update method of the widget which calls the paintEvent of this class
+            if self.strokePainter is None:  # the stroke was interrupted, e.g. by a clear, so start a new one
+                self.beginStroke()
+            # the point is drawn with the other moves of this frame, a fast mouse or tablet sends several per frame
+            self.pendingMoves.append((event.pos().x(), event.pos().y(), time.perf_counter(), self.tabletPressure))
+            self.inputStats.moves += 1
+            if not self.frameTimer.isActive():
+                self.frameTimer.start()
+
+    def flushMoves(self):
+        '''
+        Draw the moves received since the last frame as a single polyline and record the points that survive
+        simplification in the stroke model and, when playing online, send them to the guessers
+        '''
+        self.frameTimer.stop()
+        moves, self.pendingMoves = self.pendingMoves, []
+        if not moves or self.strokePainter is None:
+            return
+        if self.recorder is not None:  # how moves were grouped into frames changes the pixels, so it is recorded too
+            self.recorder.record("frame")
+        start = time.perf_counter()
+        polyline = QPolygon([self.lastPoint] + [QPoint(x, y) for x, y, _, _ in moves])  # documentation: https://doc.qt.io/qt-6/qpolygon.html
+        pad = self.brushSize // 2 + 2  # half the pen width plus a pixel either side for the round caps, or the dabs
+        dirty = polyline.boundingRect().adjusted(-pad, -pad, pad, pad)  # only the area covered by these segments will change
+        self.history.touch(self.image, dirty)  # keep the tiles under the segments as they were for undo
+        if self.brushStroke is not None:  # stamp dabs along the segments
+            for x, y, _, pressure in moves:
+                self.brushStroke.lineTo(self.strokePainter, x, y, 1.0 if pressure is None else pressure)
+        else:
+            self.strokePainter.drawPolyline(polyline)  # draw lines from the last point through every point moved to this frame
+        self.lastPoint = QPoint(moves[-1][0], moves[-1][1])  # set the last point to refer to the point we have just moved to, this helps when drawing the next frame
+        self.update(dirty)  # schedule a paintEvent for the changed region only, documentation: https://doc.qt.io/qt-6/qwidget.html#update-2
+
+        kept = []
+        for x, y, t, pressure in moves:
+            kept += self.simplifier.add(x, y, t, pressure)
+        self.recordPoints(kept)
+
+        stats = self.inputStats
+        stats.frames += 1
+        stats.pointsDrawn += len(moves)
+        now = time.perf_counter()
+        stats.latencies.append(now - moves[0][2])  # the oldest move waited longest
+        metrics.record("input.frame", now - start)
+        metrics.record("input.latency", now - moves[0][2])
+
+    def recordStroke(self):
+        '''
+        Start recording a stroke at the last point, in the stroke model and for the guessers
+        '''
+        x, y = self.lastPoint.x(), self.lastPoint.y()
+        self.simplifier.reset(x, y, time.perf_counter(), self.tabletPressure)
+        self.strokes.beginStroke(self.brushColor, self.brushSize, x, y, self.brushTip, self.tabletPressure)
+        if self.remote is not None:  # stream the stroke to the guessers
+            self.remote.beginStroke(QColor(self.brushColor).rgba(), self.brushSize, x, y, self.brushTip)
+
+    def recordPoints(self, points):
+        if not points:
+            return
+        for x, y, t, pressure in points:
+            self.strokes.addPoint(x, y, t, pressure)  # record the point in the stroke model
+        self.inputStats.pointsKept += len(points)
+        if self.remote is not None:
+            self.remote.addPoints([value for x, y, _, _ in points for value in (x, y)])
+
+    def segmentRect(self, start, end, width=None):
+        '''
+        Bounding rectangle of a line segment drawn with the current brush (or a pen of the given width), padded by
+        half the pen width so that the round caps and joins at either end are included
+        '''
+        pad = (width or self.brushSize) // 2 + 2  # half the pen width plus a pixel either side for rounding
+        return QRect(start, end).normalized().adjusted(-pad, -pad, pad, pad)  # documentation: https://doc.qt.io/qt-6/qrect.html#normalized
 
     def mouseReleaseEvent(self, event):  # when the mouse is released, documentation: https://doc.qt.io/qt-6/qwidget.html#mouseReleaseEvent
+        metrics.count("input.events")
+        if self.recorder is not None:
+            self.recorder.record("release", x=event.pos().x(), y=event.pos().y(), button=event.button().value)
         if event.button() == Qt.MouseButton.LeftButton:  # if the released button is the left button, documentation: https://doc.qt.io/qt-6/qt.html#MouseButton-enum ,
             self.drawing = False  # exit drawing mode
+            self.endStroke()  # draw any moves still pending and close the painter opened in mousePressEvent
+            self.recordPoints(self.simplifier.finish())  # the last point of a stroke is always kept
+            self.strokes.endStroke()
+            self.history.commit(self.image, self.strokes.strokes)  # the finished stroke becomes one undo step
+            if self.remote is not None:
+                self.remote.endStroke()
+        elif event.button() == Qt.MouseButton.RightButton and self.selecting:
+            self.selecting = False
+            selection = QRect(self.selectionOrigin, event.pos()).normalized().intersected(self.canvasRect())
+            if selection.width() > 1 and selection.height() > 1:
+                self.selection = selection
+                self.rubberBand.setGeometry(selection)
+            else:  # a right click without a drag removes the selection
+                self.selection = None
+                self.rubberBand.hide()
+
+    def beginStroke(self):
+        '''
+        Open a painter on the canvas that stays active until the stroke ends
+        '''
+        self.endStroke()
+        if not self.history.recording():
+            self.history.begin(self.image, self.strokes.strokes)
+        self.strokePainter = QPainter(self.image)  # object which allows drawing to take place on an image
+        self.strokePainter.setPen(self.pen)
+        self.brushStroke = self.newBrushStroke()
+
+    def endStroke(self):
+        '''
+        Close the stroke painter, this must be done before the canvas is filled, replaced or saved
+        '''
+        if self.strokePainter is not None:
+            self.flushMoves()
+            self.strokePainter.end()  # documentation: https://doc.qt.io/qt-6/qpainter.html#end
+            self.strokePainter = None
+            self.brushStroke = None
+
+    def newBrushStroke(self):
+        '''
+        A BrushStroke starting at the last point with the current brush, None when drawing with the pen
+        '''
+        if self.brushTip is None:
+            return None
+        stroke = BrushStroke(self.dabCache, self.brushTip, QColor(self.brushColor).rgba(), self.brushSize,
+                             self.image.devicePixelRatio())
+        stroke.moveTo(self.lastPoint.x(), self.lastPoint.y(), 1.0 if self.tabletPressure is None else self.tabletPressure)
+        return stroke
+
+    def pressureField(self):
+        return {} if self.tabletPressure is None else {"pressure": self.tabletPressure}
+
+    def tabletEvent(self, event):  # documentation: https://doc.qt.io/qt-6/qwidget.html#tabletEvent
+        # only the pressure is taken from a tablet event, it is ignored so Qt delivers it again as a mouse event
+        # that draws like any other, with the brush size following the pressure
+        if event.type() == QEvent.Type.TabletRelease:
+            self.tabletPressure = None
+        else:
+            self.tabletPressure = event.pressure()  # documentation: https://doc.qt.io/qt-6/qpointerevent.html#pressure
+        event.ignore()
+
+    def penFor(self, color, size):
+        '''
+        Return the pen for a colour and size, pens are created once and reused from a small cache
+        '''
+        key = (QColor(color).rgba(), size)
+        pen = self.penCache.get(key)
+        if pen is None:
+            if len(self.penCache) >= PEN_CACHE_SIZE:  # drop the oldest pen, dicts keep insertion order
+                del self.penCache[next(iter(self.penCache))]
+            # allows the selection of brush colour, brish size, line type, cap type, join type. Images available here http://doc.qt.io/qt-6/qpen.html
+            pen = QPen(QColor(color), size, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
+            self.penCache[key] = pen
+        return pen
+
+    def updatePen(self):
+        '''
+        Pick up the current brush colour and size, called whenever either of them changes
+        '''
+        self.pen = self.penFor(self.brushColor, self.brushSize)
+        if self.recorder is not None:  # every brush slot, the slider and the colour picker end up here
+            self.recorder.record("pen", color=QColor(self.brushColor).rgba(), size=self.brushSize)
+        if self.strokePainter is not None:  # the brush was changed mid stroke
+            self.flushMoves()  # the moves so far are drawn with the old pen
+            self.recordPoints(self.simplifier.finish())
+            self.strokePainter.setPen(self.pen)
+            self.brushStroke = self.newBrushStroke()
+            # the rest of the drag is recorded as a new stroke in the new colour and size
+            self.recordStroke()
+
+    def isGuesser(self):
+        return self.remote is not None and self.remote.role == "guesser"
+
+    def syncRemote(self, rect):
+        '''
+        Send the pixels of rect (device pixels) to the guessers after a change that isn't a stroke, so their canvases
+        keep matching the drawer's
+        '''
+        if self.remote is not None and not self.isGuesser():
+            self.remote.sendCanvas(self.image, rect)
+
+    def drawRemote(self, events):
+        '''
+        Draw the stroke events of one frame received from the drawer, called on the GUI thread
+        '''
+        if self.recorder is not None:
+            self.recorder.record("remote", events=events)
+        painter = None
+        dirty = QRect()
+        for event in events:
+            try:  # an exception escaping a slot aborts the application, so a malformed event is skipped instead
+                checkEvent(event)
+                kind = event["type"]
+                if kind == "begin":
+                    if not 0 < event["width"] <= MAX_REMOTE_WIDTH:
+                        raise ValueError("pen width out of range")
+                    last = QPoint(event["x"], event["y"])
+                    tip = BrushTip(*event["tip"]) if event.get("tip") else None  # the pen if there's no brush tip
+                    self.remotePen = self.penFor(QColor.fromRgba(event["color"]), event["width"])
+                    self.remoteLast = last
+                    self.remoteStroke = None
+                    if tip is not None:
+                        self.remoteStroke = BrushStroke(self.dabCache, tip, event["color"], event["width"],
+                                                        self.image.devicePixelRatio())
+                        self.remoteStroke.moveTo(event["x"], event["y"])
+                    self.strokes.beginStroke(QColor.fromRgba(event["color"]), event["width"], event["x"], event["y"], tip)
+                elif kind == "points" and self.remotePen is not None:
+                    if painter is None:
+                        self.endStroke()
+                        if not self.history.recording():
+                            self.history.begin(self.image, self.strokes.strokes)
+                        painter = QPainter(self.image)
+                        painter.setPen(self.remotePen)
+                    points = event["points"]
+                    for i in range(0, len(points) - 1, 2):
+                        point = QPoint(points[i], points[i + 1])
+                        segment = self.segmentRect(self.remoteLast, point, self.remotePen.width())
+                        self.history.touch(self.image, segment)
+                        if self.remoteStroke is not None:
+                            self.remoteStroke.lineTo(painter, point.x(), point.y())
+                        else:
+                            painter.drawLine(self.remoteLast, point)
+                        self.strokes.addPoint(point.x(), point.y())
+                        self.remoteLast = point
+                        dirty = dirty.united(segment)
+                elif kind == "end":
+                    self.strokes.endStroke()
+                    if painter is not None:
+                        painter.end()
+                        painter = None
+                    self.history.commit(self.image, self.strokes.strokes)
+                elif kind == "clear":
+                    if painter is not None:
+                        painter.end()
+                        painter = None
+                    self.clear()
+                elif kind == "tile":
+                    if painter is not None:
+                        painter.end()
+                        painter = None
+                    dirty = dirty.united(self.drawRemoteTile(event))
+            except (KeyError, TypeError, ValueError):
+                self.remoteSkipped += 1
+        if painter is not None:
+            painter.end()
+        if not dirty.isEmpty():
+            self.update(dirty)
+
+    def drawRemoteTile(self, event):
+        '''
+        Replace the rectangle of the canvas a tile message covers with its pixels as one undoable change, returns the
+        rectangle
+        '''
+        from remote import decodeTile
+        tile = decodeTile(event)  # before anything changes, in case the tile is malformed
+        target = QRectF(event["x"], event["y"], event["width"], event["height"])
+        region = target.toAlignedRect()
+        self.endStroke()
+        self.history.begin(self.image, self.strokes.strokes)
+        self.history.touch(self.image, region)
+        painter = QPainter(self.image)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)  # replace what is underneath
+        painter.drawImage(target, tile)
+        painter.end()
+        self.strokes.clear()  # the strokes no longer describe what is on the canvas
+        self.history.commit(self.image, [])
+        return region
+
+    def remoteGuesses(self, guesses):
+        '''
+        Check the guesses typed by the guessers during one frame tick, called on the GUI thread
+        '''
+        for text in guesses:
+            if self.checkGuess(text) == CORRECT:
+                break  # the rest were guesses at the word that was just replaced
+
+    def remoteDisconnected(self, reason):
+        self.statusBar().showMessage("Disconnected from the server: " + reason)
+
+    def lazyMenu(self, menu, entries):
+        '''
+        Create the actions for a menu, the menu is filled in and the icons are loaded when it is first opened.
+        Returns the actions in the order given
+        '''
+        actions = []
+        for icon, text, shortcut, slot in entries:
+            action = QAction(text, self)  # documentation: https://doc.qt.io/qt-6/qaction.html
+            if shortcut:
+                action.setShortcut(shortcut)  # documentation: https://doc.qt.io/qt-6/qaction.html#shortcut-prop
+                self.addAction(action)  # the shortcut works before the menu has ever been opened
+            action.triggered.connect(slot)  # documentation: https://doc.qt.io/qt-6/qaction.html#triggered
+            actions.append(action)
+
+        def populate():
+            menu.aboutToShow.disconnect(populate)
+            for (icon, _, _, _), action in zip(entries, actions):
+                if icon:
+                    action.setIcon(self.icons.icon(icon))
+                menu.addAction(action)
+        menu.aboutToShow.connect(populate)  # documentation: https://doc.qt.io/qt-6/qmenu.html#aboutToShow
+        return actions
+
+    def startRecording(self, path):
+        '''
+        Append this session to a recording that replay.py can play back
+        '''
+        self.stopRecording()
+        self.recorder = SessionRecorder(path)
+        engine = self.engine
+        self.recorder.start(self.seed, width=self.width(), height=self.height(), ratio=self.devicePixelRatio(),
+                            mode=self.selectMode.currentText(), players=engine.players, names=engine.names,
+                            teams=engine.teams, scoring={key: list(points) for key, points in engine.scoring.items()})
+
+    def stopRecording(self):
+        if self.recorder is not None:
+            self.endStroke()
+            canvasSize = self.image.size()
+            self.recorder.close(digest=canvasDigest(self.image), width=canvasSize.width(), height=canvasSize.height())
+            self.recorder = None
+
+    def recorded(self, slot):
+        '''
+        Wrap a slot connected to a menu action or button so that using it is written to the session recording
+        '''
+        def run(*args):
+            if self.recorder is not None:
+                self.recorder.record("action", name=slot.__name__)
+            slot()
+        return run
+
+    def startScores(self, path):
+        '''
+        Record every scored round of this game as a new match in the score log at path (see scores.py)
+        '''
+        self.engine.scoreboard = ScoreBoard(path)
+        self.engine.scoreboard.startMatch()
+
+    def showLeaderboard(self):
+        scoreboard = self.engine.scoreboard
+        if scoreboard is None:
+            QMessageBox.information(self, "Leaderboard", "Scores are not being recorded")
+            return
+        lines = ["%d. %s: %d (%d rounds)" % (rank, name, total, rounds)
+                 for rank, (name, total, rounds) in enumerate(scoreboard.top(10), 1)]
+        teams = scoreboard.top(10, teams=True)
+        if teams:
+            lines += [""] + ["%d. Team %s: %d" % (rank, name, total) for rank, (name, total, _) in enumerate(teams, 1)]
+        QMessageBox.information(self, "Leaderboard", "%d rounds in %d matches\n\n" % (scoreboard.round, scoreboard.match)
+                                + ("\n".join(lines) or "No rounds scored yet"))
+
+    def startArchive(self, directory):
+        '''
+        Archive every round of this game in a new timestamped directory inside directory
+        '''
+        self.archive = RoundArchive(os.path.join(directory, time.strftime("%Y%m%d-%H%M%S")), self)
+        self.archive.written.connect(self.roundsArchived)
+        self.archive.sheetWritten.connect(self.imageSaved)
+        self.archive.failed.connect(self.archiveFailed)
+
+    def roundSnapshot(self):
+        '''
+        The visible canvas, word and drawer of the turn that is ending, None if rounds aren't archived. Taken before
+        the canvas is cleared and handed to archiveRound once the engine has moved on to the next turn
+        '''
+        if self.archive is None or not self.gameStarted:
+            return None
+        self.endStroke()
+        image = self.image.copy(self.deviceRect(self.canvasRect()))  # documentation: https://doc.qt.io/qt-6/qimage.html#copy
+        return image, self.currentWord, self.currentTurn
+
+    def archiveRound(self, snapshot, outcome):
+        if snapshot is not None:
+            image, word, drawer = snapshot
+            self.archive.add(image, word, drawer, outcome, self.engine.scores)
+
+    def roundsArchived(self, round):  # called on the GUI thread once a batch of rounds has been written
+        self.statusBar().showMessage("Archived rounds up to " + str(round), 3000)
+
+    def archiveFailed(self, filePath, error):  # reported in the status bar, a dialog would interrupt the game
+        metrics.log(INFO, "archive.failed", path=filePath, error=error)
+        self.statusBar().showMessage("Could not archive " + filePath + ": " + error, 5000)
+
+    def startAutosave(self, path):
+        '''
+        Journal the canvas and the game state to path every CHECKPOINT_MS. If a journal was left at path by a session
+        that didn't close, the player is first offered to restore it, once the window is up
+        '''
+        if os.path.exists(path):
+            QTimer.singleShot(0, lambda: self.offerRestore(path))
+        else:
+            self.beginAutosave(path)
+
+    def beginAutosave(self, path):
+        self.autosave = Autosave(path, self)
+        self.autosave.failed.connect(self.autosaveFailed)
+        self.autosaveCheckpoint()  # the journal starts with a snapshot of the canvas as it is now
+        self.autosaveTimer.start()
+
+    def offerRestore(self, path):
+        answer = QMessageBox.question(self, "Restore", "The last game didn't close properly.\n\n"
+                                      "Restore its drawing, turn and scores?")  # documentation: https://doc.qt.io/qt-6/qmessagebox.html#question
+        if answer == QMessageBox.StandardButton.Yes and not self.restoreSession(path):
+            QMessageBox.warning(self, "Restore", "Nothing could be restored from " + path)
+        self.beginAutosave(path)  # replaces the old journal
+
+    def restoreSession(self, path):
+        '''
+        Restore the canvas and game state of the last checkpoint in an autosave journal, returns False if there is none
+        '''
+        with metrics.timer("io.autosave.restore"):
+            session = readJournal(path)
+        if session is None:
+            return False
+        image, state = session
+        self.showImage(image)
+        engine = self.engine
+        if len(state["scores"]) == engine.players:
+            engine.scores = list(state["scores"])
+            engine.currentTurn = state["turn"]
+        engine.gameStarted = state["started"]
+        try:
+            self.getList(state["mode"])
+        except OSError as error:  # the mode's word file has gone since the checkpoint, keep the selected mode
+            metrics.log(INFO, "autosave.mode", mode=state["mode"], error=str(error))
+            self.getList(self.selectMode.currentText())
+        self.selectMode.blockSignals(True)  # the word is restored rather than drawn again by chooseMode
+        self.selectMode.setCurrentText(engine.mode)
+        self.selectMode.blockSignals(False)
+        self.currentWord = state["word"] or self.getWord()
+        if engine.gameStarted:
+            self.btnStart.setText("Skip Turn")
+        self.updateLabels()
+        return True
+
+    def gameState(self):
+        engine = self.engine
+        return {"turn": engine.currentTurn, "scores": list(engine.scores), "mode": engine.mode,
+                "started": engine.gameStarted, "word": engine.currentWord}
+
+    def autosaveCheckpoint(self):
+        '''
+        Hand the tiles changed since the last checkpoint to the autosave worker, the whole canvas if it was replaced
+        '''
+        if self.autosave.busy():  # the changes are picked up by the next checkpoint
+            return
+        start = time.perf_counter()
+        tiles = self.history.takeChanges()
+        if tiles is None or self.autosave.needsSnapshot:
+            self.endStroke()  # the worker reads the canvas, no painter may be writing to it
+            tiles = None
+        self.autosave.checkpoint(self.image, tiles, self.gameState())
+        metrics.record("autosave.checkpoint", time.perf_counter() - start)
+
+    def autosaveFailed(self, filePath, error):
+        metrics.log(INFO, "autosave.failed", path=filePath, error=error)
+        self.statusBar().showMessage("Could not autosave to " + filePath + ": " + error, 5000)
+
+    def closeEvent(self, event):  # documentation: https://doc.qt.io/qt-6/qwidget.html#closeEvent
+        self.loader.cancel()
+        self.stopRecording()
+        if self.autosave is not None:  # a normal exit, there is nothing to recover next time
+            self.autosaveTimer.stop()
+            self.autosave.finish()
+        if self.archive is not None:  # the game is over, the contact sheet is made in the background
+            self.archive.finish(self.engine.names, self.engine.teams)
+        if self.engine.scoreboard is not None:  # snapshots the leaderboard so the next start doesn't replay the log
+            self.engine.scoreboard.close()
+        super().closeEvent(event)
+
+    def undo(self):
+        '''
+        Undo the last stroke, clear, cut or new
+        '''
+        self.endStroke()
+        if self.history.recording():  # finish the stroke in progress so it can be undone too
+            self.history.commit(self.image, self.strokes.strokes)
+        strokes = self.history.undo(self.image)
+        self.restoreStrokes(strokes)
+        if strokes is not None:
+            self.syncRemote(self.history.appliedRect)
+
+    def redo(self):
+        '''
+        Redo the last change that was undone
+        '''
+        self.endStroke()
+        if self.history.recording():
+            self.history.commit(self.image, self.strokes.strokes)
+        strokes = self.history.redo(self.image)
+        self.restoreStrokes(strokes)
+        if strokes is not None:
+            self.syncRemote(self.history.appliedRect)
+
+    def restoreStrokes(self, strokes):
+        if strokes is not None:
+            self.strokes.strokes = strokes
+            self.strokes.endStroke()
+            self.update()
+
+    def canvasRect(self):
+        '''
+        The part of the canvas visible in the window, in logical coordinates
+        '''
+        canvasSize = self.image.deviceIndependentSize().toSize()
+        return QRect(QPoint(), canvasSize).intersected(self.rect())
+
+    def wholeCanvasRect(self):
+        '''
+        The whole canvas in logical coordinates, usually larger than the window as it grows in steps
+        '''
+        return QRect(QPoint(), self.image.deviceIndependentSize().toSize())
+
+    def deviceRect(self, rect):
+        '''
+        Convert a rectangle in logical coordinates to the canvas' device pixels
+        '''
+        ratio = self.image.devicePixelRatio()
+        return QRectF(rect.x() * ratio, rect.y() * ratio, rect.width() * ratio, rect.height() * ratio).toAlignedRect()
+
+    def logicalRect(self, left, top, right, bottom):
+        '''
+        The rectangle in logical coordinates covering a box of the canvas' device pixels, right and bottom exclusive
+        '''
+        ratio = self.image.devicePixelRatio()
+        return QRectF(left / ratio, top / ratio, (right - left) / ratio, (bottom - top) / ratio).toAlignedRect()
+
+    def redraw(self, width=None, height=None):
+        '''
+        Regenerate the canvas from the stroke model, optionally at a different size
+        '''
+        self.endStroke()
+        sourceSize = self.image.deviceIndependentSize()
+        width = width or round(sourceSize.width())
+        height = height or round(sourceSize.height())
+        image = self.newCanvas(width, height)
+        self.strokes.render(image, width / sourceSize.width(), height / sourceSize.height(), dabCache=self.dabCache)
+        self.image = image
+        self.history.clear()  # the old tiles no longer line up with the regenerated canvas
+        self.update()
 
     # paint events
     def paintEvent(self, event):
+        start = time.perf_counter()
         # you should only create and use the QPainter object in this method, it should be a local variable
         canvasPainter = QPainter(self)  # create a new QPainter object, documentation: https://doc.qt.io/qt-6/qpainter.html
-        canvasPainter.drawPixmap(QPoint(), self.image)  # draw the image , documentation: https://doc.qt.io/qt-6/qpainter.html#drawImage-1
-
-    # resize event - this function is called
+        dirty = event.rect()  # the region that needs repainting, documentation: https://doc.qt.io/qt-6/qpaintevent.html#rect
+        ratio = self.image.devicePixelRatio()
+        canvasSize = self.image.deviceIndependentSize()
+        if dirty.right() >= canvasSize.width() or dirty.bottom() >= canvasSize.height():
+            canvasPainter.fillRect(dirty, Qt.GlobalColor.white)  # the window is bigger than the canvas until the resize settles
+        source = QRectF(dirty.x() * ratio, dirty.y() * ratio, dirty.width() * ratio, dirty.height() * ratio)
+        canvasPainter.drawImage(QRectF(dirty), self.image, source)  # copy only the dirty region of the image, documentation: https://doc.qt.io/qt-6/qpainter.html#drawImage
+        canvasPainter.end()
+        metrics.record("paint", time.perf_counter() - start)
+
+    # resize event - this function is called on every step of a window resize, so it only restarts the settle timer
     def resizeEvent(self, event):
-        self.image = self.image.scaled(self.width(), self.height())
+        if self.recorder is not None:
+            self.recorder.record("resize", width=event.size().width(), height=event.size().height())
+        self.resizeTimer.start()
+
+    def newCanvas(self, width, height):
+        '''
+        Create a blank canvas of the given logical size at the window's device pixel ratio
+        '''
+        ratio = self.devicePixelRatio()  # documentation: https://doc.qt.io/qt-6/qpaintdevice.html#devicePixelRatio
+        # premultiplied ARGB32 is the format the raster paint engine draws into and from fastest
+        canvas = QImage(round(width * ratio), round(height * ratio), QImage.Format.Format_ARGB32_Premultiplied)
+        canvas.setDevicePixelRatio(ratio)
+        canvas.fill(Qt.GlobalColor.white)
+        return canvas
+
+    def growCanvas(self):
+        '''
+        Make sure the canvas covers the whole window, growing it in CANVAS_GROW_STEP steps without rescaling what is
+        already drawn. The canvas is rebuilt at the new device pixel ratio if the window moved to a different screen
+        '''
+        canvasSize = self.image.deviceIndependentSize()
+        sameRatio = self.image.devicePixelRatio() == self.devicePixelRatio()
+        if sameRatio and canvasSize.width() >= self.width() and canvasSize.height() >= self.height():
+            return
+        if self.recorder is not None:
+            self.recorder.record("grow")
+        self.endStroke()  # the painter cannot outlive the image it paints on
+        step = CANVAS_GROW_STEP
+        width = max(round(canvasSize.width()), -(-self.width() // step) * step)
+        height = max(round(canvasSize.height()), -(-self.height() // step) * step)
+        canvas = self.newCanvas(width, height)
+        painter = QPainter(canvas)
+        painter.drawImage(QPoint(), self.image)  # existing drawing keeps its position and size
+        painter.end()
+        self.image = canvas
+        if sameRatio:
+            self.history.forgetCache()  # tiles along the old edge are bigger now
+        else:
+            self.history.clear()  # tile coordinates are in device pixels and no longer line up
+        self.update()
 
         # This function allows the user to Change brush size
 
     def changeBrushSize(self, value):
         self.brushSize = value
+        self.updatePen()
 
     def colorPicker(self):  # This function allows the user to choose a color from a dialog box
         color = QColorDialog.getColor()  # Get the color selected by the user
         if color.isValid():  # Check if the color is valid
             self.brushColor = color  # Set the brush color to the selected color
+            self.updatePen()
 
     # slots
     def save(self):
@@ -367,64 +1111,245 @@ class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidg
                                                   "PNG(*.png);;JPG(*.jpg *.jpeg);;All Files (*.*)")
         if filePath == "":  # if the file path is empty
             return  # do nothing and return
-        self.image.save(filePath)  # save file image to the file path
+        with metrics.timer("io.save"):  # the GUI thread only takes the snapshot, saver records the write
+            self.endStroke()
+            self.saver.save(self.image, filePath, self.saveOptions)  # save a snapshot of the image to the file path in the background
+
+    def toggleOverlay(self, visible):
+        self.perfOverlay.setVisible(visible)
+
+    def exportMetrics(self):
+        filePath, _ = QFileDialog.getSaveFileName(self, "Export Metrics", "metrics.json", "JSON(*.json);;All Files (*.*)")
+        if filePath == "":
+            return
+        try:
+            metrics.export(filePath)
+        except OSError as error:
+            QMessageBox.warning(self, "Export failed", "Could not write " + filePath + "\n\n" + str(error))
+
+    def imageSaved(self, filePath):  # called on the GUI thread once a background save has finished
+        self.statusBar().showMessage("Saved " + filePath, 3000)  # documentation: https://doc.qt.io/qt-6/qstatusbar.html#showMessage
+
+    def imageSaveFailed(self, filePath, error):
+        QMessageBox.warning(self, "Save failed", "Could not save " + filePath + "\n\n" + error)
 
     def clear(self):
-        self.image.fill(
-            Qt.GlobalColor.white)  # fill the image with white, documentation: https://doc.qt.io/qt-6/qimage.html#fill-2
+        self.endStroke()
+        if self.remote is not None and not self.isGuesser():  # the guessers' canvases are cleared too
+            self.remote.clear()
+        # fill the image with white as one undoable step, documentation: https://doc.qt.io/qt-6/qimage.html#fill-2
+        self.history.recordClear(self.image, self.strokes.strokes)
+        self.strokes.clear()
         self.update()  # call the update method of the widget which calls the paintEvent of this class
 
     def new(self):
-        self.image.fill(Qt.GlobalColor.white)  # Fills the image with white color
+        self.endStroke()
+        if self.remote is not None and not self.isGuesser():
+            self.remote.clear()
+        self.history.recordClear(self.image, self.strokes.strokes)  # Fills the image with white color, this can be undone
+        self.strokes.clear()
         self.brushSize = 3  # Sets the brush size to 3
         self.brushColor = Qt.GlobalColor.black  # Sets the brush color to black
+        self.updatePen()
         self.update()  # Updates the GUI
 
     def copy(self):
-        self.image.save("./temp/copy.png")  # save the current image to a temporary file named copy.png
-        self.update()  # Updates the GUI
+        self.endStroke()
+        region = self.selection or self.canvasRect()  # the selected region or the whole visible canvas
+        # only the region is copied, it is kept in memory and put on the system clipboard without being encoded
+        self.clipboardImage = self.image.copy(self.deviceRect(region))  # documentation: https://doc.qt.io/qt-6/qimage.html#copy
+        QApplication.clipboard().setImage(self.clipboardImage)  # documentation: https://doc.qt.io/qt-6/qclipboard.html#setImage
+        return region
 
     def cut(self):
-        self.image.save("./temp/cut.png")  # save the current image to a temporary file named cut.png
-        self.image.fill(Qt.GlobalColor.white)  # Sets the brush color to white
-        self.update()  # Updates the GUI
+        region = self.copy()
+        # Fills what was copied with white, the selection or the visible canvas, this can be undone
+        self.history.begin(self.image, self.strokes.strokes)
+        self.history.touch(self.image, region)
+        painter = QPainter(self.image)
+        painter.fillRect(region, Qt.GlobalColor.white)
+        painter.end()
+        self.history.commit(self.image, [])
+        self.strokes.clear()  # the strokes no longer describe what is on the canvas
+        self.syncRemote(self.deviceRect(region))
+        self.update(region)  # Updates the GUI
 
     def paste(self):
-        self.image.load("./temp/copy.png")  # load the image from the temporary file named copy.png
-        self.update()  # Updates the GUI
+        self.endStroke()
+        image = QApplication.clipboard().image()  # an image copied here or in another application
+        if image.isNull():
+            image = self.clipboardImage
+        if image is None or image.isNull():
+            return
+        # the image is pasted at the top left of the selection, or of the canvas, as one undoable change
+        target = QRectF(QPointF(self.selection.topLeft() if self.selection else QPoint()), image.deviceIndependentSize())
+        # the image may cover more than the window, every tile it paints over has to be in the undo history
+        region = target.toAlignedRect().intersected(self.wholeCanvasRect())
+        self.history.begin(self.image, self.strokes.strokes)
+        self.history.touch(self.image, region)
+        painter = QPainter(self.image)
+        painter.setClipRect(region)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)  # replace what is underneath
+        painter.drawImage(target, image)  # documentation: https://doc.qt.io/qt-6/qpainter.html#drawImage
+        painter.end()
+        self.strokes.clear()
+        self.history.commit(self.image, [])
+        self.syncRemote(self.deviceRect(region))
+        self.update(region)  # Updates the GUI
 
     def saveAs(self):
         filePath, _ = QFileDialog.getSaveFileName(self, "Save Image As...", "",
                                                   "PNG(*.png);;JPG(*.jpg *.jpeg);;All Files (*.*)")
         if filePath == "":  # if the file path is empty
             return  # do nothing and return
-        self.image.save(filePath)  # save file image to the file path
+        with metrics.timer("io.save"):  # the GUI thread only takes the snapshot, saver records the write
+            self.endStroke()
+            self.saver.save(self.image, filePath, self.saveOptions)  # save a snapshot of the image to the file path in the background
     def threepx(self):  # the brush size is set to 3
         self.brushSize = 3
+        self.updatePen()
 
     def fivepx(self):
         self.brushSize = 5
+        self.updatePen()
 
     def sevenpx(self):
         self.brushSize = 7
+        self.updatePen()
 
     def ninepx(self):
         self.brushSize = 9
+        self.updatePen()
 
     def black(self):  # the brush color is set to black
         self.brushColor = Qt.GlobalColor.black
+        self.updatePen()
 
     def black(self):
         self.brushColor = Qt.GlobalColor.black
+        self.updatePen()
 
     def red(self):
         self.brushColor = Qt.GlobalColor.red
+        self.updatePen()
 
     def green(self):
         self.brushColor = Qt.GlobalColor.green
+        self.updatePen()
 
     def yellow(self):
         self.brushColor = Qt.GlobalColor.yellow
+        self.updatePen()
+
+    # brush tips, the pen draws solid lines and the brushes stamp dabs (see brushes.py)
+    def penTip(self):
+        self.brushTip = None
+        self.updatePen()
+
+    def hardBrush(self):
+        self.brushTip = BrushTip("round", 1.0)
+        self.updatePen()
+
+    def softBrush(self):  # fades out from the centre
+        self.brushTip = BrushTip("round", 0.3)
+        self.updatePen()
+
+    def chalkBrush(self):
+        self.brushTip = BrushTip("chalk", 0.8)
+        self.updatePen()
+
+    def brushTool(self):
+        self.tool = "brush"
+        self.unsetCursor()
+
+    def bucketTool(self):
+        self.tool = "bucket"
+        self.setCursor(Qt.CursorShape.PointingHandCursor)  # documentation: https://doc.qt.io/qt-6/qwidget.html#cursor-prop
+
+    def exactFill(self):  # only pixels of exactly the clicked colour are filled
+        self.fillTolerance = 0
+
+    def lowTolerance(self):
+        self.fillTolerance = 8
+
+    def mediumTolerance(self):  # fills up to the anti-aliased edges of strokes
+        self.fillTolerance = FILL_TOLERANCE
+
+    def highTolerance(self):
+        self.fillTolerance = 96
+
+    def fill(self, point):
+        '''
+        Flood fill the area around point with the brush colour as one undoable change, only the tiles under the filled
+        runs are kept for undo and only the filled bounding box is repainted
+        '''
+        pixels = self.loadPixels("Bucket Fill")
+        if pixels is None:
+            return
+        start = time.perf_counter()
+        ratio = self.image.devicePixelRatio()
+        x, y = int(point.x() * ratio), int(point.y() * ratio)
+        if not self.image.rect().contains(x, y):
+            return
+        canvas = self.canvasPixels()
+
+        solid = set()
+
+        def touch(rows, starts, ends):  # the tiles under the filled runs are saved for undo before any pixel changes
+            touched, covered = pixels.runTiles(rows, starts, ends, self.history.tileSize, canvas.shape)
+            self.history.begin(self.image, self.strokes.strokes)
+            self.history.touchKeys(self.image, touched)
+            solid.update(covered)
+
+        box = pixels.floodFill(canvas, x, y, pixels.pixelValue(self.brushColor), self.fillTolerance, touch)
+        if box is None:  # already that colour
+            return
+        self.history.commit(self.image, [], solid=solid, color=self.brushColor)  # covered tiles share one copy
+        self.strokes.clear()  # the strokes no longer describe what is on the canvas
+        left, top, right, bottom = box
+        self.syncRemote(QRect(left, top, right - left, bottom - top))
+        self.update(self.logicalRect(*box))
+        metrics.record("fill", time.perf_counter() - start)
+
+    def invertColours(self):
+        '''
+        Invert the colours of the selection, or of the visible canvas, as one undoable change
+        '''
+        pixels = self.loadPixels("Invert Colours")
+        if pixels is None:
+            return
+        region = self.selection or self.canvasRect()
+        box = self.deviceRect(region)
+        canvas = self.canvasPixels()
+        self.history.begin(self.image, self.strokes.strokes)
+        self.history.touch(self.image, region)
+        pixels.invert(canvas, (box.left(), box.top(), box.right() + 1, box.bottom() + 1))
+        self.history.commit(self.image, [])
+        self.strokes.clear()  # the strokes no longer describe what is on the canvas
+        self.syncRemote(box)
+        self.update(region)
+
+    def loadPixels(self, feature):
+        '''
+        The pixels module, imported with NumPy the first time a pixel operation is used. None, after a warning, if
+        NumPy isn't installed
+        '''
+        try:
+            import pixels
+        except ImportError:
+            QMessageBox.warning(self, feature, feature + " needs NumPy, install it with pip install numpy")
+            return None
+        return pixels
+
+    def canvasPixels(self):
+        '''
+        The canvas as a (height, width) uint32 NumPy array of premultiplied ARGB pixels, in device pixels and sharing
+        the canvas' memory. Writes go straight to the canvas, record them for undo and update() the area. Don't keep
+        the array across events, the canvas is replaced when it grows
+        '''
+        from pixels import imageArray
+        self.endStroke()  # nothing may be painting on the canvas while its pixels are changed
+        return imageArray(self.image)
 
         # easy mode
 
@@ -441,165 +1366,114 @@ class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidg
         # choose mode, easy or hard word
 
     def chooseMode(self):
+        if self.recorder is not None:
+            self.recorder.record("mode", mode=self.selectMode.currentText())
         if self.selectMode.currentText() == "easy":
             self.easyMode()
-        else:
+        elif self.selectMode.currentText() == "hard":
             self.hardMode()
+        else:  # any other word pack
+            self.getList(self.selectMode.currentText())
+            self.currentWord = self.getWord()
 
         # start function
 
     def start(self):
-        # checks if game has started
-        if self.gameStarted:
-            print("Turn Skipped")
-            # switches turn from 1 to 2 when turn is skipped
-            if self.currentTurn == 1:
-                self.currentTurn = 2
-
-                # Updating the current turn label
-                self.playerTurn.setText("Player Turn: " + str(self.currentTurn))
-                self.playerTurn.update()
-            else:
-                self.currentTurn = 1
-
-                # Updating the current turn label
-                self.playerTurn.setText("Player's Turn: " + str(self.currentTurn))
-                self.playerTurn.update()
-
-            # getting word
-            self.chooseMode()
-
+        # starts the game, or skips the turn if the game has already started
+        start = time.perf_counter()
+        snapshot = self.roundSnapshot()
+        if self.engine.start():
+            metrics.log(INFO, "turn.skipped", turn=self.currentTurn)
+            self.archiveRound(snapshot, "skipped")
             # message box with player word and instructions
-            msg = QMessageBox(self)
-            msg.setWindowTitle("Pictionary")
-            msg.setText("Turn skipped!\n\n Player " + str(self.currentTurn) + " word:")
-            msg.setInformativeText("Don't let others see, Press details!")
-            msg.setDetailedText(self.currentWord)
-            msg.setStandardButtons(QMessageBox.StandardButton.Ok)
-            msg.show()
-            self.clear()
-            self.update()
-
+            self.showWord("Turn skipped!\n\n Player " + str(self.currentTurn) + " word:", "Don't let others see, Press details!")
         else:
-            self.gameStarted = True
             # changes start button to Skip Turn
             self.btnStart.setText("Skip Turn")
-
-            # getting the words
-            self.chooseMode()
-
             # Message box with word and instructions
-            msg = QMessageBox(self)
-            msg.setWindowTitle("Pictionary")
-            msg.setText("Player " + str(self.currentTurn) + " See your word")
-            msg.setInformativeText("Don't let others see, Press Details")
-            msg.setDetailedText(self.currentWord)
-            msg.setStandardButtons(QMessageBox.StandardButton.Ok)
-            msg.show()
-            self.clear()
-            self.update()
+            self.showWord("Player " + str(self.currentTurn) + " See your word", "Don't let others see, Press Details")
+        self.updateLabels()
+        self.clear()
+        metrics.record("turn", time.perf_counter() - start)
 
         # Adding scores if guessed correctly
 
     def guessedCorrectly(self):
+        start = time.perf_counter()
+        snapshot = self.roundSnapshot()
         self.clear()
-        if self.gameStarted:
-            print("Guessed correctly")
-            if self.currentTurn == 1:
-
-                # Add to score
-                # extra scores are added if mode is hard
-                if self.selectMode.currentText() == "easy":
-                    self.p1score += 2
-                    self.p2score += 1
-                else:
-                    self.p1score += 3
-                    self.p2score += 2
-
-                # update the score label
-                self.P1ScoreLabel.setText("Player 1: " + str(self.p1score))
-                self.P2ScoreLabel.setText("Player 2: " + str(self.p2score))
-                self.P1ScoreLabel.update()
-                self.P2ScoreLabel.update()
-
-                # switch turn to player 2
-                self.currentTurn = 2
-
-                # update the turn label
-                self.playerTurn.setText("Player Turn: " + str(self.currentTurn))
-                self.playerTurn.update()
-
-                # get the words
-                self.chooseMode()
-
-                # message box with word and instructions
-                msg = QMessageBox(self)
-                msg.setWindowTitle("Pictionary")
-                # Extra feature Set a larger font for the main text
-                font = QFont()
-                font.setPointSize(16)  # Set your desired font size
-                msg.setFont(font)
-                msg.setText("Player " + str(self.currentTurn) + " See your word")
-                msg.setInformativeText("Don't let others see, Press Details")
-                msg.setDetailedText(self.currentWord)
-                msg.setStandardButtons(QMessageBox.StandardButton.Ok)
-                msg.show()
-                self.clear()
-                self.update()
+        # the engine adds the scores, extra scores are added if mode is hard, and switches to the next player
+        if self.engine.correctGuess():
+            metrics.log(INFO, "turn.guessed", turn=self.currentTurn, scores=self.engine.scores)
+            self.archiveRound(snapshot, "guessed")
+            self.updateLabels()
+            # message box with word and instructions, Extra feature Set a larger font for the main text
+            self.showWord("Player " + str(self.currentTurn) + " See your word", "Don't let others see, Press Details", 16)
+            metrics.record("turn", time.perf_counter() - start)
+
+    def submitGuess(self):
+        '''
+        Check the guess typed in the guess box, a remote guesser's guess is checked by the drawer's game
+        '''
+        text = self.guessInput.text().strip()
+        self.guessInput.clear()
+        if not text:
+            return
+        if self.isGuesser():
+            self.remote.guess(text)
+        elif self.checkGuess(text) not in (CORRECT, CLOSE):
+            self.statusBar().showMessage('"' + text + '" is not it', 2000)
 
-            else:
-                # Add to score
-                # extra scores are added if mode is hard
-                if self.selectMode.currentText() == "easy":
-                    self.p1score += 1
-                    self.p2score += 2
-                else:
-                    self.p1score += 2
-                    self.p2score += 3
-
-                # update the label
-                self.P1ScoreLabel.setText("Player 1: " + str(self.p1score))
-                self.P2ScoreLabel.setText("Player 2: " + str(self.p2score))
-                self.P1ScoreLabel.update()
-                self.P2ScoreLabel.update()
-
-                # switch turn to player 1
-                self.currentTurn = 1
-
-                # update the turn label
-                self.playerTurn.setText("Player Turn: " + str(self.currentTurn))
-                self.playerTurn.update()
-
-                # get the words
-                self.chooseMode()
-
-                # message box with word and instructions
-                msg = QMessageBox(self)
-                msg.setWindowTitle("Pictionary")
-                msg.setText("Player " + str(self.currentTurn) + " See your word")
-                msg.setInformativeText("Don't let others see, Press Details")
-                msg.setDetailedText(self.currentWord)
-                msg.setStandardButtons(QMessageBox.StandardButton.Ok)
-                msg.show()
-                self.clear()
-                self.update()
-
-    #Get a random word from the list read from file
+    def checkGuess(self, text):
+        '''
+        Check a typed guess against the current word, a correct one is scored by guessedCorrectly. Returns CORRECT,
+        CLOSE or WRONG
+        '''
+        if self.recorder is not None:
+            self.recorder.record("guess", text=text)
+        start = time.perf_counter()
+        result = self.engine.checkGuess(text)
+        metrics.record("guess", time.perf_counter() - start)
+        if result == CORRECT:
+            self.guessedCorrectly()
+        elif result == CLOSE:
+            self.statusBar().showMessage('"' + text + '" is close!', 3000)
+        return result
+
+    def updateLabels(self):
+        # update the turn and score labels from the game state
+        self.playerTurn.setText("Player Turn: " + str(self.currentTurn))
+        engine = self.engine
+        texts = [name + ": " + str(score) for name, score in zip(engine.names, engine.scores)]
+        texts += ["Team " + str(team) + ": " + str(score) for team, score in engine.teamScores().items()]
+        for label, text in zip(self.scoreLabels, texts):
+            label.setText(text)
+
+    def showWord(self, text, informativeText, fontSize=None):
+        # message box with the current player's word hidden in the details
+        msg = QMessageBox(self)
+        msg.setWindowTitle("Pictionary")
+        if fontSize is not None:
+            font = QFont()
+            font.setPointSize(fontSize)
+            msg.setFont(font)
+        msg.setText(text)
+        msg.setInformativeText(informativeText)
+        msg.setDetailedText(self.currentWord)
+        msg.setStandardButtons(QMessageBox.StandardButton.Ok)
+        msg.show()
+
+    #Get a random word from the list read from file, words don't repeat until every word in the mode has been used
     def getWord(self):
-        randomWord = random.choice(self.wordList)
-        print(randomWord)
+        randomWord = self.engine.drawWord()
+        metrics.log(DEBUG, "word", mode=self.engine.mode, length=len(randomWord))  # never the word itself
         return randomWord
 
-    #read word list from file
+    #select the word list for a mode, the file is read the first time the mode is used
     def getList(self, mode):
-        with open(mode + 'mode.txt') as csv_file:
-            csv_reader = csv.reader(csv_file, delimiter=',')
-            line_count = 0
-            for row in csv_reader:
-                #print(row)
-                self.wordList = row
-                line_count += 1
-            #print(f'Processed {line_count} lines.')
+        self.engine.mode = mode
+        with metrics.timer("io.words"):
+            self.words.prepare(mode)
 
     # open a file
     def open(self):
@@ -611,24 +1485,136 @@ class PictionaryGame(QMainWindow):  # documentation https://doc.qt.io/qt-6/qwidg
          - update the widget
         '''
         filePath, _ = QFileDialog.getOpenFileName(self, "Open Image", "",
-                                                  "PNG(*.png);;JPG(*.jpg *.jpeg);;All Files (*.*)")
+                                                  "Images(*.png *.jpg *.jpeg *.bmp *.gif);;PNG(*.png);;JPG(*.jpg *.jpeg);;All Files (*.*)")
         if filePath == "":  # if not file is selected exit
             return
-        with open(filePath, 'rb') as f:  # open the file in binary mode for reading
-            content = f.read()  # read the file
-        self.image.loadFromData(content)  # load the data into the file
-        width = self.width()  # get the width of the current QImage in your application
-        height = self.height()  # get the height of the current QImage in your application
-        self.image = self.image.scaled(width, height)  # scale the image from file and put it in your QImage
+        self.openImage(filePath)
+
+    def openImage(self, filePath):
+        '''
+        Start loading an image in the background, decoded at the size of the window. The canvas is replaced when it
+        has loaded, a progress dialog lets the player cancel a slow load
+        '''
+        ratio = self.devicePixelRatio()
+        size = QSize(round(self.width() * ratio), round(self.height() * ratio))  # the image is scaled to fill the window
+        request = self.loader.load(filePath, size)
+        self.openStarted = time.perf_counter()
+        if self.openProgress is not None:
+            self.openProgress.deleteLater()
+        # shown only if the load takes longer than half a second, documentation: https://doc.qt.io/qt-6/qprogressdialog.html
+        self.openProgress = QProgressDialog("Opening " + os.path.basename(filePath), "Cancel", 0, STAGES, self)
+        self.openProgress.setMinimumDuration(500)
+        self.openProgress.canceled.connect(self.cancelOpen)
+        return request
+
+    def cancelOpen(self):
+        self.loader.cancel()
+        self.closeOpenProgress()
+
+    def closeOpenProgress(self):
+        if self.openProgress is not None:
+            self.openProgress.canceled.disconnect(self.cancelOpen)
+            self.openProgress.reset()
+            self.openProgress.deleteLater()
+            self.openProgress = None
+
+    def imageLoadProgress(self, request, stage):
+        if self.loader.isCurrent(request) and self.openProgress is not None:
+            self.openProgress.setValue(stage)
+
+    def imageLoaded(self, request, filePath, image):  # called on the GUI thread once the image has been decoded
+        if not self.loader.isCurrent(request):  # cancelled, or replaced by a later open
+            return
+        self.loader.finish(request)
+        self.closeOpenProgress()
+        metrics.record("io.open", time.perf_counter() - self.openStarted)
+        if self.recorder is not None:
+            self.recorder.record("opened", path=filePath, width=image.width(), height=image.height())
+        self.showImage(image)
+
+    def imageLoadFailed(self, request, filePath, error):
+        if not self.loader.isCurrent(request):
+            return
+        self.loader.finish(request)
+        self.closeOpenProgress()
+        QMessageBox.warning(self, "Open failed", "Could not open " + filePath + "\n\n" + error)
+
+    def showImage(self, image):
+        '''
+        Replace the canvas with an image (in device pixels), the undo history and strokes are cleared
+        '''
+        self.endStroke()
+        self.strokes.clear()  # the opened image replaces everything that was drawn
+        ratio = self.devicePixelRatio()
+        image.setDevicePixelRatio(ratio)
+        canvas = self.newCanvas(image.width() / ratio, image.height() / ratio)
+        painter = QPainter(canvas)
+        painter.drawImage(QPoint(), image)  # documentation: https://doc.qt.io/qt-6/qpainter.html#drawImage
+        painter.end()
+        self.image = canvas
+        self.history.clear()
+        self.growCanvas()
+        self.syncRemote(self.image.rect())
         self.update()  # call the update method of the widget which calls the paintEvent of this class
 
 
 # this code will be executed if it is the main module but not if the module is imported
 #  https://stackoverflow.com/questions/419163/what-does-if-name-main-do
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # optional arguments to play in a room on a stroke server (python server.py), e.g.
+    #  python PictionaryGame.py --server 127.0.0.1:8765 --room lobby --role guesser
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server", help="host:port of a stroke server")
+    parser.add_argument("--room", default="lobby")
+    parser.add_argument("--role", choices=["drawer", "guesser"], default="drawer")
+    # instrumentation, messages are written to stderr and the metrics to a JSON file on exit
+    parser.add_argument("--log-level", choices=list(LEVELS), default="metrics")
+    parser.add_argument("--metrics", help="file to export the metrics to on exit")
+    # record the session to a file that can be played back with replay.py
+    parser.add_argument("--record", help="file to append the session recording to")
+    parser.add_argument("--seed", type=int, help="seed for the word RNG, random if not given")
+    # the drawing of every round is archived with a contact sheet of the game when the window is closed
+    parser.add_argument("--archive", default=ARCHIVE_DIRECTORY, help="directory to archive the rounds in")
+    parser.add_argument("--no-archive", action="store_true", help="don't archive the rounds")
+    # players, teams and scoring, every scored round is added to a score log that keeps the leaderboard
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--teams", help="comma separated team of each player, e.g. red,blue,red,blue")
+    parser.add_argument("--scoring", help="JSON points table by mode or difficulty, e.g. {\"easy\": [2, 1]}")
+    parser.add_argument("--scores", default=SCORE_LOG, help="score log to record the rounds in")
+    parser.add_argument("--no-scores", action="store_true", help="don't record the scores")
+    # the canvas and game state are journaled so they can be restored if the game doesn't close normally
+    parser.add_argument("--autosave", default=AUTOSAVE_FILE, help="autosave journal")
+    parser.add_argument("--no-autosave", action="store_true", help="don't autosave")
+    args, qtArgs = parser.parse_known_args()
+    teams = args.teams.split(",") if args.teams else None
+    if args.players < 2 or (teams is not None and len(teams) != args.players):
+        parser.error("at least 2 players are needed and --teams must give a team for each of them")
+    metrics.level = LEVELS[args.log_level]
+
+    app = QApplication(sys.argv[:1] + qtArgs)
     app.setFont(QFont("Roboto", 14))
     app.setStyleSheet("QMessageBox { min-width: 500px; min-height: 300px; }")
-    window = PictionaryGame()
+    remote = None
+    if args.server:
+        host, _, port = args.server.rpartition(":")
+        from remote import RemoteSession  # asyncio is only imported when playing online
+
+        remote = RemoteSession(host or "127.0.0.1", int(port), args.room, args.role)
+        remote.start()
+    window = PictionaryGame(remote, args.seed, args.players, teams)
+    if args.scoring:
+        window.engine.scoring = loadScoring(args.scoring)
+    if not args.no_scores:
+        window.startScores(args.scores)
+    if args.record:
+        window.startRecording(args.record)
+    if not args.no_archive:
+        window.startArchive(args.archive)
+    if not args.no_autosave and (remote is None or remote.role == "drawer"):
+        window.startAutosave(args.autosave)
     window.show()
     app.exec()  # start the event loop running
+    if window.archive is not None:
+        window.archive.waitForDone()  # the last rounds and the contact sheet, the window is already closed
+    if args.metrics:
+        metrics.export(args.metrics)
@@ -0,0 +1,218 @@
+# Archiving the drawing of every round
+#
+# When a turn ends the visible canvas is snapshotted as a QImage on the GUI thread (one copy of the visible part)
+# and queued together with the word, the player who drew it and the scores. Nothing is written on the GUI thread:
+# queued rounds are handed to a single low priority worker in batches, either once BATCH_ROUNDS have queued up or
+# FLUSH_MS after the first one, so a long session writes a handful of batches rather than a burst of files per
+# turn. For each round the worker writes the full image and a thumbnail, and appends the batch to the index in one
+# write. At the end of the game the thumbnails, which the worker keeps in memory, are laid out on a contact sheet.
+#
+# Files in the session's directory:
+#   round-001.png        the canvas at the end of round 1
+#   round-001-thumb.jpg  the same, at most THUMB_SIZE pixels on its longest side
+#   rounds.jsonl         one JSON object per round: number, word, drawer, outcome, scores and time
+#   contact-sheet.png    every round's thumbnail with its word, drawer and the scores after it, headed by the
+#                        final scores of the players (and teams) by name
+
+import json
+import math
+import os
+import time
+
+from PyQt6.QtGui import QImage, QPainter, QColor, QFont
+from PyQt6.QtCore import QObject, QRunnable, QThread, QThreadPool, QTimer, QRect, Qt, pyqtSignal
+
+from metrics import metrics
+from saver import SaveOptions, writeImage
+
+ARCHIVE_DIRECTORY = "archive"  # each game gets a timestamped directory in here
+BATCH_ROUNDS = 8  # rounds queued before they are written
+FLUSH_MS = 5000  # longest a round waits to be written when fewer than BATCH_ROUNDS are queued
+THUMB_SIZE = 192
+SHEET_COLUMNS = 8  # at most, a short game gets a square-ish sheet
+CAPTION_HEIGHT = 44
+SHEET_MARGIN = 8
+
+IMAGE_OPTIONS = SaveOptions("png", compression=1)  # fast to encode, the worker has a whole game's rounds to write
+THUMB_OPTIONS = SaveOptions("jpg", quality=85)
+
+
+class ArchivedRound:
+    __slots__ = ("number", "image", "word", "drawer", "outcome", "scores", "time")
+
+    def __init__(self, number, image, word, drawer, outcome, scores):
+        self.number = number
+        self.image = image
+        self.word = word
+        self.drawer = drawer
+        self.outcome = outcome  # "guessed" or "skipped"
+        self.scores = list(scores)
+        self.time = time.time()
+
+    def fileName(self, suffix):
+        return "round-%03d%s" % (self.number, suffix)
+
+    def entry(self):
+        return {"round": self.number, "word": self.word, "drawer": self.drawer, "outcome": self.outcome,
+                "scores": self.scores, "time": self.time}
+
+
+class ArchiveTask(QRunnable):  # documentation: https://doc.qt.io/qt-6/qrunnable.html
+    '''
+    Write a batch of rounds: the images, the thumbnails and their lines of the index
+    '''
+
+    def __init__(self, archive, rounds):
+        super().__init__()
+        self.archive = archive
+        self.rounds = rounds
+
+    def run(self):
+        start = time.perf_counter()
+        directory = self.archive.directory
+        for round in self.rounds:
+            path = os.path.join(directory, round.fileName(".png"))
+            try:
+                writeImage(round.image, path, IMAGE_OPTIONS)
+                thumbnail = round.image.scaled(THUMB_SIZE, THUMB_SIZE, Qt.AspectRatioMode.KeepAspectRatio,
+                                               Qt.TransformationMode.SmoothTransformation)
+                writeImage(thumbnail, os.path.join(directory, round.fileName("-thumb.jpg")), THUMB_OPTIONS)
+            except Exception as error:
+                self.archive.failed.emit(path, str(error))
+                thumbnail = None
+            round.image = None  # the full image is no longer needed, only the thumbnail is kept for the sheet
+            self.archive.thumbnails.append((round, thumbnail))
+        path = os.path.join(directory, "rounds.jsonl")
+        try:
+            with open(path, "a") as f:
+                f.write("".join(json.dumps(round.entry()) + "\n" for round in self.rounds))
+        except OSError as error:
+            self.archive.failed.emit(path, str(error))
+        metrics.record("io.archive", time.perf_counter() - start)
+        self.archive.written.emit(self.rounds[-1].number)
+
+
+class ContactSheetTask(QRunnable):
+    '''
+    Lay out the thumbnails of every round written so far on one image
+    '''
+
+    def __init__(self, archive, names, teams=None):
+        super().__init__()
+        self.archive = archive
+        self.names = names
+        self.teams = teams
+
+    def run(self):
+        path = os.path.join(self.archive.directory, "contact-sheet.png")
+        try:
+            writeImage(contactSheet(self.archive.thumbnails, self.names, self.teams), path, SaveOptions("png"))
+        except Exception as error:
+            self.archive.failed.emit(path, str(error))
+        else:
+            self.archive.sheetWritten.emit(path)
+
+
+def contactSheet(thumbnails, names, teams=None):
+    '''
+    A grid of (round, thumbnail) pairs captioned with the word, drawer and scores, with the final scores on top.
+    names are the players' names and teams the team of each player, None without teams. QImage and QPainter can be
+    used off the GUI thread, so this runs on the worker
+    '''
+    columns = max(1, min(SHEET_COLUMNS, math.ceil(math.sqrt(len(thumbnails)))))
+    rows = max(1, math.ceil(len(thumbnails) / columns))
+    cellWidth = THUMB_SIZE + SHEET_MARGIN
+    cellHeight = THUMB_SIZE + CAPTION_HEIGHT + SHEET_MARGIN
+    sheet = QImage(columns * cellWidth + SHEET_MARGIN, rows * cellHeight + CAPTION_HEIGHT + SHEET_MARGIN,
+                   QImage.Format.Format_RGB32)  # documentation: https://doc.qt.io/qt-6/qimage.html
+    sheet.fill(QColor(240, 240, 240))
+    painter = QPainter(sheet)
+    font = QFont()
+    font.setPixelSize(14)
+    painter.setFont(font)
+    scores = thumbnails[-1][0].scores if thumbnails else [0] * len(names)
+    header = "%d rounds    final scores  " % len(thumbnails) + "   ".join(
+        "%s: %d" % (name, score) for name, score in zip(names, scores))
+    if teams:
+        totals = {}
+        for team, score in zip(teams, scores):
+            totals[team] = totals.get(team, 0) + score
+        header += "\n" + "   ".join("Team %s: %d" % (team, total) for team, total in totals.items())
+    painter.drawText(QRect(SHEET_MARGIN, 0, sheet.width() - SHEET_MARGIN, CAPTION_HEIGHT),
+                     Qt.AlignmentFlag.AlignVCenter, header)
+    for i, (round, thumbnail) in enumerate(thumbnails):
+        x = SHEET_MARGIN + (i % columns) * cellWidth
+        y = CAPTION_HEIGHT + (i // columns) * cellHeight
+        painter.fillRect(QRect(x, y, THUMB_SIZE, THUMB_SIZE), Qt.GlobalColor.white)
+        if thumbnail is not None:
+            painter.drawImage(x + (THUMB_SIZE - thumbnail.width()) // 2, y + (THUMB_SIZE - thumbnail.height()) // 2,
+                              thumbnail)
+        caption = "%d. %s%s\n%s drew   %s" % (round.number, round.word,
+                                             " (skipped)" if round.outcome == "skipped" else "",
+                                             names[round.drawer - 1], " - ".join(str(score) for score in round.scores))
+        painter.drawText(QRect(x, y + THUMB_SIZE, THUMB_SIZE, CAPTION_HEIGHT),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, caption)
+    painter.end()
+    return sheet
+
+
+class RoundArchive(QObject):
+    '''
+    Collects the final canvas of each round and writes them in batches in the background. written(round) is emitted
+    when a batch up to round has been written, sheetWritten(path) for the contact sheet and failed(path, error) for
+    any file that couldn't be written
+    '''
+    written = pyqtSignal(int)
+    sheetWritten = pyqtSignal(str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, directory, parent=None, batchRounds=BATCH_ROUNDS, flushMs=FLUSH_MS):
+        super().__init__(parent)
+        self.directory = directory
+        self.batchRounds = batchRounds
+        self.pending = []  # rounds not handed to the worker yet
+        self.thumbnails = []  # (round, thumbnail) in order, only touched by the worker
+        self.rounds = 0
+        self.pool = QThreadPool(self)  # documentation: https://doc.qt.io/qt-6/qthreadpool.html
+        self.pool.setMaxThreadCount(1)  # one worker keeps the batches, the index and the sheet in order
+        self.pool.setThreadPriority(QThread.Priority.LowPriority)  # never competes with the GUI thread for a core
+        self.flushTimer = QTimer(self)  # documentation: https://doc.qt.io/qt-6/qtimer.html
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(flushMs)
+        self.flushTimer.timeout.connect(self.flush)
+
+    def add(self, image, word, drawer, outcome, scores):
+        '''
+        Queue a round, image is a QImage of the canvas (a QPixmap is converted on the calling thread). Returns the
+        round number
+        '''
+        if hasattr(image, "toImage"):
+            image = image.toImage()  # documentation: https://doc.qt.io/qt-6/qpixmap.html#toImage
+        self.rounds += 1
+        self.pending.append(ArchivedRound(self.rounds, image, word, drawer, outcome, scores))
+        if len(self.pending) >= self.batchRounds:
+            self.flush()
+        elif not self.flushTimer.isActive():
+            self.flushTimer.start()
+        return self.rounds
+
+    def flush(self):
+        '''
+        Hand the queued rounds to the worker
+        '''
+        self.flushTimer.stop()
+        if self.pending:
+            self.pool.start(ArchiveTask(self, self.pending))
+            self.pending = []
+
+    def finish(self, names, teams=None):
+        '''
+        The game is over: write what is queued and then the contact sheet, labelled with the players' names and
+        teams. Does nothing if no round was played
+        '''
+        self.flush()
+        if self.rounds:
+            self.pool.start(ContactSheetTask(self, list(names), list(teams) if teams else None))
+
+    def waitForDone(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
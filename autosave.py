@@ -0,0 +1,291 @@
+# Autosave and crash recovery
+#
+# Every CHECKPOINT_MS the game hands the canvas tiles changed since the last checkpoint, together with the game
+# state, to a background worker that appends them to a journal. The changed tiles come from the undo history
+# (history.py), which already keeps a copy of every tile a change touched as it was afterwards: those copies are
+# never modified, so a checkpoint takes no canvas copy on the GUI thread and its size depends on how much was drawn,
+# not on the size of the canvas.
+#
+# The journal starts with a snapshot of the whole canvas and is followed by records of changed tiles, each record:
+#
+#   header length, payload length, CRC-32 of both   3 little endian uint32
+#   header                                          JSON: kind, game state, canvas size or tile rectangles
+#   payload                                         zlib compressed premultiplied ARGB32 pixels, tiles one after another
+#
+# Records are only ever appended, so a crash can at most cut the last one short; reading stops at the first record
+# that is incomplete or fails its CRC and restores the checkpoint before it. Once the tile records add up to more
+# than COMPACT_RATIO times the snapshot (and at least COMPACT_BYTES), the worker replays the journal and replaces it
+# with a new snapshot, atomically. A snapshot is also written when the canvas is replaced, grows or is regenerated.
+#
+# The journal is removed when the game closes normally, so one left behind means the last session didn't finish.
+
+import json
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtCore import QObject, QRunnable, QThread, QThreadPool, QRect, pyqtSignal
+
+from metrics import metrics
+
+AUTOSAVE_FILE = "autosave.journal"
+CHECKPOINT_MS = 2000  # time between checkpoints
+COMPACT_RATIO = 2  # tile records may add up to this many times the snapshot before the journal is compacted
+COMPACT_BYTES = 4 * 1024 * 1024  # but never compacted below this many bytes of tile records
+COMPRESSION = 1  # zlib level, canvases are mostly flat colour and compress well at the fastest level
+FORMAT_VERSION = 1
+
+RECORD = struct.Struct("<III")  # header length, payload length, CRC-32 of header and payload
+FORMAT = QImage.Format.Format_ARGB32_Premultiplied  # the canvas' format
+
+
+def imageBytes(image):
+    '''
+    The pixels of an image as bytes, rows one after another (32-bit rows are never padded)
+    '''
+    image = image.convertToFormat(FORMAT)  # shares the image if it is in the format already
+    bits = image.constBits()  # documentation: https://doc.qt.io/qt-6/qimage.html#constBits
+    bits.setsize(image.sizeInBytes())
+    return bytes(bits)
+
+
+def bytesImage(data, width, height):
+    return QImage(data, width, height, width * 4, FORMAT).copy()  # the copy owns its memory
+
+
+def encodeRecord(header, payload=b""):
+    header = json.dumps(header, separators=(",", ":")).encode()
+    return RECORD.pack(len(header), len(payload), zlib.crc32(payload, zlib.crc32(header))) + header + payload
+
+
+def snapshotRecord(image, state):
+    header = {"kind": "snapshot", "version": FORMAT_VERSION, "width": image.width(), "height": image.height(),
+              "ratio": image.devicePixelRatio(), "state": state}
+    return encodeRecord(header, zlib.compress(imageBytes(image), COMPRESSION))
+
+
+def tilesRecord(tiles, state):
+    '''
+    tiles maps (left, top) in device pixels to the QImage of the tile there
+    '''
+    rects = [[left, top, tile.width(), tile.height()] for (left, top), tile in tiles.items()]
+    payload = zlib.compress(b"".join(imageBytes(tile) for tile in tiles.values()), COMPRESSION)
+    return encodeRecord({"kind": "tiles", "tiles": rects, "state": state}, payload)
+
+
+def readRecords(f):
+    '''
+    The (header, payload) of each complete record of an open journal, stopping at the first damaged one
+    '''
+    while True:
+        prefix = f.read(RECORD.size)
+        if len(prefix) < RECORD.size:
+            return
+        headerLength, payloadLength, crc = RECORD.unpack(prefix)
+        header = f.read(headerLength)
+        payload = f.read(payloadLength)
+        if len(payload) < payloadLength or zlib.crc32(payload, zlib.crc32(header)) != crc:
+            return  # cut short by a crash
+        yield json.loads(header), payload
+
+
+def readJournal(path):
+    '''
+    The canvas (a QImage in device pixels with its device pixel ratio) and game state at the last complete
+    checkpoint of a journal, or None if it has no usable snapshot
+    '''
+    image = state = ratio = None
+    painter = None
+    try:
+        with open(path, "rb") as f:
+            for header, payload in readRecords(f):
+                if header["kind"] == "snapshot":
+                    if header.get("version") != FORMAT_VERSION:
+                        return None
+                    if painter is not None:
+                        painter.end()
+                    image = bytesImage(zlib.decompress(payload), header["width"], header["height"])
+                    ratio = header["ratio"]  # set once the tiles are in, so the painter works in device pixels
+                    painter = QPainter(image)
+                    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)  # replace, don't blend
+                elif image is not None:  # tiles
+                    pixels = zlib.decompress(payload)
+                    offset = 0
+                    for left, top, width, height in header["tiles"]:
+                        tile = bytesImage(pixels[offset:offset + width * height * 4], width, height)
+                        painter.drawImage(QRect(left, top, width, height), tile)
+                        offset += width * height * 4
+                else:
+                    continue
+                state = header["state"]
+    except (OSError, ValueError, zlib.error):
+        return None
+    finally:
+        if painter is not None:
+            painter.end()
+    if image is None:
+        return None
+    image.setDevicePixelRatio(ratio)
+    return image, state
+
+
+class Journal:
+    '''
+    The autosave journal file, used from one thread at a time
+    '''
+
+    def __init__(self, path, compactRatio=COMPACT_RATIO, compactBytes=COMPACT_BYTES):
+        self.path = os.path.abspath(path)
+        self.compactRatio = compactRatio
+        self.compactBytes = compactBytes
+        self.file = None
+        self.snapshotBytes = 0
+        self.tileBytes = 0  # bytes of tile records since the snapshot
+        self.compactions = 0
+
+    def writeSnapshot(self, image, state):
+        '''
+        Start the journal afresh with the whole canvas, the old journal is replaced atomically. Returns the bytes
+        written
+        '''
+        return self.replace(snapshotRecord(image, state))
+
+    def replace(self, record):
+        self.close()
+        directory = os.path.dirname(self.path)
+        fd, tempPath = tempfile.mkstemp(prefix="." + os.path.basename(self.path) + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(record)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tempPath, self.path)  # atomic on the same file system
+        except BaseException:
+            os.remove(tempPath)
+            raise
+        self.file = open(self.path, "ab")
+        self.snapshotBytes = len(record)
+        self.tileBytes = 0
+        return len(record)
+
+    def appendTiles(self, tiles, state):
+        '''
+        Append the tiles changed since the last record, compacting the journal once they add up. Returns the bytes
+        written
+        '''
+        record = tilesRecord(tiles, state)
+        self.file.write(record)
+        self.file.flush()
+        os.fsync(self.file.fileno())  # the checkpoint survives the machine going down, not only the game
+        self.tileBytes += len(record)
+        if self.tileBytes > max(self.compactBytes, self.compactRatio * self.snapshotBytes):
+            return len(record) + self.compact()
+        return len(record)
+
+    def compact(self):
+        '''
+        Replace the journal with a snapshot of its last checkpoint
+        '''
+        start = time.perf_counter()
+        self.file.flush()
+        image, state = readJournal(self.path)
+        written = self.writeSnapshot(image, state)
+        self.compactions += 1
+        metrics.record("io.autosave.compact", time.perf_counter() - start)
+        return written
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class CheckpointTask(QRunnable):  # documentation: https://doc.qt.io/qt-6/qrunnable.html
+    '''
+    Write one checkpoint: a snapshot of image if tiles is None, otherwise the changed tiles
+    '''
+
+    def __init__(self, autosave, image, tiles, state):
+        super().__init__()
+        self.autosave = autosave
+        self.image = image
+        self.tiles = tiles
+        self.state = state
+
+    def run(self):
+        start = time.perf_counter()
+        journal = self.autosave.journal
+        try:
+            if self.tiles is None:
+                written = journal.writeSnapshot(self.image, self.state)
+            else:
+                written = journal.appendTiles(self.tiles, self.state)
+        except Exception as error:
+            self.autosave.failed.emit(journal.path, str(error))
+            self.autosave.finishedTask.emit(False)
+        else:
+            metrics.record("io.autosave", time.perf_counter() - start)
+            self.autosave.written.emit(written)
+            self.autosave.finishedTask.emit(True)
+
+
+class Autosave(QObject):
+    '''
+    Writes checkpoints of the canvas and game state to a journal in the background. written(bytes) is emitted for
+    each checkpoint written and failed(path, error) if one couldn't be
+    '''
+    written = pyqtSignal(int)
+    failed = pyqtSignal(str, str)
+    finishedTask = pyqtSignal(bool)  # emitted by the worker, delivered on the GUI thread
+
+    def __init__(self, path=AUTOSAVE_FILE, parent=None):
+        super().__init__(parent)
+        self.journal = Journal(path)
+        self.pool = QThreadPool(self)  # documentation: https://doc.qt.io/qt-6/qthreadpool.html
+        self.pool.setMaxThreadCount(1)  # checkpoints have to reach the journal in order
+        self.pool.setThreadPriority(QThread.Priority.LowPriority)
+        self.pending = 0  # checkpoints handed to the worker and not finished, only touched on the GUI thread
+        self.needsSnapshot = True
+        self.lastState = None
+        self.finishedTask.connect(self.taskFinished)
+
+    def busy(self):
+        return self.pending > 0
+
+    def checkpoint(self, image, tiles, state):
+        '''
+        Hand a checkpoint to the worker: tiles maps (left, top) in device pixels to QImages that won't be modified,
+        or is None if the whole canvas, image, has to be written. Returns False if nothing changed
+        '''
+        if self.needsSnapshot:
+            tiles = None
+        elif not tiles and state == self.lastState:
+            return False
+        self.needsSnapshot = False
+        self.lastState = state
+        self.pending += 1
+        self.pool.start(CheckpointTask(self, image if tiles is None else None, tiles, state))
+        return True
+
+    def taskFinished(self, ok):
+        self.pending -= 1
+        if not ok:  # the journal may be missing a checkpoint, start it afresh
+            self.needsSnapshot = True
+
+    def finish(self):
+        '''
+        The game closed normally: wait for the worker and remove the journal, there is nothing to recover
+        '''
+        self.pool.waitForDone()
+        self.journal.remove()
+
+    def waitForDone(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
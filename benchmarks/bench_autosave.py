@@ -0,0 +1,141 @@
+'''
+Measure the autosave journal on a 4K canvas: checkpoint cost, bytes written, compaction and recovery.
+
+Run from the project root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_autosave.py [--width 3840] [--height 2160] [--checkpoints 20]
+
+A game window is drawn on with random strokes through its mouse handlers, 1, 10 and 50 strokes between each of
+--checkpoints checkpoints. For each density the table shows
+    gui ms      time autosaveCheckpoint takes on the GUI thread (median and worst)
+    worker ms   time the worker takes to compress and append the checkpoint (median)
+    KB          bytes appended per checkpoint (median)
+against writing the whole canvas as a PNG once, which is what a checkpoint would cost without tiles. Then the input
+frames of a scribble are timed with checkpoints written in the background every few frames and without autosave, and
+the time to compact the journal and to restore a session from it are reported.
+'''
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QEvent
+
+from bench_repaint import mouseEvent
+
+FRAMES = 600  # input frames of the latency scribble
+CHECKPOINT_FRAMES = 30  # frames between checkpoints during the scribble, far more often than the game's timer
+
+
+def stroke(window, rng, moves=20):
+    width, height = window.width() - 1, window.height() - 1
+    x, y = rng.randrange(width), rng.randrange(height)
+    window.mousePressEvent(mouseEvent(QEvent.Type.MouseButtonPress, x, y))
+    for _ in range(moves):
+        x = min(width, max(0, x + rng.randint(-40, 40)))
+        y = min(height, max(0, y + rng.randint(-40, 40)))
+        window.mouseMoveEvent(mouseEvent(QEvent.Type.MouseMove, x, y))
+        window.flushMoves()
+    window.mouseReleaseEvent(mouseEvent(QEvent.Type.MouseButtonRelease, x, y))
+
+
+def window(app, width, height, seed):
+    from PictionaryGame import PictionaryGame
+    game = PictionaryGame(seed=seed)
+    game.resize(width, height)
+    game.show()
+    app.processEvents()
+    game.growCanvas()
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--checkpoints", type=int, default=20)
+    args = parser.parse_args()
+    app = QApplication(sys.argv[:1])
+    from saver import writeImage, SaveOptions
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "autosave.journal")
+        game = window(app, args.width, args.height, 1)
+        game.startAutosave(path)
+        game.autosave.journal.compactBytes = float("inf")  # compaction is timed on its own below
+        game.autosave.waitForDone()
+        app.processEvents()
+        print(f"{args.width}x{args.height} canvas, snapshot {os.path.getsize(path) / 1024:.0f} KB")
+        for _ in range(20):  # something on the canvas for the full save to compare against
+            stroke(game, rng)
+        start = time.perf_counter()
+        writeImage(game.image, os.path.join(directory, "full.png"), SaveOptions("png"))
+        fullTime = time.perf_counter() - start
+        print(f"full PNG save {fullTime * 1e3:.1f} ms, {os.path.getsize(os.path.join(directory, 'full.png')) / 1024:.0f} KB")
+
+        print(f"{'strokes':>8} {'gui ms':>8} {'worst':>8} {'worker ms':>10} {'KB':>8}")
+        for strokes in (1, 10, 50):
+            guiTimes, workerTimes, sizes = [], [], []
+            for _ in range(args.checkpoints):
+                for _ in range(strokes):
+                    stroke(game, rng)
+                size = os.path.getsize(path)
+                start = time.perf_counter()
+                game.autosaveCheckpoint()
+                guiTimes.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                game.autosave.waitForDone()
+                workerTimes.append(time.perf_counter() - start)
+                app.processEvents()
+                sizes.append(os.path.getsize(path) - size)
+            print(f"{strokes:>8} {statistics.median(guiTimes) * 1e3:>8.3f} {max(guiTimes) * 1e3:>8.3f} "
+                  f"{statistics.median(workerTimes) * 1e3:>10.2f} {statistics.median(sizes) / 1024:>8.1f}")
+
+        print(f"journal {os.path.getsize(path) / 1024:.0f} KB")
+        start = time.perf_counter()
+        game.autosave.journal.compact()
+        print(f"compact {(time.perf_counter() - start) * 1e3:.1f} ms, to {os.path.getsize(path) / 1024:.0f} KB")
+        restored = window(app, args.width, args.height, 2)
+        start = time.perf_counter()
+        restored.restoreSession(path)
+        print(f"restore {(time.perf_counter() - start) * 1e3:.1f} ms")
+        restored.close()
+
+        # input frames while checkpoints are written in the background, and without autosave
+        for label, autosave in (("autosave", True), ("none", False)):
+            if not autosave:
+                game.autosaveTimer.stop()
+                game.autosave.finish()
+                game.autosave = None
+            frames = []
+            x, y = args.width // 2, args.height // 2
+            game.mousePressEvent(mouseEvent(QEvent.Type.MouseButtonPress, x, y))
+            for frame in range(FRAMES):
+                x = min(args.width - 1, max(0, x + rng.randint(-20, 20)))
+                y = min(args.height - 1, max(0, y + rng.randint(-20, 20)))
+                game.mouseMoveEvent(mouseEvent(QEvent.Type.MouseMove, x, y))
+                start = time.perf_counter()
+                game.flushMoves()
+                frames.append(time.perf_counter() - start)
+                if autosave and frame % CHECKPOINT_FRAMES == 0:
+                    game.mouseReleaseEvent(mouseEvent(QEvent.Type.MouseButtonRelease, x, y))
+                    game.autosaveCheckpoint()
+                    game.mousePressEvent(mouseEvent(QEvent.Type.MouseButtonPress, x, y))
+                app.processEvents()
+            game.mouseReleaseEvent(mouseEvent(QEvent.Type.MouseButtonRelease, x, y))
+            frames.sort()
+            print(f"input frames, {label:>8}: p50 {frames[len(frames) // 2] * 1e3:.3f} ms  "
+                  f"p99 {frames[len(frames) * 99 // 100] * 1e3:.3f} ms")
+        game.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+'''
+Measure the stamp brush engine in dabs per second against the pen path it sits next to.
+
+Run from the project root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_brushes.py [--length 20000] [--repeat 5]
+
+The same random walk of --length pixels (segments of about 6 pixels, the distance a fast mouse moves between events)
+is drawn on a 1920x1080 canvas
+    pen        QPainter.drawPolyline with the game's round-cap QPen, as flushMoves draws it
+    brush      BrushStroke.lineTo for every segment, stamping cached dabs SPACING of their size apart
+    uncached   the same dabs rendered for every stamp, which is what drawing a soft brush without the cache costs
+for each brush tip at a few sizes, with constant pressure and with pressure varying along the stroke. Each row gives
+dabs per second and the time to draw 1000 pixels of stroke, the median of --repeat runs.
+'''
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QImage, QPainter, QPen, QColor, QPolygonF
+from PyQt6.QtCore import Qt, QPointF
+
+from brushes import BrushTip, BrushStroke, DabCache, renderDab, quantize, SPACING
+
+WIDTH, HEIGHT = 1920, 1080
+TIPS = [("hard", BrushTip("round", 1.0)), ("soft", BrushTip("round", 0.3)), ("chalk", BrushTip("chalk", 0.8))]
+SIZES = [3, 9, 30]
+UNCACHED_DABS = 300  # dabs rendered for the uncached rate, it is too slow for the whole walk
+
+
+def walk(length, seed=1):
+    '''
+    (x, y, pressure) points of a random walk inside the canvas
+    '''
+    rng = random.Random(seed)
+    x, y, angle = WIDTH / 2, HEIGHT / 2, 0.0
+    points = [(x, y, 0.5)]
+    for i in range(int(length / 6)):
+        angle += rng.uniform(-0.5, 0.5)
+        x = min(WIDTH - 20, max(20, x + 6 * math.cos(angle)))
+        y = min(HEIGHT - 20, max(20, y + 6 * math.sin(angle)))
+        points.append((x, y, 0.5 + 0.5 * math.sin(i / 40)))
+    return points
+
+
+def pathLength(points):
+    return sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(points, points[1:]))
+
+
+def median(function, repeat):
+    times = []
+    for _ in range(repeat):
+        image = QImage(WIDTH, HEIGHT, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.white)
+        painter = QPainter(image)
+        start = time.perf_counter()
+        result = function(painter)
+        times.append(time.perf_counter() - start)
+        painter.end()
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--length", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    app = QApplication(sys.argv[:1])
+    points = walk(args.length)
+    length = pathLength(points)
+    color = QColor("black").rgba()
+    print(f"{WIDTH}x{HEIGHT} canvas, {length:.0f} px stroke in {len(points) - 1} segments, median of {args.repeat}")
+    print(f"{'tip':>8} {'size':>5} {'pressure':>9} {'dabs':>7} {'dabs/s':>10} {'ms/1000px':>10}")
+
+    for size in SIZES:
+        def pen(painter):
+            painter.setPen(QPen(QColor(color), size, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin))
+            painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y, _ in points]))
+        elapsed, _ = median(pen, args.repeat)
+        print(f"{'pen':>8} {size:>5} {'-':>9} {'-':>7} {'-':>10} {elapsed / length * 1e6:>10.2f}")
+
+        for name, tip in TIPS:
+            for pressure in (False, True):
+                def brush(painter):
+                    stroke = BrushStroke(cache, tip, color, size)
+                    stroke.moveTo(*points[0])
+                    for x, y, p in points[1:]:
+                        stroke.lineTo(painter, x, y, p if pressure else 1.0)
+                    return stroke.dabs
+                cache = DabCache()
+                elapsed, dabs = median(brush, args.repeat)
+                print(f"{name:>8} {size:>5} {'varying' if pressure else 'constant':>9} {dabs:>7} {dabs / elapsed:>10.0f} "
+                      f"{elapsed / length * 1e6:>10.2f}")
+
+        def uncached(painter):  # a dab rendered for every stamp at the brush's spacing
+            tip = TIPS[1][1]
+            step = max(1.0, quantize(size) * SPACING)
+            for i in range(UNCACHED_DABS):
+                dab = renderDab(tip.shape, quantize(size), color, tip.hardness)
+                painter.drawImage(QPointF(20 + (i * step) % (WIDTH - 40), HEIGHT / 2), dab)
+            return UNCACHED_DABS
+        elapsed, dabs = median(uncached, args.repeat)
+        print(f"{'uncached':>8} {size:>5} {'constant':>9} {dabs:>7} {dabs / elapsed:>10.0f} "
+              f"{elapsed / (dabs * max(1.0, quantize(size) * SPACING)) * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
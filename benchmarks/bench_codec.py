@@ -0,0 +1,85 @@
+'''
+Benchmark the binary stroke format against JSON.
+
+Run from the project root:
+    python benchmarks/bench_codec.py [--points 200000]
+
+Synthetic strokes (a random walk of 1-4 px moves every 4-16 ms, like a mouse) are encoded with strokecodec and
+as compact JSON ([x, y, t] arrays without spaces, times relative to the start of the stroke). The round trip is checked to be
+lossless, and sizes plus encode and decode speed in points per second are reported. The decode is also run
+streaming, fed in 1400 byte packets.
+'''
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import strokecodec
+
+
+def syntheticStrokes(totalPoints, seed=1):
+    rng = random.Random(seed)
+    strokes = []
+    while totalPoints > 0:
+        count = min(totalPoints, rng.randrange(20, 400))
+        x, y, t = rng.randrange(800), rng.randrange(600), 0
+        points = array('f')
+        for _ in range(count):
+            points.extend((x, y, t))
+            x += rng.randint(-4, 4)
+            y += rng.randint(-4, 4)
+            t += rng.randint(4, 16)
+        strokes.append((rng.choice([0xff000000, 0xffff0000, 0xff00ff00]), rng.choice([3, 5, 7, 9]), points, None, None))
+        totalPoints -= count
+    return strokes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=200000)
+    args = parser.parse_args()
+
+    strokes = syntheticStrokes(args.points)
+    points = sum(len(p) // 3 for _, _, p, _, _ in strokes)
+
+    start = time.perf_counter()
+    encoded = strokecodec.encode(strokes)
+    encodeTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded = strokecodec.decode(memoryview(encoded))
+    decodeTime = time.perf_counter() - start
+
+    decoder = strokecodec.StrokeDecoder()
+    streamed = []
+    start = time.perf_counter()
+    for i in range(0, len(encoded), 1400):
+        streamed += decoder.feed(memoryview(encoded)[i:i + 1400])
+    streamTime = time.perf_counter() - start
+
+    assert decoded == strokes and streamed == strokes, "round trip must be lossless"
+
+    # compact JSON: [x, y, t] arrays with times relative to the start of the stroke
+    asJson = json.dumps([{"color": c, "width": w,
+                          "points": [[int(p[i]), int(p[i + 1]), int(p[i + 2])] for i in range(0, len(p), 3)]}
+                         for c, w, p, _, _ in strokes], separators=(",", ":"))
+    start = time.perf_counter()
+    json.loads(asJson)
+    jsonDecodeTime = time.perf_counter() - start
+
+    print(f"{points} points in {len(strokes)} strokes")
+    print(f"binary {len(encoded):>10} bytes  {len(encoded) / points:.2f} bytes/point")
+    print(f"json   {len(asJson):>10} bytes  {len(asJson) / points:.2f} bytes/point  ({len(asJson) / len(encoded):.1f}x larger)")
+    print(f"encode    {points / encodeTime / 1e6:.2f} M points/s")
+    print(f"decode    {points / decodeTime / 1e6:.2f} M points/s")
+    print(f"streaming {points / streamTime / 1e6:.2f} M points/s")
+    print(f"json.loads {points / jsonDecodeTime / 1e6:.2f} M points/s (for reference, C implementation)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+'''
+Measure the bucket fill on a 4K canvas, on its own and through the fill tool with its undo capture.
+
+Run from the project root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_fill.py [--width 3840] [--height 2160] [--repeat 5]
+
+The canvas is filled from a corner after --strokes random lines have been drawn across it (so the region is split
+into more and more runs), with an exact match and with the default tolerance. "flood" is pixels.floodFill on the
+canvas' pixels; "tool" is the game's fill() with the canvas opened in a window, which also saves the tiles under
+the filled runs for undo, captures them again once filled and works out the area to repaint. "tiles" is how many
+tiles the undo entry keeps. Times are the median of --repeat fills of a fresh copy of the canvas, the budget for a
+full 4K fill is 100 ms.
+'''
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QImage, QPainter, QPen, QColor
+from PyQt6.QtCore import Qt, QPoint
+
+from pixels import imageArray, pixelValue, floodFill
+from PictionaryGame import PictionaryGame, FILL_TOLERANCE
+
+
+def canvas(width, height, strokes, seed=1):
+    image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.white)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(QPen(QColor("black"), 5))
+    rng = random.Random(seed)
+    for _ in range(strokes):
+        painter.drawLine(rng.randrange(width), rng.randrange(height), rng.randrange(width), rng.randrange(height))
+    painter.end()
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    app = QApplication(sys.argv[:1])
+
+    red = pixelValue(QColor("red"))
+    window = PictionaryGame()
+    window.resize(400, 300)  # smaller than the canvas, so opening it doesn't scale it
+    window.show()
+    app.processEvents()
+    window.brushColor = QColor("red")
+    print(f"{args.width}x{args.height} canvas")
+    print(f"{'strokes':>8} {'tolerance':>10} {'flood ms':>9} {'tool ms':>8} {'tiles':>6} {'filled':>10} {'box':>22}")
+    for strokes in (0, 20, 200):
+        original = canvas(args.width, args.height, strokes)
+        for tolerance in (0, FILL_TOLERANCE):
+            times = []
+            for _ in range(args.repeat):
+                image = original.copy()
+                pixels = imageArray(image)
+                start = time.perf_counter()
+                box = floodFill(pixels, 0, 0, red, tolerance)
+                times.append(time.perf_counter() - start)
+            filled = int((pixels == red).sum())
+            window.fillTolerance = tolerance
+            toolTimes = []
+            for _ in range(args.repeat):
+                window.showImage(original.copy())  # also clears the undo history
+                start = time.perf_counter()
+                window.fill(QPoint(0, 0))
+                toolTimes.append(time.perf_counter() - start)
+            tiles = len(window.history.undoStack[-1].before)
+            print(f"{strokes:>8} {tolerance:>10} {statistics.median(times) * 1e3:>9.1f} "
+                  f"{statistics.median(toolTimes) * 1e3:>8.1f} {tiles:>6} {filled:>10} {str(box):>22}")
+    window.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+'''
+Measure how many typed guesses per second the guess matcher checks, against comparing every guess from scratch.
+
+Run from the project root:
+    python benchmarks/bench_guesses.py [--guesses 200000] [--seed 1]
+
+For every word of the word lists, --guesses guesses in total of each kind are checked against it:
+    exact      the word typed differently: case, punctuation, spaces, accents, a leading article
+    typo       one letter inserted, deleted, replaced or swapped with the next
+    close      two edits, or one word of a multi-word answer
+    wrong      another word from the lists
+    unique     random letters, never the same guess twice so the per-word memo never helps
+    spam       the same few wrong guesses over and over, as a busy room sends them
+Each row gives guesses per second through GuessMatcher.check and through a naive check that normalises both strings
+and computes the full edit distance for every guess, and how the matcher classified them. No display or Qt
+installation is needed.
+'''
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from guesses import GuessMatcher, normalize, answerWords, CORRECT, CLOSE, WRONG, TYPO_LENGTH, CLOSE_RATIO
+from words import WordProvider
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ACCENTS = str.maketrans("aeiou", "àéîõü")
+
+
+def edit(word, rng):
+    '''
+    word with one random insertion, deletion, substitution or swap of neighbouring letters
+    '''
+    i = rng.randrange(len(word))
+    kind = rng.randrange(4)
+    letter = rng.choice(string.ascii_lowercase)
+    if kind == 0:
+        return word[:i] + letter + word[i:]
+    if kind == 1 and len(word) > 1:
+        return word[:i] + word[i + 1:]
+    if kind == 3 and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + letter + word[i + 1:]
+
+
+def variants(answer, words, kind, rng):
+    if kind == "exact":
+        return rng.choice([answer.upper(), answer.lower() + "!", "the " + answer, answer.replace(" ", "-"),
+                           answer.replace(" ", ""), answer.lower().translate(ACCENTS), "  " + answer + "?  "])
+    if kind == "typo":
+        return edit(answer.lower(), rng)
+    if kind == "close":
+        parts = answer.split()
+        if len(parts) > 1 and rng.random() < 0.5:
+            return rng.choice(parts)
+        return edit(edit(answer.lower(), rng), rng)
+    if kind == "wrong":
+        return rng.choice(words)
+    if kind == "unique":
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randrange(3, 12)))
+    return rng.choice(("dog", "cat", "house", "lol", "is it a tree"))  # spam
+
+
+def levenshtein(first, second):
+    previous = list(range(len(second) + 1))
+    for i, a in enumerate(first, 1):
+        current = [i]
+        for j, b in enumerate(second, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a != b)))
+        previous = current
+    return previous[-1]
+
+
+def naiveCheck(answer, guess):
+    '''
+    The same classification without anything precomputed, bounded or remembered
+    '''
+    target = "".join(answerWords(answer))
+    words = answerWords(guess)
+    compact = "".join(words)
+    if not compact:
+        return WRONG
+    distance = levenshtein(compact, target)
+    if distance <= (1 if len(target) >= TYPO_LENGTH else 0):
+        return CORRECT
+    if distance <= max(1, len(target) // CLOSE_RATIO) or any(word in normalize(answer).split() for word in words):
+        return CLOSE
+    return WRONG
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--guesses", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    provider = WordProvider(ROOT)
+    words = sorted({word for mode in provider.modes() for word in provider.words(mode)})
+    perWord = max(1, args.guesses // len(words))
+
+    start = time.perf_counter()
+    matchers = [GuessMatcher(word) for word in words]
+    build = (time.perf_counter() - start) / len(words)
+    print(f"{len(words)} words, {perWord} guesses of each kind per word, matcher built in {build * 1e6:.1f} us per word")
+    print(f"{'kind':>8} {'guesses':>8} {'matcher/s':>11} {'naive/s':>11} {'speedup':>8} {'correct':>8} {'close':>8} {'wrong':>8}")
+
+    for kind in ("exact", "typo", "close", "wrong", "unique", "spam"):
+        guesses = [[variants(word, words, kind, rng) for _ in range(perWord)] for word in words]
+        for matcher in matchers:
+            matcher.memo.clear()  # every kind starts without remembered guesses
+        counts = {CORRECT: 0, CLOSE: 0, WRONG: 0}
+        start = time.perf_counter()
+        for matcher, typed in zip(matchers, guesses):
+            check = matcher.check
+            for guess in typed:
+                counts[check(guess)] += 1
+        matched = time.perf_counter() - start
+        start = time.perf_counter()
+        for word, typed in zip(words, guesses):
+            for guess in typed:
+                naiveCheck(word, guess)
+        naive = time.perf_counter() - start
+        total = len(words) * perWord
+        print(f"{kind:>8} {total:>8} {total / matched:>11.0f} {total / naive:>11.0f} {naive / matched:>7.1f}x "
+              f"{counts[CORRECT]:>8} {counts[CLOSE]:>8} {counts[WRONG]:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+'''
+Benchmark opening large images: the old full-resolution decode against decode-time scaling.
+
+Run from the project root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_open.py [--megapixels 50] [--target 1600x1200]
+
+Test images (a JPEG and a PNG of --megapixels) are generated in a temporary directory. Each one is opened by
+    full      the way open() used to work: read the whole file, decode it at full resolution into a QPixmap and scale
+    scaled    loader.readScaled as the game now does it: decode straight at the target size
+and each open runs in a fresh process so the peak memory (max RSS above the process's baseline) is its own. The
+images are generated in a separate process too: Linux carries the max RSS over to a child process, so this one
+has to stay small.
+'''
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def maxRss():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage * 1024 if sys.platform != "darwin" else usage
+
+
+def generate(path, width, height):
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtGui import QImage, QPainter, QLinearGradient, QColor
+    from PyQt6.QtCore import QRect
+
+    app = QApplication(sys.argv[:1])
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    painter = QPainter(image)
+    gradient = QLinearGradient(0, 0, width, height)
+    gradient.setColorAt(0, QColor(30, 90, 200))
+    gradient.setColorAt(1, QColor(240, 200, 40))
+    painter.fillRect(image.rect(), gradient)
+    step = max(width, height) // 64
+    for i in range(0, width, step):  # some detail so the files aren't trivially small
+        painter.fillRect(QRect(i, (i * 7) % height, step // 2, height // 8), QColor((i * 13) % 256, 80, 160))
+    painter.end()
+    image.save(path, quality=90)
+
+
+def child(method, path, width, height):
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtGui import QPixmap
+    from PyQt6.QtCore import QSize
+
+    app = QApplication(sys.argv[:1])
+    from loader import readScaled
+
+    baseline = maxRss()
+    start = time.perf_counter()
+    if method == "full":
+        with open(path, "rb") as f:
+            content = f.read()
+        pixmap = QPixmap()
+        pixmap.loadFromData(content)
+        pixmap = pixmap.scaled(width, height)
+        size = pixmap.size()
+    else:
+        size = readScaled(path, QSize(width, height)).size()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"ms": elapsed * 1e3, "peakMb": (maxRss() - baseline) / 2 ** 20, "size": [size.width(), size.height()]}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--megapixels", type=float, default=50)
+    parser.add_argument("--target", default="1600x1200")
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    parser.add_argument("--generate", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        method, path, width, height = args.child
+        child(method, path, int(width), int(height))
+        return
+    if args.generate:
+        path, width, height = args.generate
+        generate(path, int(width), int(height))
+        return
+
+    width, height = (int(value) for value in args.target.split("x"))
+    imageHeight = int((args.megapixels * 1e6 * 3 / 4) ** 0.5)
+    imageWidth = imageHeight * 4 // 3
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{imageWidth}x{imageHeight} images opened at {width}x{height}")
+        print(f"{'image':>8} {'method':>8} {'time ms':>10} {'peak MB':>10}")
+        for extension in ("jpg", "png"):
+            path = os.path.join(directory, "large." + extension)
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--generate", path, str(imageWidth), str(imageHeight)],
+                           check=True, stderr=subprocess.DEVNULL)
+            for method in ("full", "scaled"):
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", method, path, str(width),
+                                         str(height)], capture_output=True, text=True, check=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{extension:>8} {method:>8} {result['ms']:>10.0f} {result['peakMb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
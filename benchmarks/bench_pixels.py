@@ -0,0 +1,146 @@
+'''
+Benchmark the NumPy canvas operations against their QPixmap equivalents.
+
+Run from the project root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_pixels.py [--width 3840] [--height 2160] [--repeat 5]
+
+Both canvases hold the same drawing. Each operation is timed the way it would be done with QPainter on a QPixmap
+canvas and with pixels.py on the QImage canvas's array:
+    clear       QPixmap.fill                        fill of the whole array
+    fill        QPainter.fillRect of a 1000x1000 box  fill of the box
+    eraser      200 QPainter.drawEllipse dabs       200 erase dabs, radius 20
+    invert      QPainter difference composition     invert of the whole canvas (Invert Colours)
+    recolor     toImage, createMaskFromColor and a clipped fillRect   recolor of one colour
+    mask        toImage and createMaskFromColor     matchMask of one colour, the first step of a bucket fill
+    downsample  QPixmap.scaled to a quarter, smooth downsample by 4 and arrayImage
+    diff        toImage of both and QImage ==       difference: changed pixel count and bounding box
+QImage == stops at the first row that differs, so the canvases differ only near the bottom right corner. The whole
+bucket fill is measured by bench_fill.py. Times are the median of --repeat runs.
+'''
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QImage, QPixmap, QPainter, QColor, QBitmap, QRegion
+from PyQt6.QtCore import Qt, QRect
+
+import pixels
+
+DAB_RADIUS = 20
+DABS = 200
+
+def drawing(image, width, height):
+    rng = random.Random(1)
+    painter = QPainter(image)
+    for _ in range(2000):
+        painter.fillRect(QRect(rng.randrange(width), rng.randrange(height), rng.randrange(10, 200), rng.randrange(10, 200)),
+                         QColor(rng.choice(["black", "red", "green", "yellow"])))
+    painter.end()
+
+
+def median(function, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    app = QApplication(sys.argv[:1])
+    width, height = args.width, args.height
+
+    original = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+    original.fill(Qt.GlobalColor.white)
+    drawing(original, width, height)
+    canvas = {}
+
+    def reset():  # a fresh copy of the drawing for both kinds of canvas
+        canvas["pixmap"] = QPixmap.fromImage(original)
+        canvas["image"] = original.copy()
+        canvas["array"] = pixels.imageArray(canvas["image"])
+
+    white = pixels.pixelValue(Qt.GlobalColor.white)
+    red = pixels.pixelValue(QColor("red"))
+    box = QRect(500, 500, 1000, 1000)
+    rng = random.Random(2)
+    dabs = [(rng.randrange(width), rng.randrange(height)) for _ in range(DABS)]
+
+    def pixmapEraser():
+        painter = QPainter(canvas["pixmap"])
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(Qt.GlobalColor.white)
+        for x, y in dabs:
+            painter.drawEllipse(x - DAB_RADIUS, y - DAB_RADIUS, 2 * DAB_RADIUS + 1, 2 * DAB_RADIUS + 1)
+        painter.end()
+
+    def pixmapInvert():
+        painter = QPainter(canvas["pixmap"])
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Difference)
+        painter.fillRect(canvas["pixmap"].rect(), Qt.GlobalColor.white)
+        painter.end()
+
+    def pixmapRecolor():
+        mask = canvas["pixmap"].toImage().createMaskFromColor(QColor("red").rgb(), Qt.MaskMode.MaskOutColor)
+        painter = QPainter(canvas["pixmap"])
+        painter.setClipRegion(QRegion(QBitmap.fromImage(mask)))
+        painter.fillRect(canvas["pixmap"].rect(), QColor("blue"))
+        painter.end()
+
+    def pixmapFill():
+        painter = QPainter(canvas["pixmap"])
+        painter.fillRect(box, Qt.GlobalColor.white)
+        painter.end()
+
+    other = original.copy()
+    painter = QPainter(other)
+    painter.fillRect(QRect(width - 150, height - 150, 50, 50), Qt.GlobalColor.blue)
+    painter.end()
+    otherPixmap = QPixmap.fromImage(other)
+    otherArray = pixels.imageArray(other)
+
+    mask = np.empty((height, width), bool)
+    operations = [
+        ("clear", lambda: canvas["pixmap"].fill(Qt.GlobalColor.white),
+         lambda: pixels.fill(canvas["array"], (0, 0, width, height), white)),
+        ("fill", pixmapFill,
+         lambda: pixels.fill(canvas["array"], (box.left(), box.top(), box.right() + 1, box.bottom() + 1), white)),
+        ("eraser", pixmapEraser,
+         lambda: [pixels.erase(canvas["array"], x, y, DAB_RADIUS, white) for x, y in dabs]),
+        ("invert", pixmapInvert, lambda: pixels.invert(canvas["array"], (0, 0, width, height))),
+        ("recolor", pixmapRecolor,
+         lambda: pixels.recolor(canvas["array"], (0, 0, width, height), red, pixels.pixelValue(QColor("blue")))),
+        ("mask", lambda: canvas["pixmap"].toImage().createMaskFromColor(QColor("red").rgb(), Qt.MaskMode.MaskOutColor),
+         lambda: pixels.matchMask(canvas["array"], red, 0, mask)),
+        ("downsample", lambda: canvas["pixmap"].scaled(width // 4, height // 4, Qt.AspectRatioMode.IgnoreAspectRatio,
+                                                       Qt.TransformationMode.SmoothTransformation),
+         lambda: pixels.arrayImage(pixels.downsample(canvas["array"], 4))),
+        ("diff", lambda: canvas["pixmap"].toImage() == otherPixmap.toImage(),
+         lambda: pixels.difference(canvas["array"], otherArray)),
+    ]
+    print(f"{width}x{height} canvas, median of {args.repeat}")
+    print(f"{'operation':>12} {'QPixmap ms':>12} {'NumPy ms':>10} {'speedup':>8}")
+    for name, pixmapVersion, arrayVersion in operations:
+        pixmapTime = median(pixmapVersion, args.repeat, reset)
+        arrayTime = median(arrayVersion, args.repeat, reset)
+        print(f"{name:>12} {pixmapTime * 1e3:>12.2f} {arrayTime * 1e3:>10.2f} {pixmapTime / arrayTime:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
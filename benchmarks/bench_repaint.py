@@ -0,0 +1,71 @@
+'''
+Benchmark the cost of a single mouse move while drawing, at several window sizes.
+
+Run from the project root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_repaint.py
+
+Each move is pushed through the real mouse handlers and the resulting paint is flushed with processEvents.
+The "dirty" column is the incremental repaint used by the game, the "full" column forces a whole-window
+repaint after every move for comparison. The dirty cost should stay roughly flat as the window grows. Moves are
+normally drawn once per frame, the first two columns draw every move on its own (one move per frame, the worst
+case) and the last column draws four moves per frame as a fast mouse or a tablet delivers them.
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QMouseEvent
+from PyQt6.QtCore import Qt, QEvent, QPointF
+
+SIZES = [(800, 600), (1920, 1080), (3840, 2160)]
+MOVES = 500
+
+
+def mouseEvent(kind, x, y, button=Qt.MouseButton.LeftButton):
+    point = QPointF(x, y)
+    buttons = Qt.MouseButton.LeftButton if kind != QEvent.Type.MouseButtonRelease else Qt.MouseButton.NoButton
+    return QMouseEvent(kind, point, point, button, buttons, Qt.KeyboardModifier.NoModifier)
+
+
+def strokeCost(app, window, fullRepaint, movesPerFrame=1):
+    # a short scribble in the middle of the canvas, 2px per move like a fast mouse
+    x, y = window.width() // 2, window.height() // 2
+    window.mousePressEvent(mouseEvent(QEvent.Type.MouseButtonPress, x, y))
+    start = time.perf_counter()
+    for i in range(MOVES):
+        dx = 2 if (i // 50) % 2 == 0 else -2
+        window.mouseMoveEvent(mouseEvent(QEvent.Type.MouseMove, x + dx * (i % 50), y + i % 7, Qt.MouseButton.NoButton))
+        if (i + 1) % movesPerFrame:  # more moves arrive before the frame is drawn
+            continue
+        window.flushMoves()  # draw now instead of waiting for the frame timer
+        if fullRepaint:
+            window.update()
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    window.mouseReleaseEvent(mouseEvent(QEvent.Type.MouseButtonRelease, x, y))
+    return elapsed / MOVES
+
+
+def main():
+    app = QApplication(sys.argv)
+    from PictionaryGame import PictionaryGame
+
+    print(f"{'size':>12} {'dirty us/move':>15} {'full us/move':>15} {'4/frame us/move':>16}")
+    for width, height in SIZES:
+        window = PictionaryGame()
+        window.resize(width, height)
+        window.show()
+        app.processEvents()
+        dirty = strokeCost(app, window, False)
+        full = strokeCost(app, window, True)
+        coalesced = strokeCost(app, window, False, 4)  # a fast mouse, 4 moves drawn as one polyline per frame
+        print(f"{width:>5}x{height:<6} {dirty * 1e6:>15.1f} {full * 1e6:>15.1f} {coalesced * 1e6:>16.1f}")
+        window.close()
+
+
+if __name__ == "__main__":
+    main()
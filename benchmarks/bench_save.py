@@ -0,0 +1,91 @@
+'''
+Benchmark drawing latency while the canvas is being saved.
+
+Run from the project root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_save.py
+
+A 4K canvas full of noise (slow to compress) is saved as PNG while a stroke is drawn through the real mouse handlers.
+Per-move latency is reported with no save running, with the save running in the background through the game's
+ImageSaver, and with a blocking save on the GUI thread the way save() used to work. The background figures should
+stay close to the idle ones.
+'''
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QPainter, QColor
+from PyQt6.QtCore import Qt, QEvent, QRect
+
+from bench_repaint import mouseEvent
+
+WIDTH, HEIGHT = 3840, 2160
+MOVES = 300
+
+
+def fillWithNoise(image):
+    rng = random.Random(1)
+    painter = QPainter(image)
+    for _ in range(20000):
+        painter.fillRect(QRect(rng.randrange(WIDTH), rng.randrange(HEIGHT), rng.randrange(4, 40), rng.randrange(4, 40)),
+                         QColor(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    painter.end()
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def strokeLatencies(app, window, beforeStroke=None):
+    latencies = []
+    window.mousePressEvent(mouseEvent(QEvent.Type.MouseButtonPress, 100, 100))
+    for i in range(MOVES):
+        start = time.perf_counter()
+        if i == 0 and beforeStroke:  # the save is started just as the first move arrives
+            beforeStroke()
+        window.mouseMoveEvent(mouseEvent(QEvent.Type.MouseMove, 100 + i, 100 + (i % 20), Qt.MouseButton.NoButton))
+        window.flushMoves()  # draw the move now instead of waiting for the frame timer
+        app.processEvents()
+        latencies.append(time.perf_counter() - start)
+    window.mouseReleaseEvent(mouseEvent(QEvent.Type.MouseButtonRelease, 100 + MOVES, 100))
+    return latencies
+
+
+def report(name, latencies):
+    print(f"{name:>12} p50 {percentile(latencies, 50) * 1e6:9.1f} us  p99 {percentile(latencies, 99) * 1e6:9.1f} us"
+          f"  max {max(latencies) * 1e3:8.2f} ms")
+
+
+def main():
+    app = QApplication(sys.argv)
+    from PictionaryGame import PictionaryGame
+
+    window = PictionaryGame()
+    window.resize(WIDTH, HEIGHT)
+    window.show()
+    window.growCanvas()
+    app.processEvents()
+    fillWithNoise(window.image)
+    directory = tempfile.mkdtemp()
+
+    report("idle", strokeLatencies(app, window))
+
+    path = os.path.join(directory, "background.png")
+    started = time.perf_counter()
+    report("background", strokeLatencies(app, window, lambda: window.saver.save(window.image, path)))
+    window.saver.waitForDone()
+    print(f"{'':>12} background save took {(time.perf_counter() - started) * 1e3:.0f} ms in total")
+
+    path = os.path.join(directory, "blocking.png")
+    report("blocking", strokeLatencies(app, window, lambda: window.image.save(path)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+'''
+Measure the score log and leaderboard over a long tournament history.
+
+Run from the project root:
+    python benchmarks/bench_scores.py [--rounds 300000] [--players 2000] [--match-players 4]
+
+A tournament of --rounds scored rounds is recorded into a score log in a temporary directory: matches of
+--match-players players drawn from --players, each match played in two teams, a random number of rounds each, with
+the rounds scored by the GameEngine. Then
+    record      time to score and append a round, snapshots included
+    open        time to open the log from its snapshot (replaying only the rounds after it) and without one
+    top 10      leaderboard query, players and teams
+    rank        a player's position on the leaderboard
+    history     a player's recent rounds, and the full history read from the log
+No display or Qt installation is needed.
+'''
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine import GameEngine
+from scores import ScoreBoard
+
+
+class Words:
+    def draw(self, mode):
+        return "word"
+
+    def difficulty(self, mode):
+        return mode
+
+
+def record(path, rounds, players, matchPlayers, seed):
+    rng = random.Random(seed)
+    names = ["player%05d" % player for player in range(players)]
+    board = ScoreBoard(path)
+    start = time.perf_counter()
+    while board.round < rounds:
+        board.startMatch()
+        engine = GameEngine(Words(), rng.choice(["easy", "hard"]), matchPlayers, names=rng.sample(names, matchPlayers),
+                            teams=["red", "blue"] * (matchPlayers // 2) + ["red"] * (matchPlayers % 2), scoreboard=board)
+        engine.start()
+        for _ in range(min(rng.randint(5, 30), rounds - board.round)):
+            engine.correctGuess()
+    elapsed = time.perf_counter() - start
+    board.close()
+    return elapsed, names
+
+
+def perCall(function, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=300000)
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--match-players", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scores.log")
+        elapsed, names = record(path, args.rounds, args.players, args.match_players, args.seed)
+        print(f"{args.rounds} rounds, {args.players} players, log {os.path.getsize(path) / 2 ** 20:.1f} MB")
+        print(f"{'record':>16} {elapsed / args.rounds * 1e6:10.1f} us/round  {args.rounds / elapsed:10.0f} rounds/s")
+
+        # a few rounds after the last snapshot, as there would be after a crash
+        board = ScoreBoard(path)
+        for i in range(100):
+            board.record({names[i]: 1}, "easy", names[i])
+        board.file.close()  # no closing snapshot
+
+        start = time.perf_counter()
+        board = ScoreBoard(path)
+        print(f"{'open snapshot':>16} {(time.perf_counter() - start) * 1e3:10.1f} ms  ({board.replayed} rounds replayed)")
+        os.rename(path + ".snapshot", path + ".old")
+        start = time.perf_counter()
+        full = ScoreBoard(path)
+        print(f"{'open full log':>16} {(time.perf_counter() - start) * 1e3:10.1f} ms  ({full.replayed} rounds replayed)")
+        full.file.close()
+        assert full.top(100) == board.top(100) and full.top(100, True) == board.top(100, True), "snapshot and log differ"
+
+        leader = board.top(1)[0][0]
+        for name, function in (("top 10", lambda: board.top(10)),
+                               ("top 10 teams", lambda: board.top(10, teams=True)),
+                               ("rank", lambda: board.rank(names[7])),
+                               ("history 20", lambda: board.recent(leader, 20)),
+                               ("history 64", lambda: board.recent(leader))):
+            print(f"{name:>16} {perCall(function, 10000) * 1e6:10.2f} us")
+        start = time.perf_counter()
+        history = board.fullHistory(leader)
+        print(f"{'full history':>16} {(time.perf_counter() - start) * 1e3:10.1f} ms  ({len(history)} rounds, read from the log)")
+
+
+if __name__ == "__main__":
+    main()
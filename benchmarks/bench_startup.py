@@ -0,0 +1,97 @@
+'''
+Measure startup time against the startup budget.
+
+Run from the project root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_startup.py [--runs 7]
+
+Each run is a fresh Python process, so nothing is cached in the interpreter. Two things are measured:
+    import       time to import the PictionaryGame module (PyQt6 itself is imported first and not counted)
+    first paint  wall time from launching the process to the window's first paintEvent
+
+Budgets, checked against the median of the runs on every change (the suite runs this too):
+    import       IMPORT_BUDGET_MS       everything imported at startup, a new module with heavy imports shows here
+    first paint  FIRST_PAINT_BUDGET_MS  interpreter and Qt start up, window construction and the first frame
+
+The exit status is 1 if a median is over its budget. The budgets are for a typical developer laptop; on a slow CI
+machine scale them with --scale.
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+IMPORT_BUDGET_MS = 60
+FIRST_PAINT_BUDGET_MS = 300
+
+
+def child(launched):
+    # runs in the measured process: report the import time and the time of the first paint, then quit
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication(sys.argv[:1])
+    start = time.perf_counter()
+    from PictionaryGame import PictionaryGame
+    imported = time.perf_counter() - start
+
+    class FirstPaint(PictionaryGame):
+        def paintEvent(self, event):
+            super().paintEvent(event)
+            if not hasattr(self, "painted"):
+                self.painted = time.time()
+                app.quit()
+
+    window = FirstPaint()
+    window.show()
+    app.exec()
+    print(json.dumps({"importMs": imported * 1e3, "firstPaintMs": (window.painted - launched) * 1e3}))
+
+
+def measure(runs):
+    '''
+    Run the startup runs times, returns the lists of import and first paint times in ms
+    '''
+    imports, paints = [], []
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    for _ in range(runs):
+        launched = time.time()
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", repr(launched)],
+                                env=env, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        imports.append(result["importMs"])
+        paints.append(result["firstPaintMs"])
+    return imports, paints
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the budgets, for slower machines")
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        child(args.child)
+        return
+
+    imports, paints = measure(args.runs)
+    failed = False
+    for name, samples, budget in (("import", imports, IMPORT_BUDGET_MS), ("first paint", paints, FIRST_PAINT_BUDGET_MS)):
+        median = statistics.median(samples)
+        budget *= args.scale
+        over = median > budget
+        failed |= over
+        print(f"{name:>12} median {median:7.1f} ms  min {min(samples):7.1f} ms  budget {budget:5.0f} ms"
+              f"  {'OVER BUDGET' if over else 'ok'}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+'''
+Load test the stroke server on loopback.
+
+Run from the project root:
+    python benchmarks/load_server.py [--rooms 50] [--guessers 4] [--slow 1] [--rate 120] [--duration 10]
+
+The server is started as a separate process so its CPU time can be measured on its own. Every room gets one drawer
+sending a point --rate times a second and --guessers guessers reading the frames, plus --slow guessers that never
+read to exercise the server's backpressure. Reported are end-to-end stroke latency percentiles (drawer send to
+guesser receive) and how many rooms at this load one fully used core could host.
+'''
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from server import StrokeClient
+
+
+async def drawer(host, port, room, rate, stopAt):
+    client = StrokeClient()
+    await client.connect(host, port, room, "drawer")
+    client.beginStroke(0xff000000, 3, 0, 0)
+    interval = 1 / rate
+    i = 0
+    while time.time() < stopAt:
+        i += 1
+        client.addPoints([i % 800, (i * 7) % 600])
+        if i % 200 == 0:  # start a new stroke every so often
+            client.endStroke()
+            client.beginStroke(0xff000000, 3, i % 800, (i * 7) % 600)
+        await client.writer.drain()
+        await asyncio.sleep(interval)
+    client.endStroke()
+    await client.close()
+
+
+async def guesser(host, port, room, latencies, stopAt):
+    client = StrokeClient()
+    await client.connect(host, port, room, "guesser")
+    async for events in client.frames():
+        now = time.time()
+        for event in events:
+            if event["type"] == "points":
+                latencies.append(now - event["t"])
+        if now >= stopAt:
+            break
+    await client.close()
+
+
+async def slowGuesser(host, port, room, stopAt):
+    client = StrokeClient()
+    await client.connect(host, port, room, "guesser")
+    await asyncio.sleep(stopAt - time.time())  # never reads, the socket fills up
+    await client.close()
+
+
+async def serverStats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"type": "stats"}\n')
+    stats = json.loads(await reader.readline())
+    writer.close()
+    return stats
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+async def run(args, host, port):
+    latencies = []
+    before = await serverStats(host, port)
+    started = time.time()
+    stopAt = started + args.duration
+    tasks = []
+    for r in range(args.rooms):
+        room = "room%d" % r
+        tasks += [guesser(host, port, room, latencies, stopAt) for _ in range(args.guessers)]
+        tasks += [slowGuesser(host, port, room, stopAt) for _ in range(args.slow)]
+    guessers = [asyncio.create_task(task) for task in tasks]
+    await asyncio.sleep(0.2)  # let the guessers join before the drawers start
+    await asyncio.gather(*(drawer(host, port, "room%d" % r, args.rate, stopAt) for r in range(args.rooms)))
+    await asyncio.wait(guessers, timeout=2)
+    after = await serverStats(host, port)
+    elapsed = time.time() - started
+
+    latencies.sort()
+    cpu = after["cpu"] - before["cpu"]
+    print(f"{args.rooms} rooms, {args.guessers} guessers + {args.slow} slow per room, {args.rate} points/s per drawer")
+    print(f"server: {after['events'] - before['events']} events, {after['frames'] - before['frames']} room frames, "
+          f"{cpu:.2f} s cpu in {elapsed:.1f} s, {after['disconnected']} guessers disconnected for falling behind")
+    if latencies:
+        print("latency ms: " + "  ".join(f"p{p} {percentile(latencies, p) * 1e3:.2f}" for p in (50, 90, 99, 99.9)))
+    if cpu > 0:
+        print(f"rooms per core at this load: {args.rooms * elapsed / cpu:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--guessers", type=int, default=4)
+    parser.add_argument("--slow", type=int, default=1)
+    parser.add_argument("--rate", type=int, default=120)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--port", str(args.port)],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        server.stdout.readline()  # "serving on ..." once it is listening
+        asyncio.run(run(args, "127.0.0.1", args.port))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+'''
+Simulate games through the headless GameEngine to check the scoring rules and measure throughput.
+
+Run from the project root:
+    python benchmarks/simulate_engine.py [--actions 2000000] [--players 2] [--teams 0] [--seed 1]
+
+Random actions (start / skip, correct guess, mode change) are applied and the invariants below are checked after
+every one of them. No display or Qt installation is needed.
+'''
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine import GameEngine
+from words import WordProvider
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def simulate(actions, players, seed, teams=0):
+    rng = random.Random(seed)
+    words = WordProvider(ROOT, rng=random.Random(seed))
+    modes = words.modes()
+    engine = GameEngine(words, modes[0], players, teams=[player % teams for player in range(players)] if teams else None)
+    expectedTotal = 0
+
+    for _ in range(actions):
+        action = rng.random()
+        turn = engine.currentTurn
+        before = list(engine.scores)
+        if action < 0.6:
+            drawerPoints, guesserPoints = engine.points()
+            scored = engine.correctGuess()
+            if scored:
+                # the drawer gets the drawer points and everybody else the guesser points, in teams only the team mates
+                guessers = [player for player in range(players) if player != turn - 1
+                            and (not teams or player % teams == (turn - 1) % teams)]
+                expectedTotal += drawerPoints + guesserPoints * len(guessers)
+                for player in range(players):
+                    gained = engine.scores[player] - before[player]
+                    expected = drawerPoints if player == turn - 1 else guesserPoints if player in guessers else 0
+                    assert gained == expected, (player, gained)
+                assert engine.currentTurn == turn % players + 1, "turn must pass to the next player"
+            else:
+                assert not engine.gameStarted and engine.scores == before, "no scoring before the game starts"
+        elif action < 0.9:
+            started = engine.gameStarted
+            skipped = engine.start()
+            assert skipped == started
+            assert engine.scores == before, "starting or skipping never scores"
+            assert engine.currentTurn == (turn % players + 1 if skipped else turn)
+        else:
+            engine.setMode(rng.choice(modes))
+            assert engine.scores == before and engine.currentTurn == turn, "a mode change keeps the game state"
+        assert 1 <= engine.currentTurn <= players
+        assert engine.currentWord or not engine.gameStarted, "there is always a word to draw"
+        assert sum(engine.scores) == expectedTotal, "scores only change by the points table"
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--actions", type=int, default=2000000)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--teams", type=int, default=0, help="number of teams the players are split into, 0 for none")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    engine = simulate(args.actions, args.players, args.seed, args.teams)
+    elapsed = time.perf_counter() - start
+    print(f"{args.actions} actions ({engine.turns} scored turns, {engine.skips} skips) in {elapsed:.2f} s")
+    print(f"{args.actions / elapsed * 60 / 1e6:.1f} million actions per minute, final scores {engine.scores}")
+
+
+if __name__ == "__main__":
+    main()
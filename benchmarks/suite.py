@@ -0,0 +1,329 @@
+'''
+Offscreen benchmark suite, replays deterministic synthetic input through the game's real event handlers.
+
+Run from the project root:
+    QT_QPA_PLATFORM=offscreen python benchmarks/suite.py [--quick] [--output results.json] [--baseline base.json]
+
+Scenarios:
+    draw/<trace>/<size>/<brush>px  strokes drawn with mousePressEvent / mouseMoveEvent / mouseReleaseEvent, the paints
+                                   they cause go through paintEvent. Traces are a random walk scribble, long straight
+                                   lines across the canvas and dense diagonal hatching
+    resize/<size>                  a storm of resizeEvents as a window edge is dragged, until the canvas has settled
+    save/<size>                    save() with a canvas full of strokes, the file dialog answered with a temp file
+    turns                          start (skip) and guessedCorrectly turn transitions
+    startup/import, startup/paint  module import and process launch to first paint, see bench_startup.py
+
+Every event is timed from the handler call until the paints it caused have been processed. Each scenario reports
+latency percentiles in microseconds, paints per second and the process peak RSS so far (the peak never goes down,
+so it is the highest of all scenarios run up to that point). Draw scenarios also report the window's input
+statistics (moves per frame, points kept by simplification, input latency) as "input". The results are printed, or written to --output, as
+JSON. With --baseline, the results are compared against an earlier run: any scenario whose p50 or p99 is more than
+--threshold slower is reported as a regression and the exit status is 1.
+'''
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication, QMessageBox
+from PyQt6.QtCore import Qt, QEvent, QT_VERSION_STR, PYQT_VERSION_STR
+
+from bench_repaint import mouseEvent
+import bench_startup
+
+SIZES = [(800, 600), (1920, 1080), (3840, 2160)]
+BRUSHES = [3, 9]
+MOVES = 600  # mouse moves per draw scenario
+FRAME_MOVES = 2  # moves drawn per frame, a typical mouse sends a little more than one per 60 Hz frame
+RESIZES = 120  # resize events per storm
+TURNS = 60
+STARTUPS = 5  # fresh processes started for the startup scenarios
+THRESHOLD = 0.25  # a scenario is a regression if it is this much slower than the baseline
+
+
+# synthetic traces, each returns a list of strokes, a stroke being a list of (x, y) points inside width x height
+
+def scribble(width, height, moves, seed=1):
+    rng = random.Random(seed)
+    strokes = []
+    while moves > 0:
+        count = min(moves, rng.randrange(30, 150))
+        x, y = rng.randrange(width), rng.randrange(height)
+        angle = rng.random() * 2 * math.pi
+        stroke = [(x, y)]
+        for _ in range(count):
+            angle += rng.uniform(-0.6, 0.6)
+            x = min(max(x + round(4 * math.cos(angle)), 0), width - 1)
+            y = min(max(y + round(4 * math.sin(angle)), 0), height - 1)
+            stroke.append((x, y))
+        strokes.append(stroke)
+        moves -= count
+    return strokes
+
+
+def longLines(width, height, moves, step=8):
+    strokes = []
+    row = 0
+    while moves > 0:
+        y = (row * 97) % height
+        count = min(moves, width // step)
+        strokes.append([(i * step, y) for i in range(count + 1)])
+        moves -= count
+        row += 1
+    return strokes
+
+
+def hatching(width, height, moves, spacing=6):
+    # back and forth diagonals over a patch, every move crosses the area drawn by the previous ones
+    size = min(width, height, 400)
+    x0, y0 = (width - size) // 2, (height - size) // 2
+    stroke = [(x0, y0)]
+    offset = 0
+    while len(stroke) <= moves:
+        offset += spacing
+        if offset > size:
+            offset = spacing
+        stroke.append((x0 + offset, y0))
+        stroke.append((x0, y0 + offset))
+    return [stroke[:moves + 1]]
+
+
+TRACES = {"scribble": scribble, "lines": longLines, "hatching": hatching}
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def peakRss():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage * 1024 if sys.platform != "darwin" else usage  # kilobytes on Linux, bytes on macOS
+
+
+def summarize(latencies, paints, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "events": len(latencies),
+        "p50Us": percentile(latencies, 50) * 1e6,
+        "p90Us": percentile(latencies, 90) * 1e6,
+        "p99Us": percentile(latencies, 99) * 1e6,
+        "maxUs": latencies[-1] * 1e6,
+        "paintsPerSec": paints / elapsed if elapsed > 0 else 0.0,
+        "peakRssBytes": peakRss(),
+    }
+
+
+class Bench:
+    '''
+    A game window sized for a scenario, counting the paintEvents it handles
+    '''
+
+    def __init__(self, app, windowClass, width, height):
+        self.app = app
+        self.window = windowClass()
+        self.window.resize(width, height)
+        self.window.show()
+        self.settle()
+
+    def settle(self):
+        # wait for the resize timer so the canvas covers the window, then for the paints
+        while self.window.resizeTimer.isActive():
+            self.app.processEvents()
+        self.app.processEvents()
+
+    def timed(self, action):
+        start = time.perf_counter()
+        action()
+        self.app.processEvents()  # deliver the paints the action scheduled
+        return time.perf_counter() - start
+
+    def close(self):
+        self.window.saver.waitForDone()
+        self.window.close()
+        self.window.deleteLater()
+        self.app.processEvents()
+
+
+def countingWindow():
+    from PictionaryGame import PictionaryGame
+
+    class CountingWindow(PictionaryGame):
+        paints = 0
+
+        def paintEvent(self, event):
+            CountingWindow.paints += 1
+            super().paintEvent(event)
+
+    return CountingWindow
+
+
+def drawScenario(bench, strokes, brush):
+    window = bench.window
+    window.brushSize = brush
+    window.updatePen()
+    latencies = []
+    moves = 0
+    paints = type(window).paints
+    started = time.perf_counter()
+    for stroke in strokes:
+        x, y = stroke[0]
+        latencies.append(bench.timed(lambda: window.mousePressEvent(mouseEvent(QEvent.Type.MouseButtonPress, x, y))))
+        for x, y in stroke[1:]:
+            def move():
+                window.mouseMoveEvent(mouseEvent(QEvent.Type.MouseMove, x, y, Qt.MouseButton.NoButton))
+                if moves % FRAME_MOVES == FRAME_MOVES - 1:
+                    window.flushMoves()  # the frame timer, fired here so the run doesn't depend on wall time
+            latencies.append(bench.timed(move))
+            moves += 1
+        latencies.append(bench.timed(lambda: window.mouseReleaseEvent(mouseEvent(QEvent.Type.MouseButtonRelease, x, y))))
+    result = summarize(latencies, type(window).paints - paints, time.perf_counter() - started)
+    result["input"] = window.inputStats.summary()
+    return result
+
+
+def resizeScenario(bench, width, height):
+    window = bench.window
+    latencies = []
+    paints = type(window).paints
+    started = time.perf_counter()
+    for i in range(RESIZES):
+        # drag the corner out and back in by up to a quarter of the size
+        fraction = abs((i % 40) - 20) / 80
+        latencies.append(bench.timed(lambda: window.resize(round(width * (1 - fraction)), round(height * (1 - fraction)))))
+    latencies.append(bench.timed(bench.settle))  # the canvas grows once the storm is over
+    return summarize(latencies, type(window).paints - paints, time.perf_counter() - started)
+
+
+def saveScenario(bench, directory):
+    import PictionaryGame as game
+
+    window = bench.window
+    for stroke in scribble(window.width(), window.height(), 2000):  # something to compress
+        window.strokes.beginStroke(Qt.GlobalColor.black, 5, *stroke[0])
+        for x, y in stroke[1:]:
+            window.strokes.addPoint(x, y)
+    window.redraw()
+    bench.settle()
+
+    latencies = []
+    dialog = game.QFileDialog.getSaveFileName
+    started = time.perf_counter()
+    try:
+        for i in range(5):
+            path = os.path.join(directory, "save%d.png" % i)
+            game.QFileDialog.getSaveFileName = staticmethod(lambda *args: (path, "PNG(*.png)"))
+            latencies.append(bench.timed(window.save))  # the GUI thread only hands the image to the saver
+    finally:
+        game.QFileDialog.getSaveFileName = dialog
+    window.saver.waitForDone()
+    result = summarize(latencies, 0, time.perf_counter() - started)
+    result["writtenMs"] = (time.perf_counter() - started) * 1e3  # until every file is on disk
+    return result
+
+
+def turnScenario(bench):
+    window = bench.window
+    latencies = [bench.timed(window.start)]
+    paints = type(window).paints
+    started = time.perf_counter()
+    for i in range(TURNS):
+        latencies.append(bench.timed(window.start if i % 3 == 2 else window.guessedCorrectly))
+    for box in window.findChildren(QMessageBox):  # the word boxes of every turn
+        box.close()
+    return summarize(latencies, type(window).paints - paints, time.perf_counter() - started)
+
+
+def run(quick):
+    app = QApplication(sys.argv)
+    windowClass = countingWindow()
+    sizes = SIZES[:1] if quick else SIZES
+    brushes = BRUSHES[:1] if quick else BRUSHES
+    moves = MOVES // 4 if quick else MOVES
+    results = {}
+
+    for width, height in sizes:
+        size = "%dx%d" % (width, height)
+        for brush in brushes:
+            for name, trace in TRACES.items():
+                bench = Bench(app, windowClass, width, height)
+                results["draw/%s/%s/%dpx" % (name, size, brush)] = drawScenario(bench, trace(width, height, moves), brush)
+                bench.close()
+        bench = Bench(app, windowClass, width, height)
+        results["resize/" + size] = resizeScenario(bench, width, height)
+        bench.close()
+        bench = Bench(app, windowClass, width, height)
+        with tempfile.TemporaryDirectory() as directory:
+            results["save/" + size] = saveScenario(bench, directory)
+        bench.close()
+
+    bench = Bench(app, windowClass, *SIZES[0])
+    results["turns"] = turnScenario(bench)
+    bench.close()
+
+    started = time.perf_counter()
+    imports, paints = bench_startup.measure(STARTUPS)
+    elapsed = time.perf_counter() - started
+    results["startup/import"] = summarize([ms / 1e3 for ms in imports], 0, elapsed)
+    results["startup/paint"] = summarize([ms / 1e3 for ms in paints], len(paints), elapsed)
+    return results
+
+
+def compare(results, baseline, threshold):
+    '''
+    Returns the list of (scenario, metric, baseline, now) that got more than threshold slower
+    '''
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in ("p50Us", "p99Us"):
+            if before[metric] > 0 and result[metric] > before[metric] * (1 + threshold):
+                regressions.append((name, metric, before[metric], result[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smallest canvas and brush only, fewer moves")
+    parser.add_argument("--output", help="write the JSON results to this file instead of printing them")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    report = {
+        "machine": {"python": platform.python_version(), "qt": QT_VERSION_STR, "pyqt": PYQT_VERSION_STR,
+                    "platform": platform.platform(), "processor": platform.processor()},
+        "settings": {"quick": args.quick, "frameMoves": FRAME_MOVES},
+        "results": run(args.quick),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(report["results"], baseline, args.threshold)
+        for name, metric, before, now in regressions:
+            print(f"REGRESSION {name} {metric}: {before:.1f} -> {now:.1f} us ({now / before - 1:+.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline} (threshold {args.threshold:.0%})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# Stamp-based brushes
+#
+# A brush stroke is drawn by compositing a small pre-rendered image of the brush tip, a dab, at evenly spaced points
+# along the path rather than by stroking it with a QPen, which allows soft edges, textures and a size that follows
+# tablet pressure. Rendering a dab (a radial gradient, or a noise texture) is comparatively slow, so dabs are
+# rendered once per (shape, size, colour, hardness, device pixel ratio) and kept in an LRU cache shared by every
+# stroke; drawing a stroke is then only QPainter.drawImage of cached images in the canvas' own format, the fastest
+# thing the raster engine does. Pressure scales the size, which is rounded to SIZE_STEP so that a pressure stroke
+# only needs a handful of dabs.
+#
+# Dabs are SPACING of their size apart. The distance left over at the end of a segment is carried to the next one,
+# so the spacing stays even however the moves of a stroke are grouped into frames.
+
+from collections import OrderedDict
+import math
+import random
+
+from PyQt6.QtGui import QImage, QPainter, QColor, QRadialGradient
+from PyQt6.QtCore import Qt, QPointF, QRectF
+
+SHAPES = ("round", "square", "chalk")
+DAB_CACHE_SIZE = 64  # dabs kept, a stroke with pressure uses one per SIZE_STEP of size
+SPACING = 0.2  # distance between dabs as a fraction of their size
+SIZE_STEP = 0.5  # pixels, sizes from pressure are rounded to this
+CHALK_SEED = 7  # the chalk texture is the same every time it is rendered
+
+FORMAT = QImage.Format.Format_ARGB32_Premultiplied  # the canvas' format
+
+
+class BrushTip:
+    '''
+    The shape of a brush: "round", "square" or "chalk", and its hardness from 0 (edges fade out from the centre) to 1
+    (a hard edge)
+    '''
+    __slots__ = ("shape", "hardness")
+
+    def __init__(self, shape="round", hardness=1.0):
+        if shape not in SHAPES:
+            raise ValueError("unknown brush shape " + repr(shape))
+        self.shape = shape
+        self.hardness = hardness
+
+    def __eq__(self, other):
+        return isinstance(other, BrushTip) and (self.shape, self.hardness) == (other.shape, other.hardness)
+
+    def __repr__(self):
+        return "BrushTip(%r, %r)" % (self.shape, self.hardness)
+
+
+def renderDab(shape, size, color, hardness, ratio=1.0):
+    '''
+    A dab of size logical pixels in colour (an ARGB int) as a QImage at the device pixel ratio, transparent around the
+    tip and one device pixel larger than it on every side
+    '''
+    side = math.ceil(size * ratio) + 2
+    dab = QImage(side, side, FORMAT)
+    dab.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(dab)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(Qt.PenStyle.NoPen)
+    color = QColor.fromRgba(color)
+    radius = size * ratio / 2
+    tip = QRectF(side / 2 - radius, side / 2 - radius, 2 * radius, 2 * radius)
+    if hardness >= 1:
+        painter.setBrush(color)
+    else:  # full colour out to hardness of the radius, fading to transparent at the edge
+        gradient = QRadialGradient(QPointF(side / 2, side / 2), radius)  # documentation: https://doc.qt.io/qt-6/qradialgradient.html
+        edge = QColor(color)
+        edge.setAlpha(0)
+        gradient.setColorAt(max(0.0, hardness), color)
+        gradient.setColorAt(1.0, edge)
+        painter.setBrush(gradient)
+    if shape == "square":
+        painter.drawRect(tip)
+    else:
+        painter.drawEllipse(tip)
+    if shape == "chalk":  # knock random pixels back, like chalk on a rough surface
+        rng = random.Random(CHALK_SEED)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_DestinationOut)
+        for y in range(side):
+            for x in range(side):
+                if rng.random() < 0.35:
+                    painter.fillRect(x, y, 1, 1, QColor(0, 0, 0, rng.randrange(96, 256)))
+    painter.end()
+    dab.setDevicePixelRatio(ratio)
+    return dab
+
+
+class DabCache:
+    '''
+    Rendered dabs by (shape, size, colour, hardness, ratio), the least recently used are dropped once there are more
+    than capacity
+    '''
+
+    def __init__(self, capacity=DAB_CACHE_SIZE):
+        self.capacity = capacity
+        self.dabs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.dabs)
+
+    def dab(self, shape, size, color, hardness, ratio=1.0):
+        key = (shape, size, color, hardness, ratio)
+        dab = self.dabs.get(key)
+        if dab is not None:
+            self.dabs.move_to_end(key)
+            self.hits += 1
+            return dab
+        self.misses += 1
+        dab = self.dabs[key] = renderDab(shape, size, color, hardness, ratio)
+        if len(self.dabs) > self.capacity:
+            self.dabs.popitem(last=False)
+        return dab
+
+    def clear(self):
+        self.dabs.clear()
+
+
+def quantize(size):
+    return max(SIZE_STEP, round(size / SIZE_STEP) * SIZE_STEP)
+
+
+class BrushStroke:
+    '''
+    Stamps one stroke of a brush tip, colour (an ARGB int) and size, moveTo the first point then lineTo each next one.
+    Pressures are from 0 to 1 and scale the size
+    '''
+
+    def __init__(self, cache, tip, color, size, ratio=1.0):
+        self.cache = cache
+        self.tip = tip
+        self.color = color
+        self.size = size
+        self.ratio = ratio
+        self.x = self.y = 0.0
+        self.pressure = 1.0
+        self.carry = 0.0  # distance along the next segment to its first dab
+        self.dabSize = None  # the size and image of the last dab used
+        self.dab = None
+        self.dabs = 0
+
+    def moveTo(self, x, y, pressure=1.0):
+        self.x, self.y, self.pressure = x, y, pressure
+        self.carry = 0.0  # the first segment starts with a dab
+
+    def dabFor(self, pressure):
+        size = quantize(self.size * pressure)
+        if size != self.dabSize:  # pressure changes slowly, most dabs are the same as the last
+            tip = self.tip
+            self.dab = self.cache.dab(tip.shape, size, self.color, tip.hardness, self.ratio)
+            self.dabSize = size
+        return self.dab
+
+    def lineTo(self, painter, x, y, pressure=1.0):
+        '''
+        Stamp the dabs from the current point to (x, y) with painter, returns how many were drawn
+        '''
+        x0, y0, p0 = self.x, self.y, self.pressure
+        dx, dy, dp = x - x0, y - y0, pressure - p0
+        length = math.hypot(dx, dy)
+        distance = self.carry
+        drawn = 0
+        drawImage = painter.drawImage
+        while distance <= length:
+            f = distance / length if length else 0.0
+            p = p0 + dp * f
+            dab = self.dabFor(p)
+            half = dab.width() / (2 * self.ratio)
+            drawImage(QPointF(x0 + dx * f - half, y0 + dy * f - half), dab)
+            drawn += 1
+            distance += max(1.0, self.dabSize * SPACING)
+        self.carry = distance - length
+        self.x, self.y, self.pressure = x, y, pressure
+        self.dabs += drawn
+        return drawn
+
+
+def stampPolyline(painter, cache, tip, color, size, points, pressures=None, ratio=1.0):
+    '''
+    Stamp a whole stroke through (x, y) points, pressures (one per point) default to 1. Returns the number of dabs
+    '''
+    stroke = BrushStroke(cache, tip, color, size, ratio)
+    points = iter(points)
+    first = next(points, None)
+    if first is None:
+        return 0
+    pressures = iter(pressures) if pressures else None
+    stroke.moveTo(first[0], first[1], next(pressures) if pressures else 1.0)
+    for x, y in points:
+        stroke.lineTo(painter, x, y, next(pressures) if pressures else 1.0)
+    return stroke.dabs
@@ -0,0 +1,179 @@
+# Word corpus stored in a local SQLite file
+#
+# Word packs can hold hundreds of thousands of words across difficulties, categories and languages, so rather than
+# reading them into Python lists they live in an indexed SQLite database and a draw is a single index lookup.
+# Every word is given a random "slot" in [0, 1) when it is imported; drawing a random word means picking a random
+# number and taking the first matching word at or after that slot, which the (pack, slot) index answers without
+# scanning the pack. Packs are imported in bulk from the same one-line CSV format as easymode.txt / hardmode.txt.
+#
+# Usage:
+#   python corpus.py words.db easymode.txt hardmode.txt            import the files, pack name and difficulty from the file name
+#   python corpus.py words.db animals.txt --pack animals --difficulty easy --category animals --language en
+
+import argparse
+import csv
+import os
+import random
+import sqlite3
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS packs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    difficulty TEXT NOT NULL,
+    category TEXT NOT NULL,
+    language TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS words (
+    id INTEGER PRIMARY KEY,
+    pack INTEGER NOT NULL REFERENCES packs(id),
+    word TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    slot REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS words_unique ON words (pack, word COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS words_slot ON words (pack, slot);
+'''
+
+
+class WordCorpus:
+    '''
+    Indexed collection of word packs with filtered random draws
+    '''
+
+    def __init__(self, path, rng=None):
+        self.path = path
+        self.rng = rng or random.Random()
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def packs(self, difficulty=None, category=None, language=None):
+        '''
+        Names of the packs matching the filters, in the order they were imported
+        '''
+        where, args = self.packFilter(difficulty, category, language)
+        return [name for name, in self.db.execute("SELECT name FROM packs" + where + " ORDER BY id", args)]
+
+    def packInfo(self, name):
+        row = self.db.execute("SELECT difficulty, category, language, size FROM packs WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("difficulty", "category", "language", "size"), row))
+
+    def packFilter(self, difficulty, category, language, names=None):
+        clauses, args = [], []
+        for column, value in (("difficulty", difficulty), ("category", category), ("language", language)):
+            if value is not None:
+                clauses.append(column + " = ?")
+                args.append(value)
+        if names is not None:
+            clauses.append("name IN (%s)" % ",".join("?" * len(names)))
+            args.extend(names)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    def count(self, pack=None, difficulty=None, category=None, language=None, minLength=None, maxLength=None):
+        '''
+        Number of words matching the filters
+        '''
+        packs = self.matchingPacks(pack, difficulty, category, language)
+        if minLength is None and maxLength is None:
+            return sum(size for _, size in packs)
+        total = 0
+        for packId, _ in packs:
+            where, args = self.wordFilter(packId, minLength, maxLength)
+            total += self.db.execute("SELECT COUNT(*) FROM words" + where, args).fetchone()[0]
+        return total
+
+    def matchingPacks(self, pack, difficulty, category, language):
+        where, args = self.packFilter(difficulty, category, language, None if pack is None else [pack])
+        return self.db.execute("SELECT id, size FROM packs" + where + " ORDER BY id", args).fetchall()
+
+    def wordFilter(self, packId, minLength, maxLength):
+        clauses, args = ["pack = ?"], [packId]
+        if minLength is not None:
+            clauses.append("length >= ?")
+            args.append(minLength)
+        if maxLength is not None:
+            clauses.append("length <= ?")
+            args.append(maxLength)
+        return " WHERE " + " AND ".join(clauses), args
+
+    def draw(self, pack=None, difficulty=None, category=None, language=None, minLength=None, maxLength=None,
+             exclude=()):
+        '''
+        A random word matching the filters, or None if there is none. A pack is picked in proportion to its size and
+        a word is then found from a random slot in that pack, words in exclude are skipped
+        '''
+        packs = [(packId, size) for packId, size in self.matchingPacks(pack, difficulty, category, language) if size]
+        while packs:
+            choice = self.rng.choices(range(len(packs)), weights=[size for _, size in packs])[0]
+            word = self.drawFromPack(packs[choice][0], minLength, maxLength, exclude)
+            if word is not None:
+                return word
+            del packs[choice]  # nothing in this pack matches, try the others
+        return None
+
+    def drawFromPack(self, packId, minLength, maxLength, exclude):
+        where, args = self.wordFilter(packId, minLength, maxLength)
+        if exclude:
+            where += " AND word NOT IN (%s)" % ",".join("?" * len(exclude))
+            args.extend(exclude)
+        query = "SELECT word FROM words" + where + " AND slot >= ? ORDER BY slot LIMIT 1"
+        row = self.db.execute(query, args + [self.rng.random()]).fetchone()
+        if row is None:  # past the last matching slot, wrap around to the first
+            row = self.db.execute(query, args + [0.0]).fetchone()
+        return row[0] if row else None
+
+    def importWords(self, pack, words, difficulty, category="general", language="en"):
+        '''
+        Add words to a pack, creating the pack if needed. Duplicates (ignoring case) are skipped, returns the number
+        of words added
+        '''
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO packs (name, difficulty, category, language) VALUES (?, ?, ?, ?)",
+                            (pack, difficulty, category, language))
+            packId = self.db.execute("SELECT id FROM packs WHERE name = ?", (pack,)).fetchone()[0]
+            rng = self.rng
+            cursor = self.db.executemany(
+                "INSERT OR IGNORE INTO words (pack, word, length, slot) VALUES (?, ?, ?, ?)",
+                ((packId, word, len(word), rng.random()) for word in (w.strip() for w in words) if word))
+            added = cursor.rowcount
+            self.db.execute("UPDATE packs SET size = (SELECT COUNT(*) FROM words WHERE pack = ?) WHERE id = ?",
+                            (packId, packId))
+        return added
+
+    def importCsv(self, path, pack=None, difficulty=None, category="general", language="en"):
+        '''
+        Bulk import a word file in the *mode.txt format (comma separated, any number of lines). The pack name and
+        difficulty default to the file name without "mode.txt", e.g. "easy" for easymode.txt
+        '''
+        name = os.path.basename(path)
+        name = name[:-len("mode.txt")] if name.endswith("mode.txt") else os.path.splitext(name)[0]
+        with open(path, newline='') as csv_file:
+            words = (word for row in csv.reader(csv_file, delimiter=',') for word in row)
+            return self.importWords(pack or name, words, difficulty or name, category, language)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import *mode.txt word files into a word corpus database")
+    parser.add_argument("database")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--pack", help="pack name, defaults to the file name")
+    parser.add_argument("--difficulty", help="difficulty tier, defaults to the file name")
+    parser.add_argument("--category", default="general")
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args(argv)
+
+    corpus = WordCorpus(args.database)
+    for path in args.files:
+        added = corpus.importCsv(path, args.pack, args.difficulty, args.category, args.language)
+        print(path + ": " + str(added) + " words added")
+    corpus.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# Game rules without any user interface
+#
+# GameEngine holds the state of a game (whose turn it is, the scores, the mode and the current word) and the
+# transitions between turns. It has no Qt dependency so the rules can be simulated, load tested and fuzzed without a
+# display; PictionaryGame only forwards button presses to it and shows the result.
+#
+# Any number of players can play, optionally in teams. Without teams every other player guesses and gets the guesser
+# points; with teams only the drawer's team mates guess and score. The points table can be given per mode and falls
+# back to the mode's difficulty tier, and can be read from a JSON file such as
+#   {"easy": [2, 1], "hard": [3, 2], "animals": [4, 1]}
+# Each scored round is passed to the score board, if there is one (see scores.py).
+#
+# Typed guesses are checked against the current word by a GuessMatcher (see guesses.py), built once per word.
+
+import json
+
+from guesses import GuessMatcher, CORRECT, WRONG
+
+# points for a correct guess by mode or difficulty: (points for the player drawing, points for the players guessing)
+SCORING = {
+    "easy": (2, 1),
+    "hard": (3, 2),
+}
+
+
+def loadScoring(path):
+    '''
+    Read a points table from a JSON file mapping modes or difficulties to [drawer points, guesser points]. The
+    built-in table fills in any difficulty the file leaves out
+    '''
+    with open(path, encoding="utf-8") as f:
+        table = json.load(f)
+    scoring = dict(SCORING)
+    for key, points in table.items():
+        drawerPoints, guesserPoints = points
+        scoring[key] = (int(drawerPoints), int(guesserPoints))
+    return scoring
+
+
+class GameEngine:
+    '''
+    State and turn transitions of a Pictionary game: start, skip, correct guess and mode change
+    '''
+
+    def __init__(self, words, mode="easy", players=2, scoring=None, names=None, teams=None, scoreboard=None):
+        self.words = words  # anything with draw(mode) and difficulty(mode), e.g. a WordProvider
+        self.mode = mode
+        self.players = players
+        self.scoring = scoring or SCORING
+        self.names = names or ["Player %d" % (player + 1) for player in range(players)]
+        self.teams = teams  # the team of each player, None when everyone plays for themselves
+        self.scoreboard = scoreboard  # a ScoreBoard every scored round is recorded in, or None
+        self.scores = [0] * players
+        self.currentTurn = 1  # players are numbered from 1
+        self.gameStarted = False
+        self.currentWord = None
+        self.matcher = None  # GuessMatcher of the current word
+        self.turns = 0  # turns completed by a correct guess
+        self.skips = 0
+
+    # the two player game refers to the scores by player
+    @property
+    def p1score(self):
+        return self.scores[0]
+
+    @property
+    def p2score(self):
+        return self.scores[1]
+
+    def drawWord(self):
+        '''
+        Draw the next word for the current mode
+        '''
+        self.currentWord = self.words.draw(self.mode)
+        self.matcher = GuessMatcher(self.currentWord)  # the guesses are checked against it from now on
+        return self.currentWord
+
+    def setMode(self, mode):
+        '''
+        Change the mode, the current word is replaced with one from the new mode
+        '''
+        self.mode = mode
+        return self.drawWord()
+
+    def start(self):
+        '''
+        Start the game, or skip the current turn if it has already started. Returns True if a turn was skipped
+        '''
+        if self.gameStarted:
+            self.skips += 1
+            self.nextTurn()
+            return True
+        self.gameStarted = True
+        self.drawWord()
+        return False
+
+    def points(self):
+        '''
+        The (drawer, guesser) points a correct guess is worth in the current mode
+        '''
+        points = self.scoring.get(self.mode)
+        if points is None:
+            difficulty = self.words.difficulty(self.mode)
+            if difficulty not in self.scoring and difficulty not in SCORING:
+                difficulty = "hard"  # any tier other than easy scores as hard
+            # the built-in table fills in a tier the points table leaves out
+            points = self.scoring[difficulty] if difficulty in self.scoring else SCORING[difficulty]
+        return points
+
+    def gains(self):
+        '''
+        The points each player gets for a correct guess on the current turn
+        '''
+        drawerPoints, guesserPoints = self.points()
+        drawer = self.currentTurn - 1
+        if self.teams is None:
+            return [drawerPoints if player == drawer else guesserPoints for player in range(self.players)]
+        team = self.teams[drawer]
+        return [drawerPoints if player == drawer else guesserPoints if self.teams[player] == team else 0
+                for player in range(self.players)]
+
+    def teamScores(self):
+        '''
+        Total score of each team, in order of first appearance
+        '''
+        totals = {}
+        for team, score in zip(self.teams or [], self.scores):
+            totals[team] = totals.get(team, 0) + score
+        return totals
+
+    def correctGuess(self):
+        '''
+        Score a correct guess for the current word and move on to the next player. Returns False if the game
+        hasn't started
+        '''
+        if not self.gameStarted:
+            return False
+        gains = self.gains()
+        for player, points in enumerate(gains):
+            self.scores[player] += points
+        if self.scoreboard is not None:
+            self.scoreboard.record(dict(zip(self.names, gains)), self.mode, self.names[self.currentTurn - 1],
+                                   dict(zip(self.names, self.teams)) if self.teams else None)
+        self.turns += 1
+        self.nextTurn()
+        return True
+
+    def checkGuess(self, text):
+        '''
+        Check a typed guess against the current word without scoring it. Returns CORRECT, CLOSE or WRONG
+        '''
+        if not self.gameStarted or not self.currentWord:
+            return WRONG
+        if self.matcher is None or self.matcher.answer != self.currentWord:  # the word was set from outside
+            self.matcher = GuessMatcher(self.currentWord)
+        return self.matcher.check(text)
+
+    def guess(self, text):
+        '''
+        Check a typed guess and score it like correctGuess if it is right. Returns CORRECT, CLOSE or WRONG
+        '''
+        result = self.checkGuess(text)
+        if result == CORRECT:
+            self.correctGuess()
+        return result
+
+    def nextTurn(self):
+        self.currentTurn = self.currentTurn % self.players + 1
+        self.drawWord()
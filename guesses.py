@@ -0,0 +1,133 @@
+# Matching typed guesses against the word being drawn
+#
+# When a word is drawn the forms a guess may take are worked out once: the answer is case-folded, accents and
+# punctuation are stripped and a leading article dropped, so "Mobile-Phone", "mobile phone" and "MOBILEPHONE" are all
+# the same answer once the spaces are removed, and an answer of three or more words can also be guessed by its
+# initials ("GUI" for "Graphical User Interface"). Checking a guess is then one normalisation of the guess and a
+# set lookup, whatever the length of the word list.
+#
+# A guess that isn't exact is compared with the answer by edit distance (insertions, deletions, substitutions and
+# swaps of neighbouring letters), bounded: only distances up to the close limit are computed, along a band of the
+# table, stopping as soon as a row is over the limit, and not at all when the lengths alone differ by more. One typo
+# in a long answer still counts as correct; a guess a few edits away, or one of the words of a multi-word answer, is
+# reported as close. Busy rooms send the same guesses over and over, so results are also remembered per word.
+
+import string
+import unicodedata
+
+CORRECT = "correct"
+CLOSE = "close"
+WRONG = "wrong"
+
+ARTICLES = ("a", "an", "the")  # dropped from the start of answers and guesses
+TYPO_LENGTH = 6  # answers this long accept one typo as correct
+CLOSE_RATIO = 4  # a guess within len(answer) // CLOSE_RATIO edits (at least 1) is close
+MEMO_SIZE = 4096  # guesses remembered per word
+MIN_PART_LENGTH = 3  # words of a multi-word answer shorter than this aren't a close guess on their own
+
+PUNCTUATION = str.maketrans({character: " " for character in string.punctuation})
+
+
+def normalize(text):
+    '''
+    The words of text, case-folded and without accents or punctuation, separated by single spaces
+    '''
+    if not text.isascii():
+        text = "".join(character for character in unicodedata.normalize("NFKD", text)
+                       if not unicodedata.combining(character))  # "é" is "e" followed by a combining accent
+        text = "".join(" " if unicodedata.category(character)[0] in "PS" else character for character in text)
+    return " ".join(text.casefold().translate(PUNCTUATION).split())
+
+
+def answerWords(text):
+    words = normalize(text).split()
+    if len(words) > 1 and words[0] in ARTICLES:
+        del words[0]
+    return words
+
+
+def editDistance(first, second, limit):
+    '''
+    The optimal string alignment distance between two strings if it is at most limit, otherwise limit + 1
+    '''
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    if first == second:
+        return 0
+    # common prefixes and suffixes don't change the distance
+    start = 0
+    while start < len(first) and start < len(second) and first[start] == second[start]:
+        start += 1
+    end = 0
+    while end < len(first) - start and end < len(second) - start and first[-1 - end] == second[-1 - end]:
+        end += 1
+    first, second = first[start:len(first) - end], second[start:len(second) - end]
+    if not first or not second:
+        return min(max(len(first), len(second)), limit + 1)
+
+    over = limit + 1
+    columns = len(second)
+    before = None
+    previous = list(range(columns + 1))
+    for i in range(1, len(first) + 1):
+        current = [over] * (columns + 1)
+        current[0] = i if i <= limit else over
+        rowMin = current[0]
+        character = first[i - 1]
+        for j in range(max(1, i - limit), min(columns, i + limit) + 1):  # only the band can be within limit
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (character != second[j - 1]))
+            if (before is not None and j > 1 and character == second[j - 2] and first[i - 2] == second[j - 1]
+                    and before[j - 2] + 1 < distance):  # two neighbouring letters swapped
+                distance = before[j - 2] + 1
+            current[j] = distance
+            if distance < rowMin:
+                rowMin = distance
+        if rowMin > limit:  # every alignment from here on is already too far
+            return over
+        before, previous = previous, current
+    return min(previous[columns], over)
+
+
+class GuessMatcher:
+    '''
+    Checks guesses against one answer, returning CORRECT, CLOSE or WRONG
+    '''
+
+    def __init__(self, answer):
+        self.answer = answer
+        words = normalize(answer).split()
+        full = "".join(words)  # with its article, "The Beatles" may be typed either way
+        if len(words) > 1 and words[0] in ARTICLES:
+            del words[0]
+        self.compact = "".join(words)
+        self.forms = (self.compact,) if full == self.compact else (self.compact, full)
+        self.exact = set(self.forms)
+        if len(words) >= 3:
+            self.exact.add("".join(word[0] for word in words))
+        self.parts = {word for word in words if len(word) >= MIN_PART_LENGTH} if len(words) > 1 else set()
+        self.typoLimit = 1 if len(self.compact) >= TYPO_LENGTH else 0
+        self.closeLimit = max(1, len(self.compact) // CLOSE_RATIO)
+        self.memo = {}
+
+    def check(self, guess):
+        words = answerWords(guess)
+        compact = "".join(words)
+        if compact in self.exact:
+            return CORRECT
+        if not compact:
+            return WRONG
+        result = self.memo.get(compact)
+        if result is None:
+            result = self.match(words, compact)
+            if len(self.memo) >= MEMO_SIZE:
+                self.memo.clear()
+            self.memo[compact] = result
+        return result
+
+    def match(self, words, compact):
+        distance = min(editDistance(compact, form, self.closeLimit) for form in self.forms)
+        if distance <= self.typoLimit:
+            return CORRECT
+        if distance <= self.closeLimit or any(word in self.parts for word in words):
+            return CLOSE
+        return WRONG
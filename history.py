@@ -0,0 +1,248 @@
+# Undo / redo for the drawing canvas
+#
+# Rather than snapshotting the whole canvas for every change, the canvas is split into square tiles and a history
+# entry only keeps the tiles a change touched, once as they were before and once as they were after. Tiles are never
+# modified once captured, so entries share them freely: the "after" tile of one stroke is reused as the "before" tile
+# of the next stroke that touches the same area, and every blank tile produced by a clear (or every tile a fill
+# covers completely) is the same object.
+# Memory is accounted per unique tile and the oldest entries are dropped once the configured limit is exceeded.
+#
+# The history also keeps track of the tiles changed since takeChanges was last called, which is what autosave.py
+# journals: the latest tile of each is already a copy of it as it is on the canvas.
+
+from PyQt6.QtGui import QPainter, QImage, QColor
+from PyQt6.QtCore import Qt, QRect, QRectF
+
+TILE_SIZE = 64  # width and height of a history tile in pixels
+MEMORY_LIMIT = 64 * 1024 * 1024  # default number of bytes of tiles kept by the history
+
+
+class HistoryEntry:
+    '''
+    One undoable change: the tiles it touched before and after, and the stroke list before and after
+    '''
+    __slots__ = ("before", "after", "strokesBefore", "strokesAfter")
+
+    def __init__(self, strokesBefore):
+        self.before = {}  # (column, row) -> tile
+        self.after = {}
+        self.strokesBefore = strokesBefore
+        self.strokesAfter = None
+
+
+class CanvasHistory:
+    '''
+    Undo and redo stacks of tiled canvas snapshots with copy-on-write tile sharing and a memory cap
+    '''
+
+    def __init__(self, memoryLimit=MEMORY_LIMIT, tileSize=TILE_SIZE):
+        self.memoryLimit = memoryLimit
+        self.tileSize = tileSize
+        self.undoStack = []
+        self.redoStack = []
+        self.pending = None  # entry being recorded while a stroke is in progress
+        self.latest = {}  # (column, row) -> tile known to match the canvas, reused instead of copying again
+        self.solidTiles = {}  # (width, height, rgba) -> the single shared tile of that size and colour
+        self.refs = {}  # id(tile) -> [tile, number of references from entries]
+        self.memoryUsed = 0
+        self.isBlank = True  # the canvas is known to be completely blank
+        self.changed = set()  # keys of the tiles changed since takeChanges
+        self.replaced = True  # the canvas changed in a way the tiles don't describe since takeChanges
+        self.appliedRect = QRect()  # device pixels painted by the last undo or redo
+
+    def clear(self):
+        '''
+        Forget all history, used when the canvas is replaced by something the tiles no longer describe
+        '''
+        self.undoStack = []
+        self.redoStack = []
+        self.pending = None
+        self.latest = {}
+        self.refs = {}
+        self.memoryUsed = 0
+        self.isBlank = False
+        self.replaced = True
+
+    def forgetCache(self):
+        '''
+        Stop reusing the latest tiles, used when the canvas grows and tiles along the old edge get bigger
+        '''
+        self.latest = {}
+        self.replaced = True
+
+    def canUndo(self):
+        return bool(self.undoStack)
+
+    def canRedo(self):
+        return bool(self.redoStack)
+
+    def recording(self):
+        return self.pending is not None
+
+    def tileRect(self, key):
+        return QRect(key[0] * self.tileSize, key[1] * self.tileSize, self.tileSize, self.tileSize)
+
+    def tileKeys(self, canvas, rect):
+        '''
+        The keys of the tiles that rect (in device pixels) overlaps, clipped to the canvas
+        '''
+        rect = rect.intersected(canvas.rect())
+        if rect.isEmpty():
+            return []
+        size = self.tileSize
+        return [(column, row)
+                for row in range(rect.top() // size, rect.bottom() // size + 1)
+                for column in range(rect.left() // size, rect.right() // size + 1)]
+
+    def capture(self, canvas, key):
+        return canvas.copy(self.tileRect(key).intersected(canvas.rect()))
+
+    def begin(self, canvas, strokes):
+        '''
+        Start recording a change, any change still being recorded is committed first
+        '''
+        if self.pending is not None:
+            self.commit(canvas, strokes)
+        self.pending = HistoryEntry(list(strokes))
+
+    def touch(self, canvas, rect):
+        '''
+        Call before painting into rect, saves the tiles it overlaps the first time the change touches them.
+        rect is in the canvas' logical coordinates, tiles are kept in device pixels
+        '''
+        ratio = canvas.devicePixelRatio()
+        if ratio != 1:
+            rect = QRectF(rect.x() * ratio, rect.y() * ratio, rect.width() * ratio, rect.height() * ratio).toAlignedRect()
+        self.touchKeys(canvas, self.tileKeys(canvas, rect))
+
+    def touchKeys(self, canvas, keys):
+        before = self.pending.before
+        for key in keys:
+            if key not in before:
+                tile = self.latest.get(key)
+                before[key] = tile if tile is not None else self.capture(canvas, key)
+
+    def commit(self, canvas, strokes, blank=False, solid=(), color=None):
+        '''
+        Finish recording the change and push it on the undo stack, if blank the touched tiles are known to be blank.
+        solid are the keys of touched tiles known to be filled with color, they aren't copied from the canvas
+        '''
+        entry, self.pending = self.pending, None
+        if entry is None or not entry.before:  # nothing was painted
+            return
+        if blank:
+            solid, color = entry.before, Qt.GlobalColor.white
+        rgba = QColor(color).rgba() if solid else None
+        bounds = canvas.rect()
+        for key in entry.before:
+            if key in solid:
+                tile = self.solidTile(self.tileRect(key).intersected(bounds), rgba)
+            else:
+                tile = self.capture(canvas, key)
+            entry.after[key] = tile
+            self.latest[key] = tile
+        self.changed.update(entry.after)
+        entry.strokesAfter = list(strokes)
+        self.isBlank = blank
+
+        for stale in self.redoStack:  # a new change discards everything that could have been redone
+            self.release(stale)
+        self.redoStack = []
+        self.retain(entry)
+        self.undoStack.append(entry)
+        while self.memoryUsed > self.memoryLimit and len(self.undoStack) > 1:  # evict the oldest entries first
+            self.release(self.undoStack.pop(0))
+
+    def recordClear(self, canvas, strokes):
+        '''
+        Fill the whole canvas with white as a single undoable change, clearing a blank canvas is not recorded
+        '''
+        if self.isBlank and self.pending is None:
+            canvas.fill(Qt.GlobalColor.white)
+            return
+        self.begin(canvas, strokes)
+        self.touchKeys(canvas, self.tileKeys(canvas, canvas.rect()))
+        canvas.fill(Qt.GlobalColor.white)
+        self.commit(canvas, [], blank=True)
+
+    def undo(self, canvas):
+        '''
+        Restore the canvas to before the last change, returns the stroke list to restore or None
+        '''
+        if not self.undoStack:
+            return None
+        entry = self.undoStack.pop()
+        self.apply(canvas, entry.before)
+        self.redoStack.append(entry)
+        self.isBlank = False
+        return list(entry.strokesBefore)
+
+    def redo(self, canvas):
+        '''
+        Reapply the last undone change, returns the stroke list to restore or None
+        '''
+        if not self.redoStack:
+            return None
+        entry = self.redoStack.pop()
+        self.apply(canvas, entry.after)
+        self.undoStack.append(entry)
+        self.isBlank = False
+        return list(entry.strokesAfter)
+
+    def apply(self, canvas, tiles):
+        ratio = canvas.devicePixelRatio()
+        painter = QPainter(canvas)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)  # replace, don't blend
+        self.appliedRect = QRect()
+        for key, tile in tiles.items():
+            rect = self.tileRect(key)
+            self.appliedRect = self.appliedRect.united(QRect(rect.topLeft(), tile.size()))
+            target = QRectF(rect.left() / ratio, rect.top() / ratio, tile.width() / ratio, tile.height() / ratio)
+            painter.drawImage(target, tile, QRectF(tile.rect()))
+            self.latest[key] = tile
+        painter.end()
+        self.changed.update(tiles)
+
+    def takeChanges(self):
+        '''
+        The tiles changed since the last call as {(left, top): tile} in device pixels, or None if the whole canvas has
+        to be saved again. The tiles are the history's own copies, which are never modified
+        '''
+        if self.replaced:
+            tiles = None
+        else:
+            size = self.tileSize
+            tiles = {(column * size, row * size): self.latest[column, row] for column, row in self.changed}
+        self.changed = set()
+        self.replaced = False
+        return tiles
+
+    def solidTile(self, rect, rgba):
+        key = (rect.width(), rect.height(), rgba)
+        tile = self.solidTiles.get(key)
+        if tile is None:
+            tile = QImage(rect.width(), rect.height(), QImage.Format.Format_ARGB32_Premultiplied)  # the canvas' format
+            tile.fill(QColor.fromRgba(rgba))
+            self.solidTiles[key] = tile
+        return tile
+
+    # reference counting so a tile shared by several entries is only counted once
+
+    def retain(self, entry):
+        for tiles in (entry.before, entry.after):
+            for tile in tiles.values():
+                ref = self.refs.get(id(tile))
+                if ref is None:
+                    self.refs[id(tile)] = [tile, 1]
+                    self.memoryUsed += tile.sizeInBytes()
+                else:
+                    ref[1] += 1
+
+    def release(self, entry):
+        for tiles in (entry.before, entry.after):
+            for tile in tiles.values():
+                ref = self.refs[id(tile)]
+                ref[1] -= 1
+                if ref[1] == 0:
+                    del self.refs[id(tile)]
+                    self.memoryUsed -= tile.sizeInBytes()
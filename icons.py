@@ -0,0 +1,110 @@
+# Menu icons from a single pre-packed atlas
+#
+# Loading every menu icon from its own PNG means a file lookup and a decode per icon at startup. Instead all icons
+# are packed into one image, icons/atlas.png, with icons/atlas.json giving each icon's rectangle in it. The atlas is
+# read the first time an icon is asked for (when a menu is first opened) and icons are cut out of it and cached.
+# If there is no atlas the individual icons/<name>.png files are used, and if there is no icons directory at all
+# the icons are left empty without touching the disk again.
+#
+# Build the atlas from the individual icons with:
+#   python icons.py [--directory icons] [--size 32]
+
+import argparse
+import json
+import math
+import os
+import sys
+
+from PyQt6.QtGui import QIcon, QPixmap, QPainter
+from PyQt6.QtCore import QRect, Qt
+
+ICON_DIRECTORY = "icons"
+ATLAS_IMAGE = "atlas.png"
+ATLAS_INDEX = "atlas.json"
+ICON_SIZE = 32  # size of each icon in the atlas, menus draw them at 16 to 24 pixels
+
+
+class IconAtlas:
+    '''
+    Icons by name, loaded on first use from the atlas or the icon directory
+    '''
+
+    def __init__(self, directory=ICON_DIRECTORY):
+        self.directory = directory
+        self.atlas = None
+        self.index = None  # name -> [x, y, width, height] in the atlas, {} once it is known there is no atlas
+        self.cache = {}
+        self.exists = None  # whether the icon directory exists, checked once
+
+    def load(self):
+        self.index = {}
+        self.exists = os.path.isdir(self.directory)
+        if not self.exists:
+            return
+        try:
+            with open(os.path.join(self.directory, ATLAS_INDEX)) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        atlas = QPixmap(os.path.join(self.directory, ATLAS_IMAGE))
+        if not atlas.isNull():
+            self.atlas = atlas
+            self.index = index
+
+    def icon(self, name):
+        icon = self.cache.get(name)
+        if icon is not None:
+            return icon
+        if self.index is None:
+            self.load()
+        rect = self.index.get(name)
+        if rect is not None:
+            icon = QIcon(self.atlas.copy(QRect(*rect)))  # documentation: https://doc.qt.io/qt-6/qpixmap.html#copy
+        elif self.exists:
+            icon = QIcon(os.path.join(self.directory, name + ".png"))
+        else:
+            icon = QIcon()
+        self.cache[name] = icon
+        return icon
+
+
+def pack(directory=ICON_DIRECTORY, size=ICON_SIZE):
+    '''
+    Pack every <name>.png in directory into the atlas image and write its index, returns the number of icons
+    '''
+    names = sorted(os.path.splitext(file)[0] for file in os.listdir(directory)
+                   if file.endswith(".png") and file != ATLAS_IMAGE)
+    columns = max(1, math.ceil(math.sqrt(len(names))))
+    rows = max(1, math.ceil(len(names) / columns))
+    atlas = QPixmap(columns * size, rows * size)
+    atlas.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(atlas)
+    index = {}
+    for i, name in enumerate(names):
+        rect = QRect((i % columns) * size, (i // columns) * size, size, size)
+        icon = QPixmap(os.path.join(directory, name + ".png"))
+        if icon.isNull():
+            continue
+        painter.drawPixmap(rect, icon.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                                             Qt.TransformationMode.SmoothTransformation))
+        index[name] = [rect.x(), rect.y(), rect.width(), rect.height()]
+    painter.end()
+    atlas.save(os.path.join(directory, ATLAS_IMAGE))
+    with open(os.path.join(directory, ATLAS_INDEX), "w") as f:
+        json.dump(index, f, indent=1)
+    return len(index)
+
+
+def main(argv=None):
+    from PyQt6.QtWidgets import QApplication
+
+    parser = argparse.ArgumentParser(description="Pack the menu icons into a single atlas")
+    parser.add_argument("--directory", default=ICON_DIRECTORY)
+    parser.add_argument("--size", type=int, default=ICON_SIZE)
+    args = parser.parse_args(argv)
+    app = QApplication(sys.argv[:1])  # pixmaps need a GUI application
+    print("packed %d icons into %s" % (pack(args.directory, args.size), os.path.join(args.directory, ATLAS_IMAGE)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# Opening images off the GUI thread at the size they will be shown
+#
+# An image is never decoded at full resolution just to be scaled down afterwards. QImageReader reads the size from
+# the file header first, so oversized files are refused before anything is allocated, and is then told the size to
+# decode to: JPEG is decoded straight at 1/2, 1/4 or 1/8 scale by the decoder and only the final resize is done at
+# the target size, other formats are scaled as they are read where the plugin supports it. Reading happens on a
+# worker thread; progress is reported in stages and a load can be cancelled, in which case its result is dropped.
+
+import threading
+
+from PyQt6.QtGui import QImage, QImageReader
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, pyqtSignal
+
+ALLOCATION_LIMIT_MB = 512  # largest buffer Qt may allocate for a decoded image
+# images with more pixels than fit in that buffer at 4 bytes a pixel are refused before Qt would refuse them
+# itself with a less helpful message, about 134 megapixels
+MAX_PIXELS = ALLOCATION_LIMIT_MB * 1024 * 1024 // 4
+STAGES = 3  # header read, decoded, converted
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+def readScaled(path, size, progress=None, cancelled=None):
+    '''
+    Read an image scaled to size (a QSize in device pixels) and converted to the canvas format. progress(stage) is
+    called as each stage completes, cancelled() is checked between stages. Raises OSError if the file can't be read
+    or is too large, LoadCancelled if cancelled
+    '''
+    QImageReader.setAllocationLimit(ALLOCATION_LIMIT_MB)  # documentation: https://doc.qt.io/qt-6/qimagereader.html#setAllocationLimit
+    reader = QImageReader(path)  # documentation: https://doc.qt.io/qt-6/qimagereader.html
+    reader.setAutoTransform(True)  # apply the EXIF orientation
+    fullSize = reader.size()  # from the header, nothing is decoded yet
+    if not fullSize.isValid():
+        raise OSError(reader.errorString())
+    if fullSize.width() * fullSize.height() > MAX_PIXELS:
+        raise OSError("the image is %d x %d, images over %d megapixels can't be opened"
+                      % (fullSize.width(), fullSize.height(), MAX_PIXELS // 1000000))
+    if progress:
+        progress(1)
+    if cancelled and cancelled():
+        raise LoadCancelled()
+    reader.setScaledSize(size)  # documentation: https://doc.qt.io/qt-6/qimagereader.html#setScaledSize
+    image = reader.read()
+    if image.isNull():
+        raise OSError(reader.errorString())
+    if progress:
+        progress(2)
+    if cancelled and cancelled():
+        raise LoadCancelled()
+    if image.size() != size:  # the plugin couldn't scale while reading
+        image = image.scaled(size, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    image = image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)  # the fast format to paint from
+    if progress:
+        progress(STAGES)
+    return image
+
+
+class LoadTask(QRunnable):  # documentation: https://doc.qt.io/qt-6/qrunnable.html
+    def __init__(self, loader, request, path, size, cancelled):
+        super().__init__()
+        self.loader = loader
+        self.request = request
+        self.path = path
+        self.size = size
+        self.cancelled = cancelled  # a threading.Event, kept by the loader since the pool owns and deletes the task
+
+    def run(self):
+        try:
+            image = readScaled(self.path, self.size, lambda stage: self.loader.progress.emit(self.request, stage),
+                               self.cancelled.is_set)
+        except LoadCancelled:
+            return
+        except Exception as error:
+            self.loader.failed.emit(self.request, self.path, str(error))
+        else:
+            self.loader.loaded.emit(self.request, self.path, image)
+
+
+class ImageLoader(QObject):
+    '''
+    Loads one image at a time in the background. loaded(request, path, image), failed(request, path, error) and
+    progress(request, stage) are emitted for the request number returned by load, only for the latest request
+    '''
+    loaded = pyqtSignal(int, str, QImage)
+    failed = pyqtSignal(int, str, str)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)  # documentation: https://doc.qt.io/qt-6/qthreadpool.html
+        self.pool.setMaxThreadCount(1)
+        self.cancelled = None  # set to cancel the current request
+        self.request = 0
+
+    def load(self, path, size):
+        '''
+        Start loading path scaled to size, any load still running is cancelled. Returns the request number
+        '''
+        self.cancel()
+        self.request += 1
+        self.cancelled = threading.Event()
+        self.pool.start(LoadTask(self, self.request, path, QSize(size), self.cancelled))
+        return self.request
+
+    def cancel(self):
+        if self.cancelled is not None:
+            self.cancelled.set()
+            self.cancelled = None
+
+    def isCurrent(self, request):
+        '''
+        Whether a signal is for the latest request and it hasn't been cancelled
+        '''
+        return self.cancelled is not None and request == self.request
+
+    def finish(self, request):
+        if self.isCurrent(request):
+            self.cancelled = None
+
+    def waitForDone(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
@@ -0,0 +1,206 @@
+# Instrumentation: counters, timing histograms and level gated messages
+#
+# One Metrics object, metrics.metrics, is shared by the game and its helpers. Counters and timing histograms are
+# cheap enough to leave on in the hot paths (a dict update, or a log2 and a list increment). Messages are only
+# formatted when their level is enabled, and they are written as one JSON object per line to stderr, so stdout
+# stays clean and nothing secret (like the word to draw) has to go through it. Parts of the game that keep their own
+# statistics register a source, a function returning a dict of numbers, which is read when the metrics are exported
+# or shown. Everything collected can be exported to a JSON file for offline analysis. There is no Qt dependency
+# here; the live overlay is in overlay.py.
+#
+# Levels:
+#   OFF      nothing is collected
+#   METRICS  counters and histograms only (the default)
+#   INFO     plus game events such as turns
+#   DEBUG    plus per input event detail
+
+import json
+import math
+import sys
+import threading
+import time
+
+OFF, METRICS, INFO, DEBUG = 0, 1, 2, 3
+LEVELS = {"off": OFF, "metrics": METRICS, "info": INFO, "debug": DEBUG}
+
+BUCKETS_PER_OCTAVE = 8  # histogram resolution, a value is reported within about 9% of its true size
+OCTAVES = 32  # 1 us up to about an hour
+
+
+class Histogram:
+    '''
+    Durations counted in log scaled buckets: recording is constant time and memory doesn't grow with the samples
+    '''
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (BUCKETS_PER_OCTAVE * OCTAVES + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def bucket(seconds):
+        micro = seconds * 1e6
+        if micro < 1:
+            return 0
+        return min(int(math.log2(micro) * BUCKETS_PER_OCTAVE) + 1, BUCKETS_PER_OCTAVE * OCTAVES)
+
+    @staticmethod
+    def upperBound(index):
+        return 2 ** (index / BUCKETS_PER_OCTAVE) / 1e6  # seconds
+
+    def record(self, seconds):
+        self.counts[self.bucket(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.upperBound(index), self.max)
+        return self.max
+
+    def copy(self):
+        other = Histogram()
+        other.counts = list(self.counts)
+        other.count, other.total, other.max = self.count, self.total, self.max
+        return other
+
+    def since(self, earlier):
+        '''
+        The samples recorded after earlier, a copy of this histogram taken before. max is the overall max
+        '''
+        other = self.copy()
+        other.counts = [now - then for now, then in zip(self.counts, earlier.counts)]
+        other.count -= earlier.count
+        other.total -= earlier.total
+        return other
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "meanMs": self.total / self.count * 1e3 if self.count else 0.0,
+            "p50Ms": self.percentile(50) * 1e3,
+            "p90Ms": self.percentile(90) * 1e3,
+            "p99Ms": self.percentile(99) * 1e3,
+            "maxMs": self.max * 1e3,
+        }
+
+
+class Timer:
+    '''
+    Context manager recording the time spent in its block in a histogram
+    '''
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    '''
+    Named counters and timing histograms, plus messages written when their level is enabled. Safe to use from worker
+    threads
+    '''
+
+    def __init__(self, level=METRICS, stream=None):
+        self.level = level
+        self.stream = stream  # where messages go, sys.stderr if None
+        self.counters = {}
+        self.histograms = {}
+        self.sources = {}  # name -> function returning a summary dict
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def enabled(self, level):
+        return level <= self.level
+
+    def count(self, name, n=1):
+        if self.level:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, seconds):
+        if self.level:
+            with self.lock:
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram()
+                histogram.record(seconds)
+
+    def addSource(self, name, summary):
+        '''
+        Include summary(), a dict of numbers, under name whenever the metrics are exported or shown
+        '''
+        with self.lock:
+            self.sources[name] = summary
+
+    def summaries(self):
+        with self.lock:
+            sources = dict(self.sources)
+        return {name: summary() for name, summary in sources.items()}
+
+    def timer(self, name):
+        return Timer(self, name)
+
+    def log(self, level, event, **fields):
+        '''
+        Write a message as a line of JSON if level is enabled
+        '''
+        if level > self.level:
+            return
+        fields["event"] = event
+        fields["time"] = round(time.time(), 6)
+        stream = self.stream or sys.stderr
+        stream.write(json.dumps(fields) + "\n")
+
+    def snapshot(self):
+        '''
+        A copy of the counters and histograms, to work out rates and recent percentiles with since()
+        '''
+        with self.lock:
+            return dict(self.counters), {name: histogram.copy() for name, histogram in self.histograms.items()}
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def export(self, path):
+        '''
+        Write everything collected to a JSON file, the raw bucket counts are included so the histograms can be merged
+        or plotted later
+        '''
+        counters, histograms = self.snapshot()
+        report = {
+            "started": self.started,
+            "elapsed": time.time() - self.started,
+            "counters": counters,
+            "histograms": {name: dict(histogram.summary(), buckets={
+                "%.6g" % (Histogram.upperBound(index) * 1e6): count
+                for index, count in enumerate(histogram.counts) if count}) for name, histogram in histograms.items()},
+            "sources": self.summaries(),
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+metrics = Metrics()
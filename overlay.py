@@ -0,0 +1,67 @@
+# Live performance readout for the dock
+#
+# Twice a second the overlay takes a snapshot of the shared metrics and shows the rates and percentiles of what was
+# recorded since the previous snapshot, so the numbers describe the last half second rather than the whole session.
+# The input source (moves per frame, points kept by simplification and input latency over the most recent frames) is
+# shown as it stands.
+# The timer only runs while the overlay is visible.
+
+import time
+
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import QTimer
+
+from metrics import metrics as sharedMetrics
+
+REFRESH_MS = 500
+
+
+class PerfOverlay(QLabel):  # documentation: https://doc.qt.io/qt-6/qlabel.html
+    '''
+    Shows frames per second, input events per second, paint time percentiles and how mouse input was handled
+    '''
+
+    def __init__(self, metrics=None, parent=None):
+        super().__init__(parent)
+        self.metrics = metrics or sharedMetrics
+        self.setStyleSheet("QLabel { background-color: #2c3e50; color: white; font-family: monospace; padding: 4px; }")
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.previous = None
+        self.previousTime = 0.0
+        self.hide()
+
+    def setVisible(self, visible):
+        super().setVisible(visible)
+        if visible:
+            self.previous = self.metrics.snapshot()
+            self.previousTime = time.perf_counter()
+            self.setText("measuring...")
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def refresh(self):
+        now = time.perf_counter()
+        counters, histograms = self.metrics.snapshot()
+        oldCounters, oldHistograms = self.previous
+        elapsed = now - self.previousTime
+        self.previous, self.previousTime = (counters, histograms), now
+
+        paint = histograms.get("paint")
+        if paint is not None and "paint" in oldHistograms:
+            paint = paint.since(oldHistograms["paint"])
+        frames = paint.count if paint is not None else 0
+        events = counters.get("input.events", 0) - oldCounters.get("input.events", 0)
+        lines = ["FPS %6.1f" % (frames / elapsed), "events/s %6.0f" % (events / elapsed)]
+        if frames:
+            lines.append("paint p50 %.2f ms" % (paint.percentile(50) * 1e3))
+            lines.append("paint p99 %.2f ms" % (paint.percentile(99) * 1e3))
+        inputs = self.metrics.summaries().get("input")
+        if inputs and inputs["frames"]:
+            lines.append("moves/frame %.1f" % inputs["movesPerFrame"])
+            lines.append("points kept %.0f%%" % (inputs["keptRatio"] * 100))
+            lines.append("input p50 %.2f ms" % inputs["latencyP50Ms"])
+            lines.append("input p99 %.2f ms" % inputs["latencyP99Ms"])
+        self.setText("\n".join(lines))
@@ -0,0 +1,267 @@
+# Pixel-level canvas operations with NumPy
+#
+# A 32-bit QImage is viewed as a (height, width) uint32 array that shares the image's memory, so whole regions are
+# read and written with array operations instead of a Python call per pixel. NumPy is only needed for these
+# operations; the game imports this module the first time one of them is used.
+#
+# Regions are given as boxes (left, top, right, bottom) in pixels, right and bottom exclusive. The canvas is
+# premultiplied ARGB32: colour channels never exceed alpha, so the operations below keep them that way.
+#
+# Flood fill works on runs rather than pixels: the pixels within the tolerance of the seed colour are found for the
+# whole image at once and split into horizontal runs, then the runs connected to the seed (4-connectivity, runs on
+# neighbouring rows that overlap) are collected with a stack, with a binary search for the first overlapping run.
+# Python only touches one item per run, a blank 4K canvas is a few thousand runs. With a tolerance the mask is
+# computed a band of rows at a time so the temporaries stay in the cache.
+
+from bisect import bisect_right
+
+import numpy as np
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage
+
+BAND_ROWS = 64  # rows of the image processed at a time
+DISCS = {}  # radius -> eraser mask
+
+
+def imageArray(image):
+    '''
+    The pixels of a 32-bit QImage as a (height, width) uint32 array sharing its memory, writing to the array changes
+    the image. The image is detached first if it is shared; it must outlive the array
+    '''
+    pointer = image.bits()  # documentation: https://doc.qt.io/qt-6/qimage.html#bits
+    pointer.setsize(image.sizeInBytes())
+    rows = np.frombuffer(pointer, np.uint32).reshape(image.height(), image.bytesPerLine() // 4)
+    return rows[:, :image.width()]  # lines can be padded
+
+
+def pixelValue(color, format=QImage.Format.Format_ARGB32_Premultiplied):
+    '''
+    The uint32 a colour is stored as in an image of the given format, e.g. premultiplied
+    '''
+    probe = QImage(1, 1, format)
+    probe.fill(color)
+    return int(imageArray(probe)[0, 0])
+
+
+def matchMask(pixels, seed, tolerance, out):
+    '''
+    Set out, a bool array shaped like pixels, to which pixels have every channel within tolerance (0 to 255) of the
+    seed value
+    '''
+    if tolerance <= 0:
+        np.equal(pixels, np.uint32(seed), out=out)
+        return
+    # low <= channel <= low + span as one unsigned comparison per byte, a channel below low wraps around to a large
+    # value; the four results of a pixel are then all true exactly when they read as 0x01010101
+    seedBytes = np.array([seed], np.uint32).view(np.uint8).astype(int)
+    low = np.clip(seedBytes - tolerance, 0, 255)
+    span = np.clip(seedBytes + tolerance, 0, 255) - low
+    lows = np.tile(low.astype(np.uint8), pixels.shape[1])
+    spans = np.tile(span.astype(np.uint8), pixels.shape[1])
+    for band in range(0, pixels.shape[0], BAND_ROWS):
+        inside = pixels[band:band + BAND_ROWS].view(np.uint8) - lows <= spans
+        np.equal(inside.view(np.uint32), 0x01010101, out=out[band:band + BAND_ROWS])
+
+
+def floodFill(pixels, x, y, value, tolerance=0, before=None):
+    '''
+    Fill the region connected to (x, y) whose pixels are within tolerance of the pixel there with value, in place.
+    before(rows, starts, ends) is called with arrays of the runs to be filled (ends exclusive) just before any pixel
+    is written, e.g. to save the tiles under them for undo with runTiles. Returns the bounding box of the filled
+    pixels, or None if nothing changed
+    '''
+    height, width = pixels.shape
+    seed = int(pixels[y, x])
+    if seed == value and tolerance <= 0:
+        return None
+    # runs of matching pixels: with a False column on either side every row has a start and an end for each run,
+    # and the rows can be scanned as one flat array since no run continues across the padding
+    stride = width + 2
+    padded = np.zeros((height, stride), bool)
+    matchMask(pixels, seed, tolerance, padded[:, 1:-1])
+    flat = padded.ravel()
+    edges = np.flatnonzero(flat[1:] != flat[:-1]) + 1  # the first pixel of each run and the one after it
+    runRowArray, startArray = np.divmod(edges[0::2], stride)
+    endArray = edges[1::2] % stride - 1  # exclusive
+    startArray -= 1  # columns of the unpadded image
+    rowStarts = np.searchsorted(runRowArray, np.arange(height + 1)).tolist()  # runs of row r are rowStarts[r]:rowStarts[r + 1]
+    runRows, starts, ends = runRowArray.tolist(), startArray.tolist(), endArray.tolist()
+
+    first = bisect_right(starts, x, rowStarts[y], rowStarts[y + 1]) - 1
+    visited = bytearray(len(starts))
+    visited[first] = 1
+    stack = [first]
+    filled = []
+    while stack:
+        run = stack.pop()
+        filled.append(run)
+        row, start, end = runRows[run], starts[run], ends[run]
+        for neighbour in (row - 1, row + 1):
+            if 0 <= neighbour < height:
+                last = rowStarts[neighbour + 1]
+                other = bisect_right(ends, start, rowStarts[neighbour], last)  # the first run ending after start
+                while other < last and starts[other] < end:
+                    if not visited[other]:
+                        visited[other] = 1
+                        stack.append(other)
+                    other += 1
+
+    filled = np.array(filled)
+    fillRows, fillStarts, fillEnds = runRowArray[filled], startArray[filled], endArray[filled]
+    left, top = int(fillStarts.min()), int(fillRows.min())
+    right, bottom = int(fillEnds.max()), int(fillRows.max()) + 1
+    if before is not None:
+        before(fillRows, fillStarts, fillEnds)
+    # matching runs in the bounding box that aren't connected to the seed
+    others = np.flatnonzero((np.frombuffer(visited, np.uint8) == 0) & (runRowArray >= top) & (runRowArray < bottom)
+                            & (endArray > left) & (startArray < right))
+    if len(others) < len(filled):  # write the matching pixels of the box in one go, once the others are unmarked
+        for run in others.tolist():
+            padded[runRows[run], starts[run] + 1:ends[run] + 1] = False
+        np.copyto(pixels[top:bottom, left:right], np.uint32(value), where=padded[top:bottom, left + 1:right + 1])
+    else:
+        for run in filled.tolist():
+            pixels[runRows[run], starts[run]:ends[run]] = value
+    return left, top, right, bottom
+
+
+def runTiles(rows, starts, ends, size, shape):
+    '''
+    The (column, row) keys of the size x size tiles that runs of pixels touch, and of the ones they cover completely,
+    in an image of shape (height, width) whose tiles along the right and bottom edges are smaller. E.g. the runs
+    floodFill fills
+    '''
+    height, width = shape
+    columns, tileRows = -(-width // size), -(-height // size)
+    rowKeys = rows // size * columns
+
+    def rowCounts(first, last):  # how many rows of each tile are in the tile columns first .. last - 1 of the runs
+        spans = np.maximum(last - first, 0)
+        runs = np.repeat(np.arange(len(spans)), spans)
+        offsets = np.arange(len(runs)) - np.repeat(np.cumsum(spans) - spans, spans)
+        keys = (rowKeys + first)[runs] + offsets
+        return np.bincount(keys, minlength=tileRows * columns).reshape(tileRows, columns)
+
+    def keys(mask):
+        tileRow, column = np.nonzero(mask)
+        return list(zip(column.tolist(), tileRow.tolist()))
+
+    touched = rowCounts(starts // size, (ends - 1) // size + 1)
+    # a run covers the tiles that start and end inside it, and the smaller tile along the right edge if it reaches it
+    covered = rowCounts(-(-starts // size), np.where(ends == width, columns, ends // size))
+    heights = np.minimum(size, height - np.arange(tileRows) * size)
+    return keys(touched > 0), keys(covered == heights[:, None])
+
+
+def region(pixels, box):
+    left, top, right, bottom = box
+    return pixels[max(0, top):bottom, max(0, left):right]
+
+
+def fill(pixels, box, value):
+    '''
+    Set every pixel of the box to value, e.g. pixelValue(Qt.GlobalColor.white) to clear it
+    '''
+    region(pixels, box)[...] = value
+
+
+def disc(radius):
+    '''
+    The (2 * radius + 1) square mask of the pixels within radius of its centre, cached
+    '''
+    mask = DISCS.get(radius)
+    if mask is None:
+        offsets = np.arange(-radius, radius + 1)
+        mask = DISCS[radius] = offsets[:, None] ** 2 + offsets[None, :] ** 2 <= radius * radius
+    return mask
+
+
+def erase(pixels, x, y, radius, value):
+    '''
+    Set the pixels within radius of (x, y) to value, the eraser. Returns the box that changed, None if it is outside
+    '''
+    height, width = pixels.shape
+    left, top = max(0, x - radius), max(0, y - radius)
+    right, bottom = min(width, x + radius + 1), min(height, y + radius + 1)
+    if left >= right or top >= bottom:
+        return None
+    mask = disc(radius)[top - y + radius:bottom - y + radius, left - x + radius:right - x + radius]
+    pixels[top:bottom, left:right][mask] = value
+    return left, top, right, bottom
+
+
+def invert(pixels, box):
+    '''
+    Invert the colours of the box in place, alpha is kept. With premultiplied pixels the inverse of a channel is
+    alpha minus the channel; since no channel exceeds alpha that is one subtraction of the whole pixel from alpha
+    copied into the three colour bytes, without a borrow between them
+    '''
+    area = region(pixels, box)
+    for band in range(0, area.shape[0], BAND_ROWS):
+        rows = area[band:band + BAND_ROWS]
+        if (rows >= np.uint32(0xFF000000)).all():  # opaque, as the canvas nearly always is: 255 - c is c ^ 255
+            np.bitwise_xor(rows, np.uint32(0xFFFFFF), out=rows)
+        else:
+            alpha = rows >> 24
+            rows[...] = (alpha << 24) | (alpha * np.uint32(0x010101) - (rows & np.uint32(0xFFFFFF)))
+
+
+def recolor(pixels, box, old, new, tolerance=0):
+    '''
+    Replace the pixels of the box within tolerance of old with new, returns the number of pixels replaced
+    '''
+    area = region(pixels, box)
+    mask = np.empty(area.shape, bool)
+    matchMask(area, old, tolerance, mask)
+    area[mask] = new
+    return int(np.count_nonzero(mask))
+
+
+def downsample(pixels, factor):
+    '''
+    A new array a factor smaller in each direction, each pixel the average of a factor x factor block: a box filter,
+    which for premultiplied pixels is the correct average. Edge pixels that don't fill a block are dropped. Qt's
+    smooth scaling averages the same areas (to within one level of rounding) several times faster than summing the
+    blocks with NumPy, so the array is scaled as a QImage
+    '''
+    height, width = pixels.shape[0] // factor, pixels.shape[1] // factor
+    pixels = np.ascontiguousarray(pixels)
+    image = QImage(pixels.data, width * factor, height * factor, pixels.strides[0],
+                   QImage.Format.Format_ARGB32_Premultiplied)  # the blocks, without a copy
+    scaled = image.scaled(width, height, Qt.AspectRatioMode.IgnoreAspectRatio,
+                          Qt.TransformationMode.SmoothTransformation)
+    return imageArray(scaled).copy()  # the array outlives the scaled image
+
+
+def arrayImage(pixels, format=QImage.Format.Format_ARGB32_Premultiplied):
+    '''
+    A QImage with its own copy of a (height, width) uint32 array, e.g. to save or show the result of downsample
+    '''
+    pixels = np.ascontiguousarray(pixels)
+    height, width = pixels.shape
+    return QImage(pixels.data, width, height, width * 4, format).copy()  # the copy owns its memory
+
+
+def difference(first, second):
+    '''
+    Compare two canvases of the same size: the number of pixels that differ and the box around them (None if they
+    are the same)
+    '''
+    rows = np.flatnonzero(rowsDiffer(first, second))
+    if not len(rows):
+        return 0, None
+    changed = first[rows[0]:rows[-1] + 1] != second[rows[0]:rows[-1] + 1]  # pixel by pixel only where rows differ
+    columns = np.flatnonzero(changed.any(axis=0))
+    return int(np.count_nonzero(changed)), (int(columns[0]), int(rows[0]), int(columns[-1]) + 1, int(rows[-1]) + 1)
+
+
+def rowsDiffer(first, second):
+    '''
+    Which rows of two arrays differ, compared eight bytes at a time where the rows allow it
+    '''
+    if first.shape[1] % 2 == 0 and first.flags.c_contiguous and second.flags.c_contiguous:
+        first, second = first.view(np.uint64), second.view(np.uint64)
+    differ = np.empty(first.shape[0], bool)
+    for band in range(0, first.shape[0], BAND_ROWS):
+        np.any(first[band:band + BAND_ROWS] != second[band:band + BAND_ROWS], axis=1, out=differ[band:band + BAND_ROWS])
+    return differ
@@ -0,0 +1,114 @@
+# Session recording
+#
+# Everything a player does that changes the canvas or the game (mouse input, frame flushes, window resizes, pen
+# changes, menu and button actions, word mode changes and strokes received from a drawer) is written to an
+# append-only log, one JSON object per line, timestamped in seconds from the start of the session. Each session starts
+# with a header holding the seed of the word RNG, the window geometry and the game's configuration (mode, players,
+# teams and points table), and ends with a digest of the final canvas, so replay.py can feed the log back through the
+# same handlers and check that it produces the same pixels.
+#
+#   {"type": "session", "version": 1, "seed": 1234, "width": 800, "height": 600, "ratio": 1.0, "mode": "easy",
+#    "players": 2, "names": ["Player 1", "Player 2"], "teams": null, "scoring": {"easy": [2, 1], "hard": [3, 2]}}
+#   {"t": 0.52, "type": "press", "x": 100, "y": 120, "button": 1}
+#   {"t": 0.53, "type": "move", "x": 102, "y": 121}
+#   {"t": 0.54, "type": "frame"}
+#   ...
+#   {"t": 9.81, "type": "end", "digest": "<sha256 of the canvas pixels>", "width": 1024, "height": 768}
+#
+# Events are buffered and written in batches, a batch is written once it holds BUFFER_EVENTS events or FLUSH_SECONDS
+# after the previous one, so a crash loses at most that much and recording never does a write per mouse move.
+
+import hashlib
+import json
+import time
+
+from PyQt6.QtGui import QImage
+
+from metrics import metrics
+
+FORMAT_VERSION = 1
+BUFFER_EVENTS = 512
+FLUSH_SECONDS = 1.0
+
+
+class SessionRecorder:
+    '''
+    Appends the events of one session to a log file
+    '''
+
+    def __init__(self, path, clock=time.perf_counter):
+        self.path = path
+        self.clock = clock
+        self.file = open(path, "a", encoding="utf-8")
+        self.buffer = []
+        self.started = clock()
+        self.lastFlush = self.started
+        self.events = 0
+
+    def start(self, seed, **info):
+        '''
+        Write the session header, info holds what replay needs to rebuild the window
+        '''
+        header = {"type": "session", "version": FORMAT_VERSION, "seed": seed}
+        header.update(info)
+        self.buffer.append(json.dumps(header))
+        self.flush()
+
+    def record(self, kind, **fields):
+        now = self.clock()
+        fields["t"] = round(now - self.started, 6)
+        fields["type"] = kind
+        self.buffer.append(json.dumps(fields, separators=(",", ":")))
+        self.events += 1
+        if len(self.buffer) >= BUFFER_EVENTS or now - self.lastFlush >= FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            with metrics.timer("io.record"):
+                self.file.write("\n".join(self.buffer) + "\n")
+                self.file.flush()
+            self.buffer.clear()
+        self.lastFlush = self.clock()
+
+    def close(self, **fields):
+        '''
+        Write the end of the session, e.g. with the digest of the final canvas, and close the file
+        '''
+        if self.file.closed:
+            return
+        self.record("end", **fields)
+        self.flush()
+        self.file.close()
+
+
+def readSessions(path):
+    '''
+    Return the sessions in a log as a list of (header, events). A session cut short by a crash has no end event
+    '''
+    sessions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:  # a line cut short by a crash
+                continue
+            if event.get("type") == "session":
+                sessions.append((event, []))
+            elif sessions:
+                sessions[-1][1].append(event)
+    return sessions
+
+
+def canvasDigest(canvas):
+    '''
+    sha256 of the canvas size and pixels, independent of how the canvas (a QImage or QPixmap) is stored
+    '''
+    image = canvas.toImage() if hasattr(canvas, "toImage") else canvas
+    image = image.convertToFormat(QImage.Format.Format_ARGB32)  # documentation: https://doc.qt.io/qt-6/qimage.html#convertToFormat
+    digest = hashlib.sha256(b"%dx%d:" % (image.width(), image.height()))
+    digest.update(image.constBits().asstring(image.sizeInBytes()))
+    return digest.hexdigest()
@@ -0,0 +1,128 @@
+# Connects the game window to a stroke server (see server.py)
+#
+# The asyncio client runs on its own thread with its own event loop so the Qt event loop is never blocked by the
+# network. Messages to send are handed to that loop with call_soon_threadsafe, and frames received for a guesser
+# and guesses received for a drawer are delivered back to the GUI thread through queued Qt signals.
+#
+# Changes to the drawer's canvas that aren't strokes (undo, redo, cut, paste, fill, invert, open) are sent as the
+# pixels of the rectangle they changed, cut into SYNC_TILE tiles that are compressed on the network thread.
+
+import asyncio
+import base64
+import threading
+import zlib
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from autosave import imageBytes, bytesImage
+from server import StrokeClient
+
+SYNC_TILE = 256  # device pixels, a compressed tile stays well under the server's line limit
+COMPRESSION = 1
+
+
+def decodeTile(event):
+    '''
+    The QImage of a tile message, in device pixels. Raises ValueError if its data isn't the pixels it says it has
+    '''
+    width, height = event["pixels"]
+    try:
+        data = zlib.decompress(base64.b64decode(event["data"]))
+    except zlib.error as error:
+        raise ValueError("tile data doesn't decompress") from error
+    if not (isinstance(width, int) and isinstance(height, int) and width > 0 and height > 0
+            and len(data) == width * height * 4):
+        raise ValueError("tile data doesn't match its size")
+    return bytesImage(data, width, height)
+
+
+class RemoteSession(QObject):
+    '''
+    A drawer or guesser connection to a room on a stroke server
+    '''
+    framesReceived = pyqtSignal(list)  # the events of one frame tick, guessers only
+    guessesReceived = pyqtSignal(list)  # the guesses typed during one frame tick, drawers only
+    disconnected = pyqtSignal(str)
+
+    def __init__(self, host, port, room, role, parent=None):
+        super().__init__(parent)
+        self.host = host
+        self.port = port
+        self.room = room
+        self.role = role
+        self.client = StrokeClient()
+        self.loop = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="stroke-client", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self.session())
+        finally:
+            self.loop.close()
+
+    async def session(self):
+        try:
+            await self.client.connect(self.host, self.port, self.room, self.role)
+            self.ready.set()
+            if self.role == "guesser":
+                async for events in self.client.frames():
+                    self.framesReceived.emit(events)
+                self.disconnected.emit("connection closed")
+            else:
+                async for guesses in self.client.guessBatches():
+                    self.guessesReceived.emit(guesses)
+                self.disconnected.emit("connection closed")
+        except (OSError, ConnectionError) as error:
+            self.disconnected.emit(str(error))
+        finally:
+            self.ready.set()
+
+    def call(self, method, *args):
+        '''
+        Run a StrokeClient method on the network thread, dropped if the session isn't connected
+        '''
+        if self.loop is not None and self.client.writer is not None:
+            try:
+                self.loop.call_soon_threadsafe(method, *args)
+            except RuntimeError:  # the loop closed after the connection was lost
+                pass
+
+    def beginStroke(self, color, width, x, y, tip=None):
+        self.call(self.client.beginStroke, color, width, x, y, tip)
+
+    def addPoints(self, points):
+        self.call(self.client.addPoints, points)
+
+    def endStroke(self):
+        self.call(self.client.endStroke)
+
+    def clear(self):
+        self.call(self.client.clear)
+
+    def guess(self, text):
+        self.call(self.client.guess, text)
+
+    def sendCanvas(self, image, rect):
+        '''
+        Send the pixels of rect (device pixels) of the canvas to the guessers
+        '''
+        rect = rect.intersected(image.rect())
+        if not rect.isEmpty():  # the copy is taken now, it is compressed on the network thread
+            self.call(self.sendTiles, image.copy(rect), rect.left(), rect.top(), image.devicePixelRatio())
+
+    def sendTiles(self, image, left, top, ratio):
+        for y in range(0, image.height(), SYNC_TILE):
+            for x in range(0, image.width(), SYNC_TILE):
+                tile = image.copy(x, y, min(SYNC_TILE, image.width() - x), min(SYNC_TILE, image.height() - y))
+                data = base64.b64encode(zlib.compress(imageBytes(tile), COMPRESSION)).decode("ascii")
+                self.client.sendTile((left + x) / ratio, (top + y) / ratio, tile.width() / ratio, tile.height() / ratio,
+                                     tile.width(), tile.height(), data)
+
+    def close(self):
+        if self.client.writer is not None:
+            self.call(self.client.writer.close)
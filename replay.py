@@ -0,0 +1,166 @@
+# Replay a recorded session (see recorder.py) through the game's own handlers
+#
+# The window is rebuilt with the recorded seed, size, mode, players, teams and points table, and every event is fed
+# to the handler that recorded it.
+# The game's frame and resize timers are disconnected so that moves are grouped into frames and the canvas grows
+# exactly when the recording says, which keeps the replay independent of how fast it runs. At the end the canvas
+# digest is compared with the recorded one.
+#
+# Pasting reads the system clipboard, a session that pastes something copied from another application only replays
+# exactly if the clipboard holds the same image. Likewise opened images are read again from their recorded path.
+#
+# Usage:
+#   python replay.py session.log [--session -1] [--realtime] [--output final.png]
+#
+# Without --realtime the events are replayed as fast as possible. The exit status is 1 if the final canvas differs.
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")  # headless unless a platform is asked for
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QMouseEvent, QColor
+from PyQt6.QtCore import Qt, QEvent, QPointF, QSize
+
+from recorder import readSessions, canvasDigest
+from loader import readScaled
+
+
+class SessionReplayer:
+    '''
+    Feeds the events of a recorded session to a game window
+    '''
+
+    def __init__(self, app, window, events):
+        self.app = app
+        self.window = window
+        self.events = events
+        self.buttons = Qt.MouseButton.NoButton
+        self.result = None  # (recorded digest, replayed digest) once the end event is reached
+        # the recording decides when frames are drawn and the canvas grows
+        window.frameTimer.timeout.disconnect()
+        window.resizeTimer.timeout.disconnect()
+
+    def run(self, realtime=False):
+        started = time.perf_counter()
+        for event in self.events:
+            if realtime:
+                while time.perf_counter() - started < event["t"]:
+                    self.app.processEvents()
+                    time.sleep(0.001)
+            self.apply(event)
+            self.app.processEvents()
+        return time.perf_counter() - started
+
+    def mouseEvent(self, kind, event, button=Qt.MouseButton.NoButton):
+        point = QPointF(event["x"], event["y"])
+        return QMouseEvent(kind, point, point, button, self.buttons, Qt.KeyboardModifier.NoModifier)
+
+    def apply(self, event):
+        window = self.window
+        kind = event["type"]
+        if kind in ("press", "move"):
+            window.tabletPressure = event.get("pressure")  # only recorded when drawing with a tablet
+        if kind == "press":
+            button = Qt.MouseButton(event["button"])
+            self.buttons |= button
+            window.mousePressEvent(self.mouseEvent(QEvent.Type.MouseButtonPress, event, button))
+        elif kind == "move":
+            window.mouseMoveEvent(self.mouseEvent(QEvent.Type.MouseMove, event))
+        elif kind == "release":
+            button = Qt.MouseButton(event["button"])
+            self.buttons &= ~button
+            window.mouseReleaseEvent(self.mouseEvent(QEvent.Type.MouseButtonRelease, event, button))
+        elif kind == "frame":
+            window.flushMoves()
+        elif kind == "resize":
+            window.resize(event["width"], event["height"])
+        elif kind == "grow":
+            window.resizeTimer.stop()
+            window.growCanvas()
+        elif kind == "pen":
+            window.brushColor = QColor.fromRgba(event["color"])
+            window.brushSize = event["size"]
+            window.updatePen()
+        elif kind == "mode":
+            window.selectMode.blockSignals(True)  # chooseMode is called once below, not again by the signal
+            window.selectMode.setCurrentText(event["mode"])
+            window.selectMode.blockSignals(False)
+            window.chooseMode()
+        elif kind == "action":
+            getattr(window, event["name"])()
+        elif kind == "opened":  # decoded here on the GUI thread, at the size it was shown
+            window.showImage(readScaled(event["path"], QSize(event["width"], event["height"])))
+        elif kind == "remote":
+            window.drawRemote(event["events"])
+        elif kind == "guess":
+            window.checkGuess(event["text"])
+        elif kind == "end":
+            window.endStroke()
+            self.result = (event.get("digest"), canvasDigest(window.image))
+
+
+def configure(window, header):
+    '''
+    Give the game the mode, player names and points table it was recorded with, older recordings keep the defaults
+    '''
+    engine = window.engine
+    if header.get("names"):
+        engine.names = header["names"]
+    if header.get("scoring"):
+        engine.scoring = {key: tuple(points) for key, points in header["scoring"].items()}
+    if "mode" in header:
+        try:
+            window.getList(header["mode"])
+        except OSError as error:
+            sys.exit("the recorded mode %r can't be replayed: %s" % (header["mode"], error))
+        window.selectMode.blockSignals(True)  # the mode is set without drawing a word, as when the game started
+        window.selectMode.setCurrentText(header["mode"])
+        window.selectMode.blockSignals(False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded Pictionary session")
+    parser.add_argument("log")
+    parser.add_argument("--session", type=int, default=-1, help="index of the session in the log, the last by default")
+    parser.add_argument("--realtime", action="store_true", help="keep the recorded timing instead of going flat out")
+    parser.add_argument("--output", help="save the final canvas to this file")
+    args, qtArgs = parser.parse_known_args(argv)
+
+    sessions = readSessions(args.log)
+    if not sessions:
+        sys.exit("no sessions in " + args.log)
+    header, events = sessions[args.session]
+
+    app = QApplication(sys.argv[:1] + qtArgs)
+    from PictionaryGame import PictionaryGame
+
+    window = PictionaryGame(seed=header["seed"], players=header.get("players", 2), teams=header.get("teams"))
+    configure(window, header)
+    window.resize(header["width"], header["height"])
+    if window.devicePixelRatio() != header.get("ratio", 1.0):
+        print("warning: recorded at device pixel ratio %s, replaying at %s" % (header.get("ratio"), window.devicePixelRatio()))
+    replayer = SessionReplayer(app, window, events)
+    window.show()
+    app.processEvents()
+    elapsed = replayer.run(args.realtime)
+    window.endStroke()
+
+    print("%d events replayed in %.3f s (%.0f events/s), recording is %.3f s long"
+          % (len(events), elapsed, len(events) / elapsed if elapsed else 0, events[-1]["t"] if events else 0))
+    if args.output:
+        window.image.save(args.output)
+    if replayer.result is None:
+        print("the recording has no end event (the session did not close cleanly), nothing to compare")
+    elif replayer.result[0] == replayer.result[1]:
+        print("final canvas matches the recording")
+    else:
+        print("final canvas DIFFERS from the recording")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Saving images off the GUI thread
+#
+# The canvas is snapshotted as a QImage on the GUI thread (implicitly shared, so this is cheap and later drawing does
+# not affect it) and then encoded and written by a small thread pool. The file is written next to its destination
+# under a temporary name and renamed into place, so a crash or a failed encode never leaves a half-written image
+# behind. Completion and failure are reported with signals, which are delivered on the GUI thread.
+
+import os
+import tempfile
+import threading
+import time
+
+from PyQt6.QtGui import QImageWriter
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from metrics import metrics
+
+SAVE_THREADS = 2  # encoding is CPU bound, a couple of threads is enough to keep saves from queueing
+
+
+class SaveOptions:
+    '''
+    Encoder settings: format (e.g. "png", "jpg", None to use the file extension), quality from 0 to 100 for lossy
+    formats and compression level from 0 to 9 for PNG, -1 leaves the encoder default
+    '''
+    __slots__ = ("format", "quality", "compression")
+
+    def __init__(self, format=None, quality=-1, compression=-1):
+        self.format = format
+        self.quality = quality
+        self.compression = compression
+
+    def formatFor(self, path):
+        if self.format:
+            return self.format
+        extension = os.path.splitext(path)[1].lstrip(".").lower()
+        return extension or "png"
+
+
+def writeImage(image, path, options):
+    '''
+    Encode a QImage to a temporary file next to path and atomically rename it into place. Safe to call from any
+    thread, raises OSError if the image can't be written
+    '''
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    tempPath = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tempPath = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+        os.close(fd)
+        writer = QImageWriter(tempPath, options.formatFor(path).encode())  # documentation: https://doc.qt.io/qt-6/qimagewriter.html
+        writer.setQuality(options.quality)
+        writer.setCompression(options.compression)
+        if not writer.write(image):
+            raise OSError(writer.errorString())
+        os.replace(tempPath, path)  # atomic on the same file system
+        tempPath = None
+    finally:
+        if tempPath is not None and os.path.exists(tempPath):
+            os.remove(tempPath)
+
+
+class SaveTask(QRunnable):  # documentation: https://doc.qt.io/qt-6/qrunnable.html
+    '''
+    Encode one image to a temporary file and atomically rename it to its destination
+    '''
+
+    def __init__(self, saver, image, path, options):
+        super().__init__()
+        self.saver = saver
+        self.image = image
+        self.path = path
+        self.options = options
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            writeImage(self.image, self.path, self.options)
+        except Exception as error:
+            self.saver.failed.emit(self.path, str(error))
+        else:
+            metrics.record("io.save.write", time.perf_counter() - start)
+            self.saver.saved.emit(self.path)
+        finally:
+            self.saver.finishedTask()
+
+
+class ImageSaver(QObject):
+    '''
+    Queue images to be written in the background, saved(path) or failed(path, error) is emitted for each one
+    '''
+    saved = pyqtSignal(str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None, threads=SAVE_THREADS):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)  # documentation: https://doc.qt.io/qt-6/qthreadpool.html
+        self.pool.setMaxThreadCount(threads)
+        self.pending = 0  # saves queued or in progress, updated from the worker threads under the lock
+        self.lock = threading.Lock()
+
+    def save(self, image, path, options=None):
+        '''
+        Save an image in the background. image should be a QImage, a QPixmap is converted on the calling thread
+        since pixmaps can't be used from other threads
+        '''
+        if hasattr(image, "toImage"):
+            image = image.toImage()  # documentation: https://doc.qt.io/qt-6/qpixmap.html#toImage
+        with self.lock:
+            self.pending += 1
+        self.pool.start(SaveTask(self, image, path, options or SaveOptions()))
+
+    def finishedTask(self):
+        with self.lock:
+            self.pending -= 1
+
+    def busy(self):
+        return self.pending > 0
+
+    def waitForDone(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
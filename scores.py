@@ -0,0 +1,269 @@
+# Persistent scores and leaderboard
+#
+# Every scored round is appended to a log, one JSON object per line, with the points each player gained:
+#
+#   {"round": 1, "match": 1, "mode": "easy", "drawer": "Player 1", "points": {"Player 1": 2, "Player 2": 1}}
+#   {"round": 2, "match": 1, "mode": "hard", "drawer": "Player 2", "points": {"Player 1": 2, "Player 2": 3},
+#    "teams": {"Player 1": "red", "Player 2": "blue"}}
+#
+# The log is never rewritten. Every SNAPSHOT_ROUNDS rounds the leaderboard is written to <log>.snapshot together
+# with the length of the log it covers, and opening a score board loads the snapshot and replays only the rounds
+# after it, so startup time doesn't grow with the history.
+#
+# The leaderboard keeps players (and teams) in a list sorted by total score which is updated as each round is
+# recorded, so the top K is a slice and a player's rank a binary search. Each player's most recent HISTORY_LENGTH
+# rounds are kept in memory; the full history of a player is in the log and can be read with fullHistory.
+#
+# Show the leaderboard of a log with (the log and its snapshot are only read, so this is safe while a game is running):
+#   python scores.py scores.log [--top 10] [--player "Player 1"] [--teams]
+
+import argparse
+import bisect
+from collections import deque
+import json
+import os
+import sys
+import tempfile
+
+SCORE_LOG = "scores.log"
+SNAPSHOT_ROUNDS = 5000  # rounds between snapshots
+HISTORY_LENGTH = 64  # recent rounds kept per player for history queries
+FORMAT_VERSION = 1
+
+
+class Ranking:
+    '''
+    Totals by name kept in descending order of score, ties in order of name
+    '''
+
+    def __init__(self):
+        self.totals = {}
+        self.rounds = {}  # name -> rounds played
+        self.order = []  # (-total, name), ascending so the leader comes first
+
+    def add(self, name, points, rounds=1):
+        total = self.totals.get(name)
+        if total is not None:
+            del self.order[bisect.bisect_left(self.order, (-total, name))]
+        else:
+            total = 0
+        total += points
+        self.totals[name] = total
+        self.rounds[name] = self.rounds.get(name, 0) + rounds
+        bisect.insort(self.order, (-total, name))
+
+    def top(self, k):
+        '''
+        The k highest (name, total, rounds)
+        '''
+        return [(name, -negated, self.rounds[name]) for negated, name in self.order[:k]]
+
+    def rank(self, name):
+        '''
+        1 for the leader, None for a name that hasn't scored
+        '''
+        total = self.totals.get(name)
+        if total is None:
+            return None
+        return bisect.bisect_left(self.order, (-total, name)) + 1
+
+    def state(self):
+        return {name: [total, self.rounds[name]] for name, total in self.totals.items()}
+
+    def load(self, state):
+        self.totals = {name: total for name, (total, _) in state.items()}
+        self.rounds = {name: rounds for name, (_, rounds) in state.items()}
+        self.order = sorted((-total, name) for name, total in self.totals.items())
+
+
+class ScoreBoard:
+    '''
+    The score log of every game played and the leaderboard built from it. A read only board never writes the log or
+    the snapshot and can't record rounds
+    '''
+
+    def __init__(self, path=SCORE_LOG, snapshotRounds=SNAPSHOT_ROUNDS, readOnly=False):
+        self.path = path
+        self.snapshotPath = path + ".snapshot"
+        self.snapshotRounds = snapshotRounds
+        self.readOnly = readOnly
+        self.reset()
+        self.replayed = 0  # rounds read from the log rather than the snapshot when it was opened
+        self.file = None
+        self.load()
+
+    def load(self):
+        offset = self.loadSnapshot()
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if offset > size:  # the log isn't the one the snapshot was taken of
+            self.reset()
+            offset = 0
+        if size > offset:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                tail = f.read()
+            end = tail.rfind(b"\n") + 1
+            for line in tail[:end].splitlines():
+                if line.strip():
+                    self.apply(json.loads(line))
+                    self.replayed += 1
+            if end < len(tail) and not self.readOnly:
+                # a line cut short by a crash, dropped so the next round starts on a line of its own
+                with open(self.path, "r+b") as f:
+                    f.truncate(offset + end)
+        if not self.readOnly:
+            self.file = open(self.path, "a", encoding="utf-8")
+        self.lastSnapshot = self.round - self.replayed
+
+    def reset(self):
+        self.players = Ranking()
+        self.teams = Ranking()
+        self.history = {}  # player -> deque of (round, match, points, total)
+        self.round = 0
+        self.match = 0
+
+    def loadSnapshot(self):
+        '''
+        Restore the leaderboard from the snapshot, returns the length of the log it covers (0 without one)
+        '''
+        try:
+            with open(self.snapshotPath, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if snapshot.get("version") != FORMAT_VERSION:
+            return 0
+        self.round = snapshot["round"]
+        self.match = snapshot["match"]
+        self.players.load(snapshot["players"])
+        self.teams.load(snapshot["teams"])
+        self.history = {name: deque(zip(*[iter(entries)] * 4), HISTORY_LENGTH)  # stored flat, 4 values a round
+                        for name, entries in snapshot["history"].items()}
+        return snapshot["offset"]
+
+    def apply(self, event):
+        self.round = event["round"]
+        self.match = max(self.match, event["match"])
+        teams = event.get("teams", {})
+        for name, points in event["points"].items():
+            self.players.add(name, points)
+            history = self.history.get(name)
+            if history is None:
+                history = self.history[name] = deque(maxlen=HISTORY_LENGTH)
+            history.append((event["round"], event["match"], points, self.players.totals[name]))
+        for team in set(teams.values()):
+            self.teams.add(team, sum(points for name, points in event["points"].items() if teams.get(name) == team))
+
+    def startMatch(self):
+        '''
+        Number the rounds recorded from now on as a new match, returns its number
+        '''
+        self.match += 1
+        return self.match
+
+    def record(self, points, mode=None, drawer=None, teams=None):
+        '''
+        Append a scored round, points maps each player to the points gained and teams each player to a team.
+        Returns the round number
+        '''
+        if self.readOnly:
+            raise ValueError("the score board of " + self.path + " is read only")
+        if self.match == 0:
+            self.startMatch()
+        event = {"round": self.round + 1, "match": self.match, "mode": mode, "drawer": drawer, "points": points}
+        if teams:
+            event["teams"] = teams
+        self.file.write(json.dumps(event, separators=(",", ":")) + "\n")
+        self.file.flush()
+        self.apply(event)
+        if self.round - self.lastSnapshot >= self.snapshotRounds:
+            self.snapshot()
+        return self.round
+
+    def snapshot(self):
+        '''
+        Write the leaderboard and the length of the log it covers, atomically
+        '''
+        self.file.flush()
+        snapshot = {"version": FORMAT_VERSION, "offset": os.fstat(self.file.fileno()).st_size, "round": self.round, "match": self.match,
+                    "players": self.players.state(), "teams": self.teams.state(),
+                    "history": {name: [value for entry in entries for value in entry]
+                                for name, entries in self.history.items()}}
+        directory = os.path.dirname(os.path.abspath(self.snapshotPath))
+        fd, tempPath = tempfile.mkstemp(prefix=".scores.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tempPath, self.snapshotPath)  # atomic on the same file system
+        except BaseException:
+            os.remove(tempPath)
+            raise
+        self.lastSnapshot = self.round
+
+    def top(self, k=10, teams=False):
+        '''
+        The k best players (or teams) as (name, total, rounds)
+        '''
+        return (self.teams if teams else self.players).top(k)
+
+    def rank(self, name, teams=False):
+        return (self.teams if teams else self.players).rank(name)
+
+    def recent(self, name, limit=HISTORY_LENGTH):
+        '''
+        A player's last rounds, oldest first, as (round, match, points, total after the round)
+        '''
+        history = self.history.get(name, ())
+        return list(history)[-limit:]
+
+    def fullHistory(self, name):
+        '''
+        Every round of a player read from the log, as recent() but not limited to the rounds kept in memory
+        '''
+        if self.file is not None:
+            self.file.flush()
+        entries = []
+        total = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):  # cut short by a crash, a read only board leaves it in the log
+                    break
+                if name not in line:  # cheap filter before parsing
+                    continue
+                event = json.loads(line)
+                points = event["points"].get(name)
+                if points is not None:
+                    total += points
+                    entries.append((event["round"], event["match"], points, total))
+        return entries
+
+    def close(self):
+        if self.file is not None and not self.file.closed:
+            if self.round > self.lastSnapshot:
+                self.snapshot()
+            self.file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the leaderboard of a score log")
+    parser.add_argument("log", nargs="?", default=SCORE_LOG)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--teams", action="store_true", help="rank the teams rather than the players")
+    parser.add_argument("--player", help="show the history of a player")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.log):
+        sys.exit("no score log at " + args.log)
+
+    board = ScoreBoard(args.log, readOnly=True)
+    print("%d rounds in %d matches" % (board.round, board.match))
+    if args.player:
+        for round, match, points, total in board.fullHistory(args.player):
+            print("round %7d  match %5d  %+4d  %7d" % (round, match, points, total))
+    else:
+        for rank, (name, total, rounds) in enumerate(board.top(args.top, args.teams), 1):
+            print("%4d  %-24s %8d  (%d rounds)" % (rank, name, total, rounds))
+    board.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+# Multi-room stroke server
+#
+# One asyncio process hosts any number of rooms. Each room has one drawer, whose strokes are streamed live to any
+# number of guessers. Clients talk to the server over plain TCP with one JSON message per line:
+#
+#   {"type": "join", "room": "name", "role": "drawer" | "guesser"}          first message from every client
+#   {"type": "begin", "stroke": id, "color": argb, "width": w, "x": x, "y": y, "t": sent}   drawer starts a stroke,
+#     with "tip": [shape, hardness] if it is drawn with a brush rather than the pen (see brushes.py)
+#   {"type": "points", "stroke": id, "points": [x0, y0, x1, y1, ...], "t": sent}           drawer extends it
+#   {"type": "end", "stroke": id}                                           drawer finishes it
+#   {"type": "clear"}                                                       drawer clears the canvas
+#   {"type": "tile", "x": x, "y": y, "width": w, "height": h, "pixels": [pw, ph], "data": base64}
+#     drawer replaces a rectangle of the canvas after a change that isn't a stroke (undo, paste, fill, open...):
+#     pw x ph premultiplied ARGB32 pixels, zlib compressed, drawn over the rectangle in canvas coordinates
+#   {"type": "guess", "text": guess}                                        guesser types a guess
+#   {"type": "stats"}                                                       any client, answered with server stats
+#
+# The server doesn't forward drawer messages one by one. They are collected per room and sent to the guessers
+# once per frame tick as {"type": "frame", "events": [...]}, and the frame is encoded once for every guesser that
+# is keeping up. A guesser whose socket buffer is over the high water mark gets nothing new written. Its events
+# are kept in a backlog instead: consecutive points of a stroke are merged, and once the backlog holds too many
+# points the intermediate ones are thinned out. A clear drops everything before it, and a tile drops any older tile
+# of the same rectangle. A slow client therefore sees a coarser version of the drawing. The server doesn't keep the
+# canvas, so a backlog can't be collapsed into it: a guesser whose backlog still grows past MAX_BACKLOG_BYTES (tiles,
+# or the begin and end of many strokes) is disconnected, and rejoining gets it a fresh start.
+#
+# Messages that aren't JSON objects, drawer events without the fields listed above and joins whose room or role
+# isn't a string are treated as a broken client, which is disconnected; the other rooms carry on.
+#
+# Guesses go the other way: those typed in a room during a tick reach its drawer together as
+# {"type": "guesses", "guesses": [text, ...]}, in the order they arrived, and the drawer's game checks them against
+# the word (see guesses.py). Guesses longer than MAX_GUESS_LENGTH are cut short.
+#
+# Usage:
+#   python server.py [--host 127.0.0.1] [--port 8765]
+
+import argparse
+import asyncio
+import json
+import time
+
+FRAME_INTERVAL = 1 / 60  # seconds between batches sent to the guessers
+HIGH_WATER = 64 * 1024  # bytes waiting in a guesser's socket before it counts as slow
+MAX_BACKLOG_POINTS = 2048  # points kept for a slow guesser before intermediate points are dropped
+MAX_BACKLOG_BYTES = 4 * 1024 * 1024  # about this much queued for a slow guesser and it is disconnected
+EVENT_BYTES = 64  # what an event takes in a frame besides its points or tile data, roughly
+LINE_LIMIT = 1024 * 1024  # longest message accepted
+MAX_GUESS_LENGTH = 100  # characters of a guess passed on to the drawer
+
+
+def encode(message):
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+def isNumber(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def isNumbers(values, count=None):
+    return isinstance(values, list) and (count is None or len(values) == count) and all(map(isNumber, values))
+
+
+def checkEvent(event):
+    '''
+    Raise ValueError unless a drawer event has the fields its type needs, so nothing later has to check them
+    '''
+    kind = event["type"]
+    if kind == "begin":
+        valid = (all(isNumber(event.get(key)) for key in ("stroke", "color", "width", "x", "y"))
+                 and ("tip" not in event or (isinstance(event["tip"], list) and len(event["tip"]) == 2
+                                             and isinstance(event["tip"][0], str) and isNumber(event["tip"][1]))))
+    elif kind == "points":
+        valid = isNumber(event.get("stroke")) and isNumbers(event.get("points")) and len(event["points"]) % 2 == 0
+    elif kind == "end":
+        valid = isNumber(event.get("stroke"))
+    elif kind == "tile":
+        valid = (all(isNumber(event.get(key)) for key in ("x", "y", "width", "height"))
+                 and isNumbers(event.get("pixels"), 2) and isinstance(event.get("data"), str))
+    else:  # clear
+        valid = True
+    if not valid:
+        raise ValueError("malformed %s event" % kind)
+
+
+def eventBytes(event):
+    '''
+    About how many bytes an event takes in a frame, for the backlog limit
+    '''
+    kind = event["type"]
+    if kind == "points":
+        return EVENT_BYTES + 8 * len(event["points"])
+    if kind == "tile":
+        return EVENT_BYTES + len(event["data"])
+    return EVENT_BYTES
+
+
+class Subscriber:
+    '''
+    A guesser connected to a room, with the events it hasn't been sent yet while it is slow
+    '''
+    __slots__ = ("writer", "backlog", "backlogPoints", "backlogBytes", "dropped")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.backlog = []
+        self.backlogPoints = 0
+        self.backlogBytes = 0
+        self.dropped = 0  # points thinned out of the backlog so far
+
+    def slow(self):
+        return self.writer.transport.get_write_buffer_size() > HIGH_WATER
+
+    def queue(self, events):
+        '''
+        Add events to the backlog, merging points of the same stroke and thinning them out if there are too many.
+        Returns False if the backlog is over MAX_BACKLOG_BYTES even so
+        '''
+        backlog = self.backlog
+        for event in events:
+            kind = event["type"]
+            self.backlogBytes += eventBytes(event)
+            if kind == "clear":  # nothing before a clear needs to be shown any more
+                backlog.clear()
+                self.backlogPoints = 0
+                self.backlogBytes = EVENT_BYTES
+            elif kind == "tile":  # the newer pixels replace the older ones completely
+                area = (event["x"], event["y"], event["width"], event["height"])
+                kept = [queued for queued in backlog if queued["type"] != "tile"
+                        or (queued["x"], queued["y"], queued["width"], queued["height"]) != area]
+                if len(kept) < len(backlog):
+                    backlog[:] = kept
+                    self.backlogBytes = sum(map(eventBytes, backlog)) + eventBytes(event)
+            elif kind == "points":
+                self.backlogPoints += len(event["points"]) // 2
+                last = backlog[-1] if backlog else None
+                if last is not None and last["type"] == "points" and last["stroke"] == event["stroke"]:
+                    # events are shared with the other guessers, so merge into a new one
+                    backlog[-1] = {"type": "points", "stroke": event["stroke"], "points": last["points"] + event["points"],
+                                   "t": event.get("t")}
+                    continue
+            backlog.append(event)
+        if self.backlogPoints > MAX_BACKLOG_POINTS:
+            self.thin()
+        return self.backlogBytes <= MAX_BACKLOG_BYTES
+
+    def thin(self):
+        '''
+        Drop every other intermediate point of each stroke in the backlog, the first and last points are kept
+        '''
+        total = 0
+        for index, event in enumerate(self.backlog):
+            if event["type"] != "points":
+                continue
+            points = event["points"]
+            count = len(points) // 2
+            if count > 2:
+                kept = points[0:2] + [value for i in range(2, 2 * count - 2, 4) for value in points[i:i + 2]] + points[-2:]
+                self.dropped += count - len(kept) // 2
+                self.backlog[index] = {"type": "points", "stroke": event["stroke"], "points": kept, "t": event.get("t")}
+                count = len(kept) // 2
+            total += count
+        self.backlogPoints = total
+        self.backlogBytes = sum(map(eventBytes, self.backlog))
+
+    def flushBacklog(self):
+        self.writer.write(encode({"type": "frame", "events": self.backlog}))
+        self.backlog = []
+        self.backlogPoints = 0
+        self.backlogBytes = 0
+
+
+class Room:
+    '''
+    A drawer and the guessers watching them
+    '''
+
+    def __init__(self, name):
+        self.name = name
+        self.drawer = None
+        self.subscribers = {}  # writer -> Subscriber
+        self.pending = []  # drawer events since the last frame tick
+        self.guesses = []  # guesses since the last frame tick
+
+
+class StrokeServer:
+    '''
+    Hosts the rooms and sends each room's stroke events to its guessers once per frame tick
+    '''
+
+    def __init__(self, frameInterval=FRAME_INTERVAL):
+        self.frameInterval = frameInterval
+        self.rooms = {}
+        self.dirty = set()  # rooms with events waiting for the next tick
+        self.guessed = set()  # rooms with guesses waiting for the next tick
+        self.backlogged = set()  # (room, subscriber) pairs with a backlog to send once they catch up
+        self.server = None
+        self.ticker = None
+        self.frames = 0
+        self.events = 0
+        self.guesses = 0
+        self.errors = 0  # rooms whose frame couldn't be sent, see flush
+        self.disconnected = 0  # guessers dropped for falling too far behind
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self.server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+        self.ticker = asyncio.create_task(self.tick())
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        self.ticker.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def stats(self):
+        return {"type": "stats", "rooms": len(self.rooms),
+                "clients": sum(len(room.subscribers) + (room.drawer is not None) for room in self.rooms.values()),
+                "frames": self.frames, "events": self.events, "guesses": self.guesses, "errors": self.errors,
+                "disconnected": self.disconnected,
+                "cpu": time.process_time()}
+
+    async def handle(self, reader, writer):
+        room = None
+        role = None
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                if not isinstance(message, dict):  # valid JSON but not a message, dropped like malformed JSON
+                    raise ValueError("message is not an object")
+                kind = message.get("type")
+                if kind == "stats":
+                    writer.write(encode(self.stats()))
+                elif kind == "join" and room is None:
+                    room, role = self.join(message.get("room", ""), message.get("role"), writer)
+                    if room is None:
+                        break
+                elif role == "drawer" and kind in ("begin", "points", "end", "clear", "tile"):
+                    checkEvent(message)
+                    room.pending.append(message)
+                    self.dirty.add(room)
+                    self.events += 1
+                elif role == "guesser" and kind == "guess":
+                    room.guesses.append(str(message.get("text", ""))[:MAX_GUESS_LENGTH])
+                    self.guessed.add(room)
+                    self.guesses += 1
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if room is not None:
+                self.leave(room, role, writer)
+            writer.close()
+
+    def join(self, name, role, writer):
+        if not isinstance(name, str) or not isinstance(role, str):  # e.g. a list, which can't even be looked up
+            raise ValueError("room and role must be strings")
+        if role not in ("drawer", "guesser"):
+            writer.write(encode({"type": "error", "message": "unknown role"}))
+            return None, None
+        room = self.rooms.get(name)
+        if room is None:
+            room = self.rooms[name] = Room(name)
+        if role == "drawer":
+            if room.drawer is not None:
+                writer.write(encode({"type": "error", "message": "room already has a drawer"}))
+                return None, None
+            room.drawer = writer
+        else:
+            room.subscribers[writer] = Subscriber(writer)
+        writer.write(encode({"type": "joined", "room": name, "role": role}))
+        return room, role
+
+    def leave(self, room, role, writer):
+        if role == "drawer" and room.drawer is writer:
+            room.drawer = None
+        subscriber = room.subscribers.pop(writer, None)
+        if subscriber is not None:
+            self.backlogged.discard((room, subscriber))
+        if room.drawer is None and not room.subscribers:
+            self.rooms.pop(room.name, None)
+            self.dirty.discard(room)
+            self.guessed.discard(room)
+
+    async def tick(self):
+        while True:
+            await asyncio.sleep(self.frameInterval)
+            self.flush()
+
+    def flush(self):
+        '''
+        Send every room's pending events to its guessers, one encoded frame shared by all that are keeping up, and
+        its guesses to its drawer
+        '''
+        if self.guessed:
+            guessed, self.guessed = self.guessed, set()
+            for room in guessed:
+                guesses, room.guesses = room.guesses, []
+                if room.drawer is not None:
+                    room.drawer.write(encode({"type": "guesses", "guesses": guesses}))
+        dirty, self.dirty = self.dirty, set()
+        for room in dirty:
+            events, room.pending = room.pending, []
+            try:
+                self.flushRoom(room, events)
+            except Exception:  # whatever went wrong in one room, the ticker has to keep serving the others
+                self.errors += 1
+            self.frames += 1
+        if self.backlogged:
+            for room, subscriber in list(self.backlogged):
+                if not subscriber.slow():
+                    self.backlogged.discard((room, subscriber))
+                    try:
+                        subscriber.flushBacklog()
+                    except Exception:
+                        self.errors += 1
+
+    def flushRoom(self, room, events):
+        frame = None
+        for subscriber in list(room.subscribers.values()):
+            if not subscriber.backlog and not subscriber.slow():
+                if frame is None:
+                    frame = encode({"type": "frame", "events": events})
+                subscriber.writer.write(frame)
+            elif subscriber.queue(events):
+                self.backlogged.add((room, subscriber))
+            else:  # too far behind to catch up, its handler sees the connection go and leaves the room
+                self.backlogged.discard((room, subscriber))
+                room.subscribers.pop(subscriber.writer, None)
+                subscriber.backlog = []
+                subscriber.writer.transport.abort()
+                self.disconnected += 1
+
+
+class StrokeClient:
+    '''
+    asyncio client for a drawer or a guesser
+    '''
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.nextStroke = 0
+
+    async def connect(self, host, port, room, role):
+        self.reader, self.writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+        self.send({"type": "join", "room": room, "role": role})
+        reply = await self.receive()
+        if reply is None or reply.get("type") != "joined":
+            raise ConnectionError(reply.get("message") if reply else "connection closed")
+        return reply
+
+    def send(self, message):
+        self.writer.write(encode(message))
+
+    async def receive(self):
+        line = await self.reader.readline()
+        return json.loads(line) if line else None
+
+    async def frames(self):
+        '''
+        Iterate over the lists of events sent to a guesser, one list per frame tick
+        '''
+        while True:
+            message = await self.receive()
+            if message is None:
+                return
+            if message.get("type") == "frame":
+                yield message["events"]
+
+    async def guessBatches(self):
+        '''
+        Iterate over the lists of guesses sent to a drawer, one list per frame tick
+        '''
+        while True:
+            message = await self.receive()
+            if message is None:
+                return
+            if message.get("type") == "guesses":
+                yield message["guesses"]
+
+    def guess(self, text):
+        self.send({"type": "guess", "text": text})
+
+    # drawer helpers
+
+    def beginStroke(self, color, width, x, y, tip=None):
+        self.nextStroke += 1
+        message = {"type": "begin", "stroke": self.nextStroke, "color": color, "width": width, "x": x, "y": y,
+                   "t": time.time()}
+        if tip is not None:  # a BrushTip, the pen if there is none
+            message["tip"] = [tip.shape, tip.hardness]
+        self.send(message)
+        return self.nextStroke
+
+    def addPoints(self, points):
+        self.send({"type": "points", "stroke": self.nextStroke, "points": points, "t": time.time()})
+
+    def endStroke(self):
+        self.send({"type": "end", "stroke": self.nextStroke})
+
+    def clear(self):
+        self.send({"type": "clear"})
+
+    def sendTile(self, x, y, width, height, pixelWidth, pixelHeight, data):
+        self.send({"type": "tile", "x": x, "y": y, "width": width, "height": height, "pixels": [pixelWidth, pixelHeight],
+                   "data": data})
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(host, port):
+    server = StrokeServer()
+    address = await server.start(host, port)
+    print("serving on %s:%d" % address, flush=True)
+    await server.server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-room Pictionary stroke server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
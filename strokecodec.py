@@ -0,0 +1,355 @@
+# Compact binary encoding of strokes
+#
+# A stroke is written as its colour, width and brush tip followed by its points as deltas of x, y and time from the
+# previous point, and of pressure for strokes drawn with a tablet. Mouse moves are a few pixels and a few
+# milliseconds apart, so the deltas are small and vary little within a stretch of a stroke. Points are written in
+# chunks; the first point of a chunk is written as zig-zag varints and the others are packed together: each field of
+# a point is its offset from the smallest delta of that field in the chunk, a digit in base span + 1 where span is
+# the largest offset, and the digits of every point make up one number in mixed radix written as little endian
+# bytes. That is within a byte per chunk of the information in the offsets, about 10 bits a point for a random walk
+# of mouse moves (1.4 bytes with the headers), against 14 as compact JSON.
+#
+#   file    = MAGIC stroke*
+#   stroke  = varint(color) varint(width) varint(flags) [tip] chunk* varint(0)
+#   flags   = 1 if the stroke has a tip (drawn with a brush rather than the pen) + 2 if it has pressures
+#   tip     = varint(length) shape (ASCII) hardness (little endian double)
+#   chunk   = varint(n > 0) zigzag(d) * fields [rest]                       the first point, then if n > 1
+#   rest    = zigzag(min d) * fields varint(span) * fields packed
+#   packed  = sum of (digit * R ** i) for the other points i = 0 .. n - 2, where digit = ox + rx * (oy + ry * (ot +
+#             rt * op)), o are the offsets, r = span + 1 and R the product of the r, in as many bytes as
+#             R ** (n - 1) - 1 takes
+#
+# The fields of a point are x, y, t and, if the stroke has pressures, p. The first delta of a stroke is from zero.
+# Chunks let a stroke be written while it is still being drawn and read back before it is finished. Coordinates are
+# whole pixels, times whole milliseconds (what mouse events deliver) and pressures multiples of 1 / PRESSURE_LEVELS,
+# which is what strokes.Stroke keeps, so a round trip is lossless.
+#
+# The encoder appends to a bytearray and the decoder accepts bytes, bytearray or memoryview input and decodes in
+# place in its own bytearray. Decoded points go straight into an array('f') of x, y, t triples and pressures into an
+# array('f') of their own (the layout strokes.Stroke uses), so no tuple or list is created per point.
+
+from array import array
+import struct
+
+MAGIC = b"PSK3"
+PRESSURE_LEVELS = 8192  # pressures are stored as whole multiples of 1 / PRESSURE_LEVELS, as fine as tablets report
+TIP = 1
+PRESSURE = 2
+HARDNESS = struct.Struct("<d")
+CHUNK_POINTS = 256  # points buffered by the encoder before a chunk is written
+
+
+def writeVarint(out, value):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def zigzag(value):
+    return value << 1 if value >= 0 else (-value << 1) - 1  # small negatives stay small
+
+
+def unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+class StrokeEncoder:
+    '''
+    Streaming encoder, strokes are appended to out (a bytearray) as they are drawn
+    '''
+
+    def __init__(self, out=None, header=True):
+        self.out = out if out is not None else bytearray()
+        self.dx = array('q')  # deltas of the points buffered for the next chunk
+        self.dy = array('q')
+        self.dt = array('q')
+        self.dp = None  # pressure deltas, for strokes with pressures
+        self.lastX = self.lastY = self.lastT = self.lastP = 0
+        self.inStroke = False
+        if header:
+            self.out += MAGIC
+
+    def beginStroke(self, color, width, tip=None, pressures=False):
+        '''
+        Start a stroke, tip is the (shape, hardness) of the brush it is drawn with or None for the pen. If pressures
+        is true every point has a pressure
+        '''
+        if self.inStroke:
+            self.endStroke()
+        out = self.out
+        writeVarint(out, color & 0xffffffff)
+        writeVarint(out, width)
+        writeVarint(out, (TIP if tip is not None else 0) | (PRESSURE if pressures else 0))
+        if tip is not None:
+            shape, hardness = tip
+            shape = shape.encode("ascii")
+            writeVarint(out, len(shape))
+            out += shape
+            out += HARDNESS.pack(hardness)
+        self.dp = array('q') if pressures else None
+        self.lastX = self.lastY = self.lastT = self.lastP = 0
+        self.inStroke = True
+
+    def addPoint(self, x, y, t, pressure=None):
+        x, y, t = int(x), int(y), int(round(t))
+        self.dx.append(x - self.lastX)
+        self.dy.append(y - self.lastY)
+        self.dt.append(t - self.lastT)
+        self.lastX, self.lastY, self.lastT = x, y, t
+        if self.dp is not None:
+            p = round((1.0 if pressure is None else pressure) * PRESSURE_LEVELS)
+            self.dp.append(p - self.lastP)
+            self.lastP = p
+        if len(self.dx) >= CHUNK_POINTS:
+            self.flush()
+
+    def addPoints(self, points, pressures=None):
+        '''
+        Add a flat sequence of x, y, t values, e.g. a Stroke's array('f'), and the pressure of each point
+        '''
+        if pressures is None:
+            for i in range(0, len(points) - 2, 3):
+                self.addPoint(points[i], points[i + 1], points[i + 2])
+        else:
+            for i in range(0, len(points) - 2, 3):
+                self.addPoint(points[i], points[i + 1], points[i + 2], pressures[i // 3])
+
+    def flush(self):
+        '''
+        Write the buffered points of the current stroke as a chunk
+        '''
+        dx, dy, dt, dp = self.dx, self.dy, self.dt, self.dp
+        count = len(dx)
+        if not count:
+            return
+        fields = (dx, dy, dt) if dp is None else (dx, dy, dt, dp)
+        out = self.out
+        writeVarint(out, count)
+        for values in fields:
+            writeVarint(out, zigzag(values[0]))
+        if count > 1:
+            lows = []
+            radices = []
+            for values in fields:
+                rest = values[1:]
+                low = min(rest)
+                writeVarint(out, zigzag(low))
+                lows.append(low)
+                radices.append(max(rest) - low + 1)
+            radix = 1
+            for field in radices:
+                writeVarint(out, field - 1)
+                radix *= field
+            lowX, lowY, lowT = lows[:3]
+            radixX, radixY = radices[:2]
+            packed = 0
+            if dp is None:
+                for i in range(count - 1, 0, -1):  # Horner's rule, the second point ends up in the lowest digit
+                    packed = packed * radix + (dx[i] - lowX) + radixX * ((dy[i] - lowY) + radixY * (dt[i] - lowT))
+            else:
+                lowP, radixT = lows[3], radices[2]
+                for i in range(count - 1, 0, -1):
+                    packed = packed * radix + (dx[i] - lowX) + radixX * ((dy[i] - lowY) + radixY * (
+                        (dt[i] - lowT) + radixT * (dp[i] - lowP)))
+            out += packed.to_bytes(packedSize(radix, count - 1), "little")
+        for values in fields:
+            del values[:]
+
+    def endStroke(self):
+        self.flush()
+        self.out.append(0)
+        self.inStroke = False
+
+    def encodeStroke(self, color, width, points, tip=None, pressures=None):
+        self.beginStroke(color, width, tip, pressures is not None)
+        self.addPoints(points, pressures)
+        self.endStroke()
+
+
+class StrokeDecoder:
+    '''
+    Streaming decoder, feed it bytes as they arrive and it returns the strokes completed so far as
+    (color, width, array('f') of x, y, t, tip, pressures) tuples, where tip is (shape, hardness) or None and pressures
+    an array('f') or None. The stroke still being received is available as current
+    '''
+
+    def __init__(self, header=True):
+        self.buffer = bytearray()
+        self.pos = 0
+        self.needHeader = header
+        self.current = None  # (color, width, points, tip, pressures) of the stroke being decoded
+        self.lastX = self.lastY = self.lastT = self.lastP = 0
+
+    def feed(self, data):
+        self.buffer += data  # data can be bytes, a bytearray or a memoryview
+        strokes = []
+        buffer = self.buffer
+        end = len(buffer)
+        pos = self.pos
+        if self.needHeader:
+            if end - pos < len(MAGIC):
+                return strokes
+            if buffer[pos:pos + len(MAGIC)] != MAGIC:
+                raise ValueError("not a stroke file")
+            pos += len(MAGIC)
+            self.needHeader = False
+        while True:
+            if self.current is None:
+                after = self.readHeader(buffer, pos, end)
+                if after < 0:
+                    break
+                self.lastX = self.lastY = self.lastT = self.lastP = 0
+                pos = after
+            count, after = readVarint(buffer, pos, end)
+            if after < 0:
+                break
+            if count == 0:  # end of the stroke
+                strokes.append(self.current)
+                self.current = None
+                pos = after
+                continue
+            after = self.readChunk(buffer, after, end, count)
+            if after < 0:  # wait for the rest of the chunk
+                break
+            pos = after
+        if pos > 65536:  # drop what has been decoded so the buffer doesn't keep growing
+            del self.buffer[:pos]
+            pos = 0
+        self.pos = pos
+        return strokes
+
+    def readHeader(self, buffer, pos, end):
+        '''
+        Start the stroke whose header is at pos, returns the position after it or -1 if it isn't all there
+        '''
+        header = []
+        for _ in range(3):  # colour, width and flags
+            value, pos = readVarint(buffer, pos, end)
+            if pos < 0:
+                return -1
+            header.append(value)
+        color, width, flags = header
+        tip = None
+        if flags & TIP:
+            length, pos = readVarint(buffer, pos, end)
+            if pos < 0 or pos + length + HARDNESS.size > end:
+                return -1
+            shape = bytes(buffer[pos:pos + length]).decode("ascii")
+            pos += length
+            tip = (shape, HARDNESS.unpack_from(buffer, pos)[0])
+            pos += HARDNESS.size
+        self.current = (color, width, array('f'), tip, array('f') if flags & PRESSURE else None)
+        return pos
+
+    def readChunk(self, buffer, pos, end, count):
+        '''
+        Decode count points into the current stroke, returns the position after them or -1 if they aren't all there
+        '''
+        pressures = self.current[4]
+        size = 3 if pressures is None else 4  # fields per point
+        fields = []
+        for i in range(3 * size if count > 1 else size):  # the first point, then the smallest delta and span of each
+            value, pos = readVarint(buffer, pos, end)
+            if pos < 0:
+                return -1
+            fields.append(unzigzag(value) if i < 2 * size else value + 1)
+        x = self.lastX + fields[0]
+        y = self.lastY + fields[1]
+        t = self.lastT + fields[2]
+        values = array('f', (x, y, t))
+        p = self.lastP
+        levels = array('f')
+        if pressures is not None:
+            p += fields[3]
+            levels.append(p / PRESSURE_LEVELS)
+        if count > 1:
+            lowX, lowY, lowT = fields[size:size + 3]
+            radixX, radixY, radixT = fields[2 * size:2 * size + 3]
+            radix = radixX * radixY * radixT
+            if pressures is not None:
+                lowP, radixP = fields[size + 3], fields[-1]
+                radix *= radixP
+            if pos + (radix.bit_length() - 1) * (count - 1) // 8 > end:  # not there yet, without working out R ** n
+                return -1
+            size = packedSize(radix, count - 1)
+            if pos + size > end:
+                return -1
+            packed = int.from_bytes(buffer[pos:pos + size], "little")
+            pos += size
+            radixXY = radixX * radixY
+            append = values.append
+            if pressures is None:
+                for _ in range(count - 1):
+                    packed, value = divmod(packed, radix)
+                    x += lowX + value % radixX
+                    y += lowY + value // radixX % radixY
+                    t += lowT + value // radixXY
+                    append(x)
+                    append(y)
+                    append(t)
+            else:
+                appendLevel = levels.append
+                for _ in range(count - 1):
+                    packed, value = divmod(packed, radix)
+                    x += lowX + value % radixX
+                    y += lowY + value // radixX % radixY
+                    value //= radixXY
+                    t += lowT + value % radixT
+                    p += lowP + value // radixT
+                    append(x)
+                    append(y)
+                    append(t)
+                    appendLevel(p / PRESSURE_LEVELS)
+        self.current[2].extend(values)  # only commit the chunk once it is complete
+        if pressures is not None:
+            pressures.extend(levels)
+        self.lastX, self.lastY, self.lastT, self.lastP = x, y, t, p
+        return pos
+
+    def finished(self):
+        return self.current is None and self.pos >= len(self.buffer)
+
+
+def packedSize(radix, count):
+    '''
+    Bytes taken by count points packed in mixed radix
+    '''
+    return ((radix ** count - 1).bit_length() + 7) // 8
+
+
+def readVarint(buffer, pos, end):
+    '''
+    Read a varint at pos, returns (value, position after it) or (0, -1) if the buffer ends first
+    '''
+    value = 0
+    shift = 0
+    while pos < end:
+        byte = buffer[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+    return 0, -1
+
+
+def encode(strokes):
+    '''
+    Encode (color, width, points) or (color, width, points, tip, pressures) tuples to bytes
+    '''
+    encoder = StrokeEncoder()
+    for stroke in strokes:
+        encoder.encodeStroke(*stroke)
+    return bytes(encoder.out)
+
+
+def decode(data):
+    '''
+    Decode a complete buffer of strokes, returns a list of (color, width, array('f'), tip, pressures) tuples
+    '''
+    decoder = StrokeDecoder()
+    strokes = decoder.feed(data)
+    if not decoder.finished():
+        raise ValueError("truncated stroke data")
+    return strokes
@@ -0,0 +1,229 @@
+# Vector model of everything drawn on the canvas
+#
+# Each stroke is kept as its colour, its width and one flat array('f') of x, y, t triples, rather than a list of
+# QPoint objects, so tens of thousands of points cost 12 bytes each and create no Python objects for the GC to track.
+# Times are kept in whole milliseconds since the stroke began, the resolution of mouse events, and pressures in steps
+# of 1 / strokecodec.PRESSURE_LEVELS, so the binary format of strokecodec stores them exactly.
+# The raster canvas is only a cache of this model and can be regenerated from it at any size. Strokes drawn with a
+# brush tip rather than the pen (see brushes.py) also keep the tip, and the pressure of each point if it came from a
+# tablet.
+
+from array import array
+from collections import deque
+import math
+import time
+
+import strokecodec
+from brushes import BrushTip, DabCache, stampPolyline
+
+from PyQt6.QtGui import QPainter, QPen, QColor, QPolygonF
+from PyQt6.QtCore import Qt, QPointF
+
+
+class Stroke:
+    '''
+    A single stroke: colour (as an ARGB int), pen width and interleaved x, y, time (ms since the stroke began) values.
+    tip is the BrushTip it was stamped with, None for the pen, and pressures the pressure of each point or None
+    '''
+    __slots__ = ("color", "width", "points", "startTime", "tip", "pressures")
+
+    def __init__(self, color, width, startTime, tip=None, pressure=None):
+        self.color = color
+        self.width = width
+        self.points = array('f')  # x0, y0, t0, x1, y1, t1, ...
+        self.startTime = startTime
+        self.tip = tip
+        self.pressures = None if pressure is None else array('f')  # only kept for strokes begun with a tablet
+
+    def __len__(self):
+        return len(self.points) // 3
+
+    def addPoint(self, x, y, t, pressure=None):
+        self.points.extend((x, y, round((t - self.startTime) * 1000.0)))
+        if self.pressures is not None:
+            levels = strokecodec.PRESSURE_LEVELS
+            self.pressures.append(1.0 if pressure is None else round(pressure * levels) / levels)
+
+    def xy(self):
+        '''
+        Iterate over the (x, y) pairs of the stroke
+        '''
+        points = self.points
+        return zip(points[0::3], points[1::3])
+
+    def nbytes(self):
+        return self.points.itemsize * len(self.points)
+
+
+class StrokeModel:
+    '''
+    The list of strokes drawn on the canvas since it was last cleared
+    '''
+
+    def __init__(self, clock=time.perf_counter):
+        self.strokes = []
+        self.current = None
+        self.clock = clock
+
+    def __len__(self):
+        return len(self.strokes)
+
+    def beginStroke(self, color, width, x, y, tip=None, pressure=None):
+        self.current = Stroke(QColor(color).rgba(), width, self.clock(), tip, pressure)
+        self.current.addPoint(x, y, self.current.startTime, pressure)
+        self.strokes.append(self.current)
+        return self.current
+
+    def addPoint(self, x, y, t=None, pressure=None):
+        if self.current is not None:
+            self.current.addPoint(x, y, self.clock() if t is None else t, pressure)
+
+    def endStroke(self):
+        self.current = None
+
+    def clear(self):
+        self.strokes = []
+        self.current = None
+
+    def pointCount(self):
+        return sum(len(stroke) for stroke in self.strokes)
+
+    def nbytes(self):
+        return sum(stroke.nbytes() for stroke in self.strokes)
+
+    def toBytes(self):
+        '''
+        Encode every stroke in the compact binary format of strokecodec, with its brush tip and pressures
+        '''
+        return strokecodec.encode((stroke.color, stroke.width, stroke.points,
+                                   None if stroke.tip is None else (stroke.tip.shape, stroke.tip.hardness),
+                                   stroke.pressures) for stroke in self.strokes)
+
+    @classmethod
+    def fromBytes(cls, data):
+        model = cls()
+        for color, width, points, tip, pressures in strokecodec.decode(data):
+            stroke = Stroke(color, width, 0.0, None if tip is None else BrushTip(*tip))
+            stroke.points = points
+            stroke.pressures = pressures
+            model.strokes.append(stroke)
+        return model
+
+    def render(self, device, scaleX=1.0, scaleY=1.0, background=Qt.GlobalColor.white, dabCache=None):
+        '''
+        Rasterise every stroke onto a paint device (QPixmap or QImage), scaling the canvas coordinates by
+        scaleX, scaleY so the drawing can be regenerated at any resolution. Brush strokes use the dabs of dabCache
+        '''
+        if background is not None:
+            device.fill(background)
+        painter = QPainter(device)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, scaleX != 1.0 or scaleY != 1.0)
+        painter.scale(scaleX, scaleY)
+        for stroke in self.strokes:
+            if len(stroke) < 2:  # a press without a move leaves no mark on the canvas
+                continue
+            if stroke.tip is not None:
+                if dabCache is None:
+                    dabCache = DabCache()
+                stampPolyline(painter, dabCache, stroke.tip, stroke.color, stroke.width, stroke.xy(), stroke.pressures,
+                              device.devicePixelRatio())
+                continue
+            painter.setPen(QPen(QColor.fromRgba(stroke.color), stroke.width, Qt.PenStyle.SolidLine,
+                                Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin))
+            painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in stroke.xy()]))
+        painter.end()
+        return device
+
+
+class StrokeSimplifier:
+    '''
+    Online simplification of a stroke as its points arrive. Points are held in a short window after the last point
+    kept; while every point in the window is within tolerance pixels of the straight line from the last kept point to
+    the newest one they are redundant. When a new point would push one of them out of tolerance, the point before it
+    is kept and starts a new window. This gives close to Ramer-Douglas-Peucker results with a bounded delay.
+    A tolerance of 0 keeps every point
+    '''
+
+    def __init__(self, tolerance=0.0, window=16):
+        self.tolerance = tolerance
+        self.windowSize = window
+        self.anchor = None
+        self.window = []  # (x, y, t, pressure) since the anchor, not decided yet
+
+    def reset(self, x, y, t, pressure=None):
+        '''
+        Start a new stroke at (x, y), the first point is always kept
+        '''
+        self.anchor = (x, y, t, pressure)
+        self.window = []
+
+    def add(self, x, y, t, pressure=None):
+        '''
+        Add a point, returns the list of (x, y, t, pressure) points that are now known to be kept
+        '''
+        point = (x, y, t, pressure)
+        if self.tolerance <= 0:
+            return [point]
+        window = self.window
+        if window and (len(window) >= self.windowSize or not self.fits(point)):
+            kept = window[-1]
+            self.anchor = kept
+            self.window = [point]
+            return [kept]
+        window.append(point)
+        return []
+
+    def fits(self, point):
+        ax, ay = self.anchor[0], self.anchor[1]
+        dx, dy = point[0] - ax, point[1] - ay
+        length = math.hypot(dx, dy)
+        tolerance = self.tolerance
+        for x, y, _, _ in self.window:
+            if length == 0:
+                distance = math.hypot(x - ax, y - ay)
+            else:  # distance from the line anchor -> point
+                distance = abs(dx * (y - ay) - dy * (x - ax)) / length
+            if distance > tolerance:
+                return False
+        return True
+
+    def finish(self):
+        '''
+        End the stroke, returns the last point if it hasn't been kept yet
+        '''
+        kept = self.window[-1:]
+        self.window = []
+        self.anchor = None
+        return kept
+
+
+class InputStats:
+    '''
+    Counters for mouse input: move events received, frames they were drawn in, points kept after simplification and
+    the delay between an event arriving and it being drawn
+    '''
+
+    def __init__(self, samples=1024):
+        self.moves = 0
+        self.frames = 0
+        self.pointsDrawn = 0
+        self.pointsKept = 0
+        self.latencies = deque(maxlen=samples)  # seconds, most recent frames only
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def summary(self):
+        return {
+            "moves": self.moves,
+            "frames": self.frames,
+            "movesPerFrame": self.moves / self.frames if self.frames else 0.0,
+            "pointsDrawn": self.pointsDrawn,
+            "pointsKept": self.pointsKept,
+            "keptRatio": self.pointsKept / self.pointsDrawn if self.pointsDrawn else 1.0,
+            "latencyP50Ms": self.percentile(50) * 1000,
+            "latencyP99Ms": self.percentile(99) * 1000,
+        }
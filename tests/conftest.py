@@ -0,0 +1,33 @@
+# Shared fixtures, the tests run offscreen from the project root:
+#   QT_QPA_PLATFORM=offscreen python -m pytest tests
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session")
+def app():
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+@pytest.fixture
+def window(app, monkeypatch):
+    '''
+    A game window at 900x700, the word lists are read from the project root
+    '''
+    monkeypatch.chdir(ROOT)
+    from PictionaryGame import PictionaryGame
+    game = PictionaryGame(seed=1)
+    game.resize(900, 700)
+    game.show()
+    app.processEvents()
+    game.growCanvas()
+    yield game
+    game.close()
@@ -0,0 +1,102 @@
+import os
+
+from PyQt6.QtGui import QColor, QImage
+
+from autosave import Journal, readJournal, FORMAT
+
+
+def canvas(color, width=128, height=64):
+    image = QImage(width, height, FORMAT)
+    image.fill(QColor(color))
+    return image
+
+
+def tile(color):
+    return canvas(color, 64, 64)
+
+
+def state(turn, mode="easy"):
+    return {"turn": turn, "scores": [turn, 0], "mode": mode, "started": True, "word": "cat"}
+
+
+def test_torn_record_falls_back_to_last_complete_checkpoint(app, tmp_path):
+    path = str(tmp_path / "autosave.journal")
+    journal = Journal(path)
+    journal.writeSnapshot(canvas("white"), state(0))
+    journal.appendTiles({(0, 0): tile("red")}, state(1))
+    complete = os.path.getsize(path)
+    journal.appendTiles({(64, 0): tile("blue")}, state(2))
+    journal.close()
+    with open(path, "r+b") as f:  # the machine went down halfway through the last record
+        f.truncate(complete + (os.path.getsize(path) - complete) // 2)
+
+    image, restored = readJournal(path)
+    assert restored == state(1)
+    assert image.pixelColor(10, 10) == QColor("red")
+    assert image.pixelColor(100, 10) == QColor("white")
+
+
+def test_damaged_record_stops_the_replay(app, tmp_path):
+    path = str(tmp_path / "autosave.journal")
+    journal = Journal(path)
+    journal.writeSnapshot(canvas("white"), state(0))
+    complete = os.path.getsize(path)
+    journal.appendTiles({(0, 0): tile("red")}, state(1))
+    journal.appendTiles({(64, 0): tile("blue")}, state(2))
+    journal.close()
+    with open(path, "r+b") as f:  # a flipped byte in the payload of the first tiles record
+        f.seek(-1, os.SEEK_END)
+        size = f.tell()
+        f.seek(complete + (size - complete) // 4)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    image, restored = readJournal(path)
+    assert restored == state(0)
+    assert image.pixelColor(10, 10) == QColor("white")
+
+
+def test_journal_without_snapshot_is_not_restored(app, tmp_path):
+    path = str(tmp_path / "autosave.journal")
+    journal = Journal(path)
+    journal.writeSnapshot(canvas("white"), state(0))
+    journal.close()
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 1)
+    assert readJournal(path) is None
+
+
+def test_restore_with_missing_word_list_keeps_selected_mode(window, tmp_path):
+    path = str(tmp_path / "autosave.journal")
+    journal = Journal(path)
+    image = window.image.copy()
+    image.fill(QColor("red"))
+    journal.writeSnapshot(image, state(1, mode="deleted"))
+    journal.close()
+    selected = window.selectMode.currentText()
+
+    assert window.restoreSession(path)
+    assert window.engine.mode == selected
+    assert window.selectMode.currentText() == selected
+    assert window.engine.scores == [1, 0]
+    assert window.image.pixelColor(10, 10) == QColor("red")
+
+
+def test_tiles_land_in_device_pixels_at_ratio_2(app, tmp_path):
+    path = str(tmp_path / "autosave.journal")
+    journal = Journal(path)
+    image = canvas("white", 256, 128)
+    image.setDevicePixelRatio(2)
+    journal.writeSnapshot(image, state(0))
+    journal.appendTiles({(64, 0): tile("red")}, state(1))
+    journal.compact()  # writes the restored canvas back as the new snapshot
+    journal.close()
+
+    image, restored = readJournal(path)
+    assert restored == state(1)
+    assert image.devicePixelRatio() == 2
+    assert image.width() == 256
+    assert image.pixelColor(70, 10) == QColor("red")
+    assert image.pixelColor(10, 10) == QColor("white")
+    assert image.pixelColor(140, 10) == QColor("white")
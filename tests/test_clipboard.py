@@ -0,0 +1,31 @@
+from PyQt6.QtGui import QImage, QColor
+from PyQt6.QtCore import Qt
+
+
+def redImage(width, height):
+    image = QImage(width, height, QImage.Format.Format_ARGB32)
+    image.fill(Qt.GlobalColor.red)
+    return image
+
+
+def test_paste_larger_than_window_undoes(window, app):
+    assert window.image.width() > window.width()  # the canvas grows past the window
+    before = window.image.copy()
+    app.clipboard().clear()
+    window.clipboardImage = redImage(1200, 900)
+    window.paste()
+    assert window.image != before
+    window.undo()
+    assert window.image == before
+
+
+def test_cut_clears_what_was_copied(window, app):
+    app.clipboard().clear()
+    window.clipboardImage = redImage(1200, 900)
+    window.paste()
+    pasted = window.image.copy()
+    window.cut()  # without a selection, the visible canvas
+    assert QColor(window.image.pixel(10, 10)) == QColor(Qt.GlobalColor.white)
+    assert QColor(window.image.pixel(window.width() + 10, 10)) == QColor(Qt.GlobalColor.red)
+    window.undo()
+    assert window.image == pasted
@@ -0,0 +1,31 @@
+from engine import GameEngine, SCORING
+
+
+class Words:
+    '''
+    Word provider stand-in: every mode has one word and the difficulty tier given for it
+    '''
+
+    def __init__(self, tiers):
+        self.tiers = tiers
+
+    def draw(self, mode):
+        return "cat"
+
+    def difficulty(self, mode):
+        return self.tiers[mode]
+
+
+def test_points_fall_back_to_the_difficulty_tier():
+    words = Words({"easy": "easy", "animals": "easy", "pets": "easy", "movies": "expert", "space": "hard"})
+    engine = GameEngine(words, scoring={"easy": (0, 0), "animals": (4, 1)})
+    for mode, points in (("animals", (4, 1)), ("pets", (0, 0)),  # a tier scored 0 isn't missing
+                         ("movies", SCORING["hard"]), ("space", SCORING["hard"])):  # no hard tier in the table
+        engine.mode = mode
+        assert engine.points() == points
+
+    engine = GameEngine(words, scoring={"hard": (9, 9)})
+    engine.mode = "movies"
+    assert engine.points() == (9, 9)  # an unknown tier scores as hard
+    engine.mode = "animals"
+    assert engine.points() == SCORING["easy"]
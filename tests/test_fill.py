@@ -0,0 +1,43 @@
+import numpy as np
+from PyQt6.QtCore import QPoint
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+from pixels import runTiles
+
+
+def test_run_tiles_touched_and_covered():
+    # a 100 x 70 image in 64 pixel tiles: columns 0 and 1 (36 wide), rows 0 and 1 (6 high)
+    rows = np.arange(64, 70)
+    starts = np.full(6, 10)
+    ends = np.full(6, 100)
+    touched, covered = runTiles(rows, starts, ends, 64, (70, 100))
+    assert touched == [(0, 1), (1, 1)]
+    assert covered == [(1, 1)]  # the edge tile is covered by runs reaching the edge, the first starts at 10
+
+    touched, covered = runTiles(np.array([0]), np.array([0]), np.array([64]), 64, (70, 100))
+    assert touched == [(0, 0)]
+    assert covered == []  # one row of 64
+
+
+def test_fill_undo_redo_keeps_only_touched_tiles(window):
+    image = QImage(window.image.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(QColor("white"))
+    painter = QPainter(image)
+    painter.fillRect(0, 100, image.width(), 10, QColor("black"))  # the fill from the top stops at the line
+    painter.end()
+    window.showImage(image)
+    before = window.image.copy()
+    window.brushColor = QColor("red")
+    window.fillTolerance = 0
+
+    window.fill(QPoint(5, 5))
+    filled = window.image.copy()
+    assert filled.pixelColor(600, 90) == QColor("red")
+    assert filled.pixelColor(600, 200) == QColor("white")
+    entry = window.history.undoStack[-1]
+    assert {row for _, row in entry.before} == {0, 1}  # the tiles below the line aren't kept
+
+    window.undo()
+    assert window.image == before
+    window.redo()
+    assert window.image == filled
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from guesses import GuessMatcher, editDistance, CORRECT, CLOSE, WRONG, MEMO_SIZE
+
+
+@pytest.mark.parametrize("answer, guess, result", [
+    ("Mobile Phone", "mobile-phone", CORRECT),  # case, punctuation and spaces don't matter
+    ("Mobile Phone", " MOBILEPHONE! ", CORRECT),
+    ("Mobile Phone", "mboile phone", CORRECT),  # one swap in a long answer
+    ("Mobile Phone", "mobil phon", CLOSE),
+    ("Mobile Phone", "phone", CLOSE),  # one word of the answer
+    ("Mobile Phone", "mob", WRONG),
+    ("Graphical User Interface", "g.u.i.", CORRECT),  # initials
+    ("Graphical User Interface", "user", CLOSE),
+    ("The Beatles", "beatles", CORRECT),  # with or without the article
+    ("The Beatles", "the beatles", CORRECT),
+    ("Café", "CAFE", CORRECT),  # accents
+    ("Café", "caf", CLOSE),
+    ("cat", "a cat", CORRECT),
+    ("cat", "cot", CLOSE),  # a short answer takes no typos
+    ("cat", "dog", WRONG),
+    ("cat", "  !? ", WRONG),
+])
+def test_guess(answer, guess, result):
+    assert GuessMatcher(answer).check(guess) == result
+
+
+def osa(first, second):
+    '''
+    The optimal string alignment distance computed in full
+    '''
+    table = [[i + j if i == 0 or j == 0 else 0 for j in range(len(second) + 1)] for i in range(len(first) + 1)]
+    for i in range(1, len(first) + 1):
+        for j in range(1, len(second) + 1):
+            table[i][j] = min(table[i - 1][j] + 1, table[i][j - 1] + 1,
+                              table[i - 1][j - 1] + (first[i - 1] != second[j - 1]))
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                table[i][j] = min(table[i][j], table[i - 2][j - 2] + 1)
+    return table[-1][-1]
+
+
+def test_bounded_edit_distance_matches_the_full_table():
+    rng = random.Random(1)
+    for _ in range(2000):
+        first = "".join(rng.choice("abc") for _ in range(rng.randrange(9)))
+        second = "".join(rng.choice("abc") for _ in range(rng.randrange(9)))
+        limit = rng.randrange(4)
+        assert editDistance(first, second, limit) == min(osa(first, second), limit + 1), (first, second, limit)
+
+
+def test_memo_is_bounded():
+    matcher = GuessMatcher("elephant")
+    for i in range(MEMO_SIZE + 10):
+        matcher.check("guess %d" % i)
+    assert len(matcher.memo) <= MEMO_SIZE
+    assert matcher.check("elephnat") == CORRECT
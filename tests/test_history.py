@@ -0,0 +1,96 @@
+from PyQt6.QtCore import QRect
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+from history import CanvasHistory
+
+
+def blankCanvas(width=256, height=192):
+    image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(QColor("white"))
+    return image
+
+
+def paint(history, canvas, rect, color, strokes=()):
+    '''
+    Fill rect as one change, the stroke list goes from strokes to strokes followed by color
+    '''
+    history.begin(canvas, strokes)
+    history.touch(canvas, rect)
+    painter = QPainter(canvas)
+    painter.fillRect(rect, QColor(color))
+    painter.end()
+    history.commit(canvas, list(strokes) + [color])
+
+
+def test_undo_redo_restores_each_state(app):
+    canvas = blankCanvas()
+    history = CanvasHistory()
+    states = [canvas.copy()]
+    for rect, color in ((QRect(10, 10, 100, 30), "red"), (QRect(50, 0, 30, 150), "blue"),
+                        (QRect(200, 150, 56, 42), "green")):  # the last one along the bottom right edge
+        paint(history, canvas, rect, color)
+        states.append(canvas.copy())
+
+    for state in reversed(states[:-1]):
+        history.undo(canvas)
+        assert canvas == state
+    assert not history.canUndo()
+    assert history.undo(canvas) is None
+    for state in states[1:]:
+        history.redo(canvas)
+        assert canvas == state
+    assert not history.canRedo()
+
+
+def test_undo_returns_the_strokes_and_a_new_change_discards_redo(app):
+    canvas = blankCanvas()
+    history = CanvasHistory()
+    paint(history, canvas, QRect(0, 0, 20, 20), "red")
+    paint(history, canvas, QRect(0, 0, 20, 20), "blue", ["red"])
+    assert history.undo(canvas) == ["red"]
+    assert history.canRedo()
+    paint(history, canvas, QRect(100, 100, 20, 20), "green", ["red"])
+    assert not history.canRedo()
+    assert history.undo(canvas) == ["red"]
+    assert history.redo(canvas) == ["red", "green"]
+    assert canvas.pixelColor(5, 5) == QColor("red")
+    assert canvas.pixelColor(105, 105) == QColor("green")
+
+
+def test_tiles_are_shared_between_entries(app):
+    canvas = blankCanvas()
+    history = CanvasHistory()
+    paint(history, canvas, QRect(0, 0, 10, 10), "red")
+    paint(history, canvas, QRect(20, 20, 10, 10), "blue")  # the same tile
+    first, second = history.undoStack
+    assert second.before[0, 0] is first.after[0, 0]
+    assert history.memoryUsed == 3 * 64 * 64 * 4  # blank, red and red + blue, once each
+
+
+def test_oldest_entries_are_evicted_over_the_memory_limit(app):
+    canvas = blankCanvas()
+    tileBytes = 64 * 64 * 4
+    history = CanvasHistory(memoryLimit=5 * tileBytes)
+    for i in range(4):  # each change a tile of its own: a before and an after tile
+        paint(history, canvas, QRect(i * 64, 0, 64, 64), "red")
+    assert len(history.undoStack) == 2
+    assert history.memoryUsed <= 5 * tileBytes
+    history.undo(canvas)
+    history.undo(canvas)
+    assert not history.canUndo()
+    assert canvas.pixelColor(10, 10) == QColor("red")  # the evicted changes stay on the canvas
+    assert canvas.pixelColor(200, 10) == QColor("white")
+
+
+def test_clear_is_one_change_and_a_blank_canvas_isnt_cleared_again(app):
+    canvas = blankCanvas()
+    history = CanvasHistory()
+    history.recordClear(canvas, [])
+    assert not history.canUndo()
+    paint(history, canvas, QRect(0, 0, 100, 100), "red")
+    before = canvas.copy()
+    history.recordClear(canvas, [])
+    assert canvas.pixelColor(50, 50) == QColor("white")
+    assert len(history.undoStack) == 2
+    history.undo(canvas)
+    assert canvas == before
@@ -0,0 +1,26 @@
+import struct
+import zlib
+
+import pytest
+from PyQt6.QtCore import QSize
+
+from loader import readScaled
+
+
+def pngHeader(path, width, height):
+    '''
+    A PNG without any pixels, enough for its size to be read
+    '''
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        for kind, data in ((b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)), (b"IDAT", b""),
+                           (b"IEND", b"")):
+            f.write(struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data)))
+
+
+def test_image_too_large_for_the_allocation_limit_is_refused_with_its_size(app, tmp_path):
+    path = str(tmp_path / "huge.png")
+    width, height = 16000, 10000  # 160 megapixels, over the 512 MB Qt may allocate for it
+    pngHeader(path, width, height)
+    with pytest.raises(OSError, match="%d x %d" % (width, height)):
+        readScaled(path, QSize(800, 600))
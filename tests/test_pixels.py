@@ -0,0 +1,53 @@
+import numpy as np
+
+from pixels import difference, downsample, erase, fill, invert, recolor
+
+
+def test_invert_opaque_and_translucent_rows():
+    rng = np.random.default_rng(1)
+    alpha = rng.integers(0, 256, (130, 70), dtype=np.uint32)
+    alpha[:64] = 255  # one band opaque, the others not
+    colours = [rng.integers(0, 256, (130, 70), dtype=np.uint32) * alpha // 255 for _ in range(3)]  # premultiplied
+    original = (alpha << 24) | (colours[0] << 16) | (colours[1] << 8) | colours[2]
+    pixels = original.copy()
+
+    invert(pixels, (0, 0, 70, 130))
+    assert ((pixels >> 24) == alpha).all()
+    for shift, colour in zip((16, 8, 0), colours):
+        assert (((pixels >> shift) & 0xFF) == alpha - colour).all()
+    invert(pixels, (0, 0, 70, 130))
+    assert (pixels == original).all()
+
+
+def test_fill_erase_and_recolor():
+    pixels = np.full((50, 60), 0xFFFFFFFF, np.uint32)
+    fill(pixels, (10, 5, 30, 15), 0xFFFF0000)
+    assert np.count_nonzero(pixels == 0xFFFF0000) == 20 * 10
+    assert recolor(pixels, (0, 0, 60, 50), 0xFFFF0000, 0xFF0000FF) == 200
+    assert erase(pixels, 20, 10, 3, 0xFFFFFFFF) == (17, 7, 24, 14)
+    assert pixels[10, 20] == pixels[10, 23] == 0xFFFFFFFF
+    assert pixels[7, 17] == 0xFF0000FF  # the corner of the box is outside the disc
+    assert erase(pixels, -10, -10, 3, 0) is None
+    assert erase(pixels, 0, 0, 2, 0xFF000000) == (0, 0, 3, 3)  # clipped to the canvas
+
+
+def test_downsample_averages_blocks():
+    rng = np.random.default_rng(2)
+    alpha = rng.integers(0, 256, (34, 50), dtype=np.uint32)
+    colours = [rng.integers(0, 256, (34, 50), dtype=np.uint32) * alpha // 255 for _ in range(3)]
+    pixels = (alpha << 24) | (colours[0] << 16) | (colours[1] << 8) | colours[2]
+
+    small = downsample(pixels, 4)
+    assert small.shape == (8, 12)  # the edge pixels that don't fill a block are dropped
+    for shift in (24, 16, 8, 0):
+        channel = ((pixels[:32, :48] >> shift) & 0xFF).astype(float)
+        expected = channel.reshape(8, 4, 12, 4).mean(axis=(1, 3))
+        assert np.abs(((small >> shift) & 0xFF) - expected).max() <= 1
+
+
+def test_difference_counts_and_boxes_the_changed_pixels():
+    first = np.full((130, 70), 0xFFFFFFFF, np.uint32)
+    second = first.copy()
+    assert difference(first, second) == (0, None)
+    second[3, 65] = second[100, 7] = 0
+    assert difference(first, second) == (2, (7, 3, 66, 101))
@@ -0,0 +1,34 @@
+import base64
+import zlib
+
+from PyQt6.QtGui import QColor
+
+RED = QColor("red").rgba()
+
+
+def tileEvent(data, pixels=(2, 2)):
+    return {"type": "tile", "x": 0, "y": 0, "width": 2, "height": 2, "pixels": list(pixels),
+            "data": base64.b64encode(data).decode()}
+
+
+def test_malformed_remote_events_are_skipped(window):
+    before = window.image.copy()
+    bad = [
+        "begin", [], {}, {"type": "begin"},
+        {"type": "begin", "stroke": 2, "color": RED, "width": 10 ** 9, "x": 0, "y": 0},
+        {"type": "begin", "stroke": 2, "color": RED, "width": 5, "x": 0, "y": 0, "tip": ["bogus", 1]},
+        {"type": "begin", "stroke": 2, "color": RED, "width": 5, "x": 0.5, "y": 0},
+        {"type": "points", "stroke": 1, "points": "100"},
+        {"type": "points", "stroke": 1, "points": [1.5, 2.5]},
+        tileEvent(b"not zlib"),
+        tileEvent(zlib.compress(b"\0" * 4)),  # one pixel, the tile says four
+        tileEvent(zlib.compress(b"\0" * 16), (2.0, 2)),
+    ]
+    window.drawRemote([{"type": "begin", "stroke": 1, "color": RED, "width": 5, "x": 10, "y": 10}] + bad +
+                      [{"type": "points", "stroke": 1, "points": [100, 10]}, {"type": "end", "stroke": 1}])
+
+    assert window.remoteSkipped == len(bad)
+    assert window.image.pixelColor(50, 10) == QColor("red")
+    assert window.image.pixelColor(1, 1) == before.pixelColor(1, 1)
+    window.undo()
+    assert window.image == before
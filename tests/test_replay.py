@@ -0,0 +1,28 @@
+from recorder import readSessions
+from replay import configure
+
+
+def test_replay_restores_the_recorded_game_configuration(app, tmp_path, monkeypatch):
+    from conftest import ROOT
+    from PictionaryGame import PictionaryGame
+    monkeypatch.chdir(ROOT)
+    path = str(tmp_path / "session.log")
+    game = PictionaryGame(seed=3, players=4, teams=["red", "blue", "red", "blue"])
+    game.engine.names = ["Ann", "Bo", "Cy", "Di"]
+    game.engine.scoring = {"easy": (5, 0), "hard": (7, 3)}
+    game.selectMode.blockSignals(True)
+    game.selectMode.setCurrentText("hard")
+    game.selectMode.blockSignals(False)
+    game.getList("hard")
+    game.startRecording(path)
+    game.stopRecording()
+    game.close()
+
+    (header, events), = readSessions(path)
+    replayed = PictionaryGame(seed=header["seed"], players=header["players"], teams=header["teams"])
+    configure(replayed, header)
+    engine = replayed.engine
+    assert (engine.players, engine.teams, engine.names) == (4, ["red", "blue", "red", "blue"], ["Ann", "Bo", "Cy", "Di"])
+    assert engine.scoring == {"easy": (5, 0), "hard": (7, 3)}
+    assert engine.mode == replayed.selectMode.currentText() == "hard"
+    replayed.close()
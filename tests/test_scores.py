@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from scores import ScoreBoard, main
+
+
+def play(board, rounds):
+    for i in range(rounds):
+        board.record({"Ann": 2, "Bob": i % 2}, "easy", "Ann", {"Ann": "red", "Bob": "blue"})
+
+
+def tear(path):
+    with open(path, "a", encoding="utf-8") as f:  # the game went down halfway through writing a round
+        f.write('{"round": 99, "match": 1, "po')
+
+
+def test_replay_after_a_truncated_tail(tmp_path):
+    path = str(tmp_path / "scores.log")
+    board = ScoreBoard(path, snapshotRounds=3)
+    play(board, 5)  # a snapshot after round 3, rounds 4 and 5 only in the log
+    board.file.close()  # not close(), which would snapshot round 5
+    tear(path)
+
+    board = ScoreBoard(path, snapshotRounds=3)
+    assert board.round == 5
+    assert board.replayed == 2
+    assert board.top() == [("Ann", 10, 5), ("Bob", 2, 5)]
+    assert board.top(teams=True) == [("red", 10, 5), ("blue", 2, 5)]
+    assert [entry[3] for entry in board.recent("Bob")] == [0, 1, 1, 2, 2]
+    with open(path, encoding="utf-8") as f:
+        assert f.read().endswith("}\n")  # the torn line is gone
+
+    play(board, 1)
+    board.close()
+    board = ScoreBoard(path)
+    assert board.round == 6
+    assert board.replayed == 0  # all from the snapshot written on close
+    assert board.fullHistory("Ann")[-1] == (6, 1, 2, 12)
+    board.close()
+
+
+def test_viewer_leaves_the_log_and_snapshot_alone(tmp_path, capsys):
+    path = str(tmp_path / "scores.log")
+    board = ScoreBoard(path, snapshotRounds=3)
+    play(board, 5)
+    board.file.close()
+    tear(path)
+    with open(path, "rb") as f:
+        log = f.read()
+    with open(path + ".snapshot", "rb") as f:
+        snapshot = f.read()
+
+    main([path, "--top", "2"])
+    main([path, "--player", "Bob"])
+    output = capsys.readouterr().out
+    assert "5 rounds in 1 matches" in output
+    assert "Ann" in output and "round       5" in output
+    with open(path, "rb") as f:
+        assert f.read() == log
+    with open(path + ".snapshot", "rb") as f:
+        assert f.read() == snapshot
+
+    board = ScoreBoard(path, readOnly=True)
+    with pytest.raises(ValueError):
+        board.record({"Ann": 1})
+    board.close()
+    assert os.path.getsize(path) == len(log)
@@ -0,0 +1,120 @@
+import asyncio
+import base64
+import os
+import socket
+
+from server import StrokeServer, StrokeClient, MAX_GUESS_LENGTH, MAX_BACKLOG_BYTES
+
+
+async def started():
+    server = StrokeServer()
+    host, port = await server.start("127.0.0.1", 0)
+    return server, host, port
+
+
+def test_non_object_message_closes_only_that_client():
+    async def scenario():
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        server, host, port = await started()
+        try:
+            for line in (b"[1]\n", b'"x"\n', b"3\n", b"{not json\n"):
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(line)
+                assert await asyncio.wait_for(reader.read(), 2) == b""  # the server hung up
+                writer.close()
+            client = StrokeClient()  # and still serves everyone else
+            reply = await client.connect(host, port, "room", "drawer")
+            assert reply["type"] == "joined"
+            await client.close()
+        finally:
+            await server.stop()
+        assert errors == []  # no handler died with an unhandled exception
+    asyncio.run(scenario())
+
+
+def test_guesses_reach_the_drawer_in_order_and_cut_short():
+    async def scenario():
+        server, host, port = await started()
+        drawer, guesser = StrokeClient(), StrokeClient()
+        try:
+            await drawer.connect(host, port, "room", "drawer")
+            await guesser.connect(host, port, "room", "guesser")
+            long = "x" * (MAX_GUESS_LENGTH + 50)
+            for text in ("dog", long, "cat"):
+                guesser.guess(text)
+            received = []
+            batches = drawer.guessBatches()
+            while len(received) < 3:
+                received += await asyncio.wait_for(batches.__anext__(), 2)
+            assert received == ["dog", long[:MAX_GUESS_LENGTH], "cat"]
+        finally:
+            await drawer.close()
+            await guesser.close()
+            await server.stop()
+    asyncio.run(scenario())
+
+
+def test_malformed_drawer_events_and_joins_drop_only_that_client():
+    async def scenario():
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        server, host, port = await started()
+        watcher, guesser = StrokeClient(), StrokeClient()
+        try:
+            await watcher.connect(host, port, "good", "drawer")
+            await guesser.connect(host, port, "good", "guesser")
+            for line in (b'{"type":"join","room":[1],"role":"drawer"}\n', b'{"type":"join","room":"x","role":{}}\n'):
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(line)
+                assert await asyncio.wait_for(reader.read(), 2) == b""
+                writer.close()
+            for event in ({"type": "points"}, {"type": "points", "stroke": 1, "points": [1, 2, 3]},
+                          {"type": "begin", "stroke": 1, "color": "red", "width": 3, "x": 0, "y": 0},
+                          {"type": "tile", "x": 0, "y": 0, "width": 1, "height": 1, "pixels": [1], "data": ""}):
+                bad = StrokeClient()
+                await bad.connect(host, port, "bad", "drawer")
+                bad.send(event)
+                assert await asyncio.wait_for(bad.reader.read(), 2) == b""  # dropped
+                await bad.close()
+
+            watcher.beginStroke(0xFF000000, 3, 1, 2)  # the other room still gets its frames
+            frames = guesser.frames()
+            events = await asyncio.wait_for(frames.__anext__(), 2)
+            assert events[0]["type"] == "begin"
+            assert not server.ticker.done()
+        finally:
+            await watcher.close()
+            await guesser.close()
+            await server.stop()
+        assert errors == []
+    asyncio.run(scenario())
+
+
+def test_guesser_that_never_reads_is_disconnected():
+    async def scenario():
+        server, host, port = await started()
+        drawer = StrokeClient()
+        try:
+            await drawer.connect(host, port, "room", "drawer")
+            sock = socket.socket()
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)  # fills up quickly
+            sock.connect((host, port))
+            reader, writer = await asyncio.open_connection(sock=sock)
+            writer.write(b'{"type":"join","room":"room","role":"guesser"}\n')
+            await reader.readline()  # joined, and nothing is read from now on
+
+            data = base64.b64encode(os.urandom(150 * 1024)).decode()
+            for i in range(4 * MAX_BACKLOG_BYTES // len(data)):  # tiles of different areas never replace each other
+                drawer.sendTile(i, 0, 1, 1, 1, 1, data)
+                await drawer.writer.drain()
+                await asyncio.sleep(server.frameInterval)
+                if server.disconnected:
+                    break
+            assert server.disconnected == 1
+            assert server.stats()["clients"] == 1  # only the drawer
+            writer.close()
+        finally:
+            await drawer.close()
+            await server.stop()
+    asyncio.run(scenario())
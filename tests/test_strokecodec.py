@@ -0,0 +1,98 @@
+import random
+from array import array
+
+import pytest
+
+import strokecodec
+from strokecodec import PRESSURE_LEVELS
+from brushes import BrushTip
+from strokes import StrokeModel
+
+
+def randomStrokes(seed, count=40):
+    rng = random.Random(seed)
+    strokes = []
+    for _ in range(count):
+        points = array('f')
+        pressures = array('f') if rng.random() < 0.5 else None
+        tip = (rng.choice(["round", "square", "chalk"]), rng.random()) if rng.random() < 0.5 else None
+        x, y, t, p = rng.randrange(-50, 4000), rng.randrange(-50, 3000), 0, rng.randrange(PRESSURE_LEVELS + 1)
+        for _ in range(rng.choice([0, 1, 2, 3, 255, 256, 257, 700])):
+            points.extend((x, y, t))
+            if pressures is not None:
+                pressures.append(p / PRESSURE_LEVELS)
+            jump = rng.choice([1, 4, 300])  # mostly small moves, sometimes a large one
+            x += rng.randint(-jump, jump)
+            y += rng.randint(-jump, jump)
+            t += rng.choice([0, 8, rng.randint(0, 5000)])
+            p = min(PRESSURE_LEVELS, max(0, p + rng.randint(-40, 40)))
+        strokes.append((rng.getrandbits(32), rng.randrange(1, 100), points, tip, pressures))
+    return strokes
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_round_trip(seed):
+    strokes = randomStrokes(seed)
+    assert strokecodec.decode(strokecodec.encode(strokes)) == strokes
+
+
+def test_constant_deltas_pack_to_nothing():
+    points = array('f', [value for i in range(200) for value in (i * 2, i, i * 8)])
+    encoded = strokecodec.encode([(0xff000000, 3, points)])
+    assert len(encoded) < 24
+    assert strokecodec.decode(encoded) == [(0xff000000, 3, points, None, None)]
+
+
+def test_streaming_in_any_split():
+    strokes = randomStrokes(7, 10)
+    encoded = strokecodec.encode(strokes)
+    for size in (1, 3, 1400):
+        decoder = strokecodec.StrokeDecoder()
+        decoded = []
+        for i in range(0, len(encoded), size):
+            decoded += decoder.feed(memoryview(encoded)[i:i + size])
+        assert decoded == strokes and decoder.finished()
+
+
+def test_stroke_readable_before_it_ends():
+    encoder = strokecodec.StrokeEncoder()
+    encoder.beginStroke(0xff000000, 5)
+    for i in range(strokecodec.CHUNK_POINTS + 10):
+        encoder.addPoint(i, -i, 8 * i)
+    decoder = strokecodec.StrokeDecoder()
+    assert decoder.feed(encoder.out) == []
+    assert len(decoder.current[2]) == 3 * strokecodec.CHUNK_POINTS  # the first chunk was flushed
+
+
+def test_truncated_and_foreign_data_are_rejected():
+    encoded = strokecodec.encode(randomStrokes(3, 3))
+    with pytest.raises(ValueError):
+        strokecodec.decode(encoded[:-1])
+    with pytest.raises(ValueError):
+        strokecodec.decode(b"PNG?" + encoded[4:])
+
+
+def test_model_round_trip_keeps_times():
+    clock = iter([0.0, 0.0123456, 0.0251, 0.0334999])
+    model = StrokeModel(clock=lambda: next(clock))
+    model.beginStroke(0xffff0000, 9, 10, 20)
+    for x in range(3):
+        model.addPoint(10 + x, 20 - x)
+    restored = StrokeModel.fromBytes(model.toBytes())
+    assert list(restored.strokes[0].points) == list(model.strokes[0].points)
+    assert list(model.strokes[0].points)[2::3] == [0, 12, 25, 33]  # whole milliseconds
+
+
+def test_model_round_trip_keeps_brush_tip_and_pressure():
+    clock = iter([0.0, 0.008, 0.016, 0.024, 0.5])
+    model = StrokeModel(clock=lambda: next(clock))
+    model.beginStroke(0xff0000ff, 12, 5, 5, BrushTip("chalk", 0.8), 0.31)
+    for i, pressure in enumerate((0.5, None, 0.73)):
+        model.addPoint(5 + i, 5 + 2 * i, pressure=pressure)
+    model.endStroke()
+    model.beginStroke(0xff000000, 3, 0, 0)  # the pen, no tablet
+    restored = StrokeModel.fromBytes(model.toBytes()).strokes
+    assert restored[0].tip == BrushTip("chalk", 0.8)
+    assert list(restored[0].pressures) == list(model.strokes[0].pressures)
+    assert list(restored[0].points) == list(model.strokes[0].points)
+    assert restored[1].tip is None and restored[1].pressures is None
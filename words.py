@@ -0,0 +1,140 @@
+# Word lists for the game
+#
+# Each mode's word file (e.g. easymode.txt) is parsed once, the first time the mode is used, and deduplicated.
+# Words are then handed out from a shuffled bag per mode: a draw is a list pop, and no word comes up again until
+# every other word in the mode has been drawn. The file is only parsed again if its modification time has changed,
+# which is checked when the bag runs out rather than on every draw.
+#
+# Large packs come from a WordCorpus database instead (see corpus.py). Those are never loaded into a list, each draw
+# is a query that skips the words drawn most recently in the mode.
+
+from collections import deque
+import csv
+import glob
+import os
+import random
+
+RECENT_WORDS = 50  # number of recent words a corpus pack avoids repeating
+
+
+class WordProvider:
+    '''
+    Serves words for each mode from a per-mode no-repeat shuffle bag
+    '''
+
+    def __init__(self, directory=".", rng=None, corpus=None):
+        self.directory = directory
+        self.rng = rng or random.Random()
+        self.corpus = corpus
+        self.recent = {}  # corpus pack -> deque of the words drawn last
+        self.lists = {}  # mode -> deduplicated list of words
+        self.mtimes = {}  # mode -> modification time of the file the list was read from
+        self.bags = {}  # mode -> words left to draw, drawn from the end
+        self.lastWord = {}  # mode -> the word drawn last, so a refilled bag doesn't start with it
+
+    def path(self, mode):
+        return os.path.join(self.directory, mode + 'mode.txt')
+
+    def modes(self):
+        '''
+        Every mode words can be drawn for: the packs in the corpus followed by the *mode.txt files not already in it
+        '''
+        modes = self.corpus.packs() if self.corpus is not None else []
+        for path in sorted(glob.glob(os.path.join(self.directory, '*mode.txt'))):
+            mode = os.path.basename(path)[:-len('mode.txt')]
+            if mode not in modes:
+                modes.append(mode)
+        return modes
+
+    def isCorpusPack(self, mode):
+        return self.corpus is not None and mode not in self.lists and self.corpus.packInfo(mode) is not None
+
+    def difficulty(self, mode):
+        '''
+        The difficulty tier of a mode, for word files this is the mode name itself
+        '''
+        info = self.corpus.packInfo(mode) if self.corpus is not None else None
+        return info["difficulty"] if info else mode
+
+    def prepare(self, mode):
+        '''
+        Make sure a mode is ready to draw from, reading its word file if it hasn't been read yet
+        '''
+        if not self.isCorpusPack(mode):
+            self.words(mode)
+
+    def words(self, mode):
+        '''
+        The deduplicated word list for a mode, read from file the first time it is asked for
+        '''
+        if mode not in self.lists:
+            self.load(mode)
+        return self.lists[mode]
+
+    def load(self, mode):
+        path = self.path(mode)
+        mtime = os.stat(path).st_mtime_ns
+        seen = set()
+        words = []
+        with open(path, newline='') as csv_file:
+            for row in csv.reader(csv_file, delimiter=','):
+                for word in row:
+                    word = word.strip()
+                    key = word.casefold()
+                    if word and key not in seen:  # "Window" is only in the bag once however often it is listed
+                        seen.add(key)
+                        words.append(word)
+        self.lists[mode] = words
+        self.mtimes[mode] = mtime
+        self.bags.pop(mode, None)
+
+    def reloadIfChanged(self, mode):
+        '''
+        Parse the mode's file again if it has been modified since it was read, returns True if it was reloaded
+        '''
+        try:
+            mtime = os.stat(self.path(mode)).st_mtime_ns
+        except OSError:  # keep using the words already loaded
+            return False
+        if mtime == self.mtimes.get(mode):
+            return False
+        self.load(mode)
+        return True
+
+    def draw(self, mode):
+        '''
+        Take the next word for a mode out of its bag, refilling and reshuffling the bag once it is empty
+        '''
+        if self.isCorpusPack(mode):
+            return self.drawFromCorpus(mode)
+        words = self.words(mode)
+        bag = self.bags.get(mode)
+        if not bag:
+            if bag is not None:  # the bag has run out, pick up any edits to the file before refilling it
+                self.reloadIfChanged(mode)
+                words = self.lists[mode]
+            if not words:
+                raise ValueError("no words in " + self.path(mode))
+            bag = list(words)
+            self.rng.shuffle(bag)
+            if len(bag) > 1 and bag[-1] == self.lastWord.get(mode):  # don't repeat the word across the refill
+                bag[0], bag[-1] = bag[-1], bag[0]
+            self.bags[mode] = bag
+        word = bag.pop()
+        self.lastWord[mode] = word
+        return word
+
+    def drawFromCorpus(self, mode):
+        recent = self.recent.setdefault(mode, deque(maxlen=RECENT_WORDS))
+        word = self.corpus.draw(pack=mode, exclude=tuple(recent))
+        if word is None:  # the pack is smaller than the recent list, allow repeats
+            recent.clear()
+            word = self.corpus.draw(pack=mode)
+        if word is None:
+            raise ValueError("no words in pack " + mode)
+        recent.append(word)
+        self.lastWord[mode] = word
+        return word
+
+    def remaining(self, mode):
+        return len(self.bags.get(mode) or ())